@@ -1,111 +1,251 @@
+"""Command line entry point for the building cooling load prediction pipeline.
+
+Subcommands run one step each (``ingest``, ``features``, ``train``,
+``predict``, ``evaluate``), search hyperparameters (``tune``), serve
+forecasts over HTTP (``serve``) or run the whole pipeline (``run``, the
+default, so
+``python main.py`` and ``python main.py --buildings ...`` behave as before).
+Only the standard library is imported at start-up; each subcommand imports
+the modules listed in :data:`COMMAND_MODULES` when it runs, so short jobs do
+not pay for scikit-learn, matplotlib or the optional model libraries.
+``scripts/check_import_time.py`` keeps those imports within budget.
+"""
+
+import argparse
+import importlib
+import json
 import os
-import yaml
-import joblib
-import pandas as pd
-from src.data_processing.load_data import load_csv_data, save_csv_data
-from src.data_processing.calculate_cooling_load import calculate_chiller_cooling_load
-from src.data_processing.aggregate_data import aggregate_to_hourly
-from src.utils.helpers import create_features
-from src.evaluation.validation import simple_train_test_split
-from src.evaluation.metrics import nrmse
-from src.models.ensemble import mean_ensemble, save_ensemble
-
-def main():
-    """
-    Main function to run the building cooling load prediction pipeline.
-    """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(script_dir, "config.yaml")
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules each subcommand imports before running
+COMMAND_MODULES = {
+    'ingest': ('src.utils.config', 'src.pipeline.runner'),
+    'features': ('src.utils.config', 'src.pipeline.runner'),
+    'train': ('src.utils.config', 'src.pipeline.runner', 'sklearn.ensemble', 'src.evaluation.metrics',
+              'src.evaluation.validation', 'src.models.ensemble'),
+    'predict': ('src.utils.config', 'src.pipeline.runner', 'sklearn.ensemble', 'src.models.ensemble'),
+    'evaluate': ('src.utils.config', 'src.pipeline.runner', 'sklearn.ensemble', 'src.evaluation.metrics',
+                 'src.evaluation.validation'),
+    'run': ('src.utils.config', 'src.pipeline.runner', 'sklearn.ensemble', 'src.evaluation.metrics',
+            'src.evaluation.validation', 'src.models.ensemble'),
+    'tune': ('src.utils.config', 'src.pipeline.runner', 'src.evaluation.validation', 'src.models.tuning'),
+    'serve': ('src.utils.config', 'src.pipeline.runner', 'src.models.artifacts', 'src.serving.server'),
+}
+
 
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+def load_command(name: str) -> None:
+    """Import the modules subcommand ``name`` depends on."""
 
+    for module in COMMAND_MODULES[name]:
+        importlib.import_module(module)
+
+
+def _load_config(args):
+    from src.utils.config import load_config
+
+    config = load_config(args.config)
     print(f"Starting project: {config['project_name']}")
+    return config
+
+
+def _pipeline(args, config):
+    from src.pipeline.runner import BuildingPipeline, default_building_paths, portfolio_building_paths
+
+    paths = portfolio_building_paths(config, args.building) if args.building else default_building_paths(config)
+    return BuildingPipeline(paths, config)
+
+
+def cmd_ingest(args):
+    config = _load_config(args)
+    if not _pipeline(args, config).ingest():
+        return 1
+
+
+def cmd_features(args):
+    config = _load_config(args)
+    _pipeline(args, config).features()
+
+
+def cmd_train(args):
+    config = _load_config(args)
+    _pipeline(args, config).train()
+
+
+def cmd_predict(args):
+    config = _load_config(args)
+    predictions = _pipeline(args, config).predict(hours=args.hours)
+    if predictions is None:
+        return 1
+    if args.hours is not None:
+        if args.output:
+            predictions.to_csv(args.output, index=False)
+            print(f"Predictions saved to {args.output}")
+        else:
+            print(predictions.to_string(index=False))
+
+
+def cmd_evaluate(args):
+    config = _load_config(args)
+    figures_dir = config['reports']['figures'] if args.plots else None
+    _pipeline(args, config).evaluate(figures_dir=figures_dir)
+
+
+def cmd_tune(args):
+    from src.models.tuning import successive_halving
 
-    # Construct absolute paths from config
-    for key, path in config['data']['raw'].items():
-        config['data']['raw'][key] = os.path.join(script_dir, path)
-    for key, path in config['data']['processed'].items():
-        config['data']['processed'][key] = os.path.join(script_dir, path)
-
-    # Step 2: Data Loading
-    try:
-        building_df = load_csv_data(config['data']['raw']['building_x'])
-        print("Building_X.csv loaded successfully.")
-    except FileNotFoundError:
-        print(f"Building_X.csv not found at {config['data']['raw']['building_x']}. Please add it to the data/raw directory.")
+    config = _load_config(args)
+    X, y, feature_columns = _pipeline(args, config).training_data()
+    cv_config = config.get('model', {}).get('cv', {})
+    result = successive_halving(
+        args.model, X, y,
+        n_splits=cv_config.get('n_splits', 5),
+        gap=cv_config.get('gap', 0),
+        n_jobs=args.n_jobs if args.n_jobs is not None else cv_config.get('n_jobs', -1),
+        time_budget=args.time_budget,
+        random_state=args.seed,
+        save=not args.dry_run,
+    )
+    stopped = sum(trial['stopped_early'] for trial in result.trials)
+    print(f"{len(result.trials)} trials ({stopped} stopped early) on {len(y)} rows x {len(feature_columns)} features "
+          f"in {result.elapsed:.0f}s")
+    if result.stopped:
+        print(f"Search stopped early: {result.stopped}")
+    print(f"Best time-series CV NRMSE: {result.best_score:.4f}")
+    print(json.dumps(result.best_params, indent=4))
+    if result.saved:
+        print(f"Saved to models/model_configs/{args.model}_config.json")
+    elif not args.dry_run:
+        print(f"Not saved: the search stopped before the winner was scored with the full budget; "
+              f"raise --time-budget to tune {args.model}")
+
+
+def cmd_serve(args):
+    from src.pipeline.runner import expand_building_paths
+    from src.serving.server import run_server
+    from src.serving.service import ForecastService
+
+    config = _load_config(args)
+    settings = config.get('serving', {})
+    service = ForecastService.from_config(
+        config,
+        expand_building_paths(args.buildings) if args.buildings else (),
+        model=args.model or settings.get('model', 'ensemble_model'),
+        max_hours=settings.get('max_hours', 24 * 14),
+    )
+    run_server(
+        service,
+        host=args.host or settings.get('host', '127.0.0.1'),
+        port=args.port if args.port is not None else settings.get('port', 8080),
+        unix_socket=args.unix_socket or settings.get('unix_socket'),
+        window_ms=settings.get('batch_window_ms', 5.0) if args.batch_window_ms is None else args.batch_window_ms,
+        max_batch=settings.get('max_batch', 64) if args.max_batch is None else args.max_batch,
+        queue_size=settings.get('queue_size', 1024),
+    )
+
+
+def cmd_run(args):
+    from src.pipeline.runner import default_building_paths, run_building, run_portfolio
+
+    config = _load_config(args)
+    if args.buildings:
+        results = run_portfolio(args.buildings, config, max_workers=args.max_workers)
+        for result in results:
+            if 'error' in result:
+                print(f"{result['building']}: failed ({result['error']})")
+            else:
+                print(f"{result['building']}: NRMSE {result['nrmse']:.4f} on {result['n_hours']} hours in {result['seconds']:.1f}s")
         return
 
-    # Step 3: Calculate Chiller Cooling Loads
-    chiller_loads_df = calculate_chiller_cooling_load(building_df)
-    save_csv_data(chiller_loads_df, config['data']['processed']['chiller_loads'])
-    print(f"Chiller cooling loads calculated and saved to {config['data']['processed']['chiller_loads']}")
-
-    # Step 4: Data Aggregation
-    hourly_df = aggregate_to_hourly(chiller_loads_df, timestamp_col='record_timestamp')
-    save_csv_data(hourly_df, config['data']['processed']['hourly_training_data'])
-    print(f"Data aggregated to hourly and saved to {config['data']['processed']['hourly_training_data']}")
-
-    # Step 5: Feature Engineering
-    print("Starting feature engineering...")
-    feature_eng_config = config['feature_engineering']
-    features_df = create_features(
-        data_path=config['data']['processed']['hourly_training_data'],
-        timestamp_col=feature_eng_config['timestamp_col'],
-        cols_to_lag=feature_eng_config['cols_to_lag'],
-        window_sizes=feature_eng_config['window_sizes']
+    if run_building(default_building_paths(config), config) is None:
+        return 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Building cooling load prediction pipeline")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--config",
+        default=os.path.join(SCRIPT_DIR, "config.yaml"),
+        help="Configuration file (default: config.yaml next to main.py)",
+    )
+    building = argparse.ArgumentParser(add_help=False, parents=[common])
+    building.add_argument(
+        "--building",
+        help="Telemetry CSV of one portfolio building (default: the building in config.yaml)",
+    )
+
+    ingest = subparsers.add_parser("ingest", parents=[building], help="Compute chiller loads and hourly data")
+    ingest.set_defaults(func=cmd_ingest)
+
+    features = subparsers.add_parser("features", parents=[building], help="Build training and test features")
+    features.set_defaults(func=cmd_features)
+
+    train = subparsers.add_parser("train", parents=[building], help="Fit and save the model")
+    train.set_defaults(func=cmd_train)
+
+    predict = subparsers.add_parser("predict", parents=[building], help="Predict the test horizon")
+    predict.add_argument("--hours", type=int, help="Only predict (and print) the first HOURS hours")
+    predict.add_argument("--output", help="With --hours, write the predictions to this CSV instead of printing")
+    predict.set_defaults(func=cmd_predict)
+
+    evaluate = subparsers.add_parser("evaluate", parents=[building], help="Report the validation score")
+    evaluate.add_argument("--plots", action="store_true", help="Save evaluation figures to reports.figures")
+    evaluate.set_defaults(func=cmd_evaluate)
+
+    tune = subparsers.add_parser("tune", parents=[building], help="Search model hyperparameters")
+    tune.add_argument(
+        "--model",
+        choices=("lightgbm", "xgboost", "random_forest"),
+        default="lightgbm",
+        help="Model whose <model>_search.json space is searched (default: lightgbm)",
+    )
+    tune.add_argument("--time-budget", type=float, default=600, help="Seconds for the search (default: 600)")
+    tune.add_argument("--n-jobs", type=int, help="Parallel trials (defaults to model.cv.n_jobs in config.yaml)")
+    tune.add_argument("--seed", type=int, default=42, help="Seed of the configuration sampler")
+    tune.add_argument("--dry-run", action="store_true", help="Report the winner without saving its config")
+    tune.set_defaults(func=cmd_tune)
+
+    serve = subparsers.add_parser("serve", parents=[common], help="Serve forecasts over HTTP or a Unix socket")
+    serve.add_argument("--buildings", nargs="+", help="Telemetry CSVs or glob patterns of the buildings to serve")
+    serve.add_argument("--model", help="Model artifact to serve (default: serving.model in config.yaml)")
+    serve.add_argument("--host", help="Address to listen on (default: serving.host)")
+    serve.add_argument("--port", type=int, help="TCP port (default: serving.port)")
+    serve.add_argument("--unix-socket", help="Listen on this Unix socket instead of TCP")
+    serve.add_argument("--batch-window-ms", type=float, help="How long a request waits for others to batch with")
+    serve.add_argument("--max-batch", type=int, help="Largest number of requests forecast together")
+    serve.set_defaults(func=cmd_serve)
+
+    run = subparsers.add_parser("run", parents=[common], help="Run the full pipeline (default)")
+    run.add_argument(
+        "--buildings",
+        nargs="+",
+        help="Telemetry CSVs or glob patterns; runs every building in a process pool",
     )
-    save_csv_data(features_df, config['data']['processed']['features_train'])
-    print(f"Features created and saved to {config['data']['processed']['features_train']}")
-
-    # Step 18: Feature engineering for test data
-    test_raw = config['data']['raw'].get('test')
-    if os.path.exists(test_raw):
-        test_features = create_features(
-            data_path=test_raw,
-            timestamp_col=feature_eng_config['timestamp_col'],
-            cols_to_lag=feature_eng_config['cols_to_lag'],
-            window_sizes=feature_eng_config['window_sizes']
-        )
-        save_csv_data(test_features, config['data']['processed']['features_test'])
-        print(f"Test features saved to {config['data']['processed']['features_test']}")
-    else:
-        print("Test data not found; skipping test feature engineering.")
-
-    # Step 19: Train simple model and evaluate
-    from sklearn.ensemble import RandomForestRegressor
-
-    train_df = features_df.select_dtypes(include=[float, int]).dropna()
-    y = train_df['Total_Cooling_Load'].values
-    X = train_df.drop(columns=['Total_Cooling_Load']).values
-    X_tr, X_va, y_tr, y_va = simple_train_test_split(X, y, test_size=0.2)
-
-    model = RandomForestRegressor(random_state=42)
-    model.fit(X_tr, y_tr)
-    preds = model.predict(X_va)
-    print(f"Validation NRMSE: {nrmse(y_va, preds):.4f}")
-
-    model_dir = config['models']['trained_models']
-    os.makedirs(model_dir, exist_ok=True)
-    best_model_path = os.path.join(model_dir, 'best_model.pkl')
-    joblib.dump(model, best_model_path)
-
-    # Step 20: Create simple ensemble (single model for placeholder)
-    ensemble = mean_ensemble([model])
-    ensemble_path = os.path.join(model_dir, 'ensemble_model.pkl')
-    save_ensemble(ensemble, ensemble_path)
-
-    # Step 21: Generate predictions on test data if available
-    if 'test_features' in locals():
-        test_X = test_features.select_dtypes(include=[float, int]).drop(columns=['Total_Cooling_Load'], errors='ignore')
-        test_preds = model.predict(test_X)
-        submissions_dir = config['data']['submissions']
-        os.makedirs(submissions_dir, exist_ok=True)
-        save_csv_data(pd.DataFrame({'prediction': test_preds}), os.path.join(submissions_dir, 'submission_final.csv'))
-        ens_preds = ensemble.predict(test_X)
-        save_csv_data(pd.DataFrame({'prediction': ens_preds}), os.path.join(submissions_dir, 'submission_ensemble.csv'))
-        print(f"Predictions saved to {submissions_dir}")
+    run.add_argument(
+        "--max-workers",
+        type=int,
+        help="Concurrent buildings (defaults to pipeline.max_workers in config.yaml)",
+    )
+    run.set_defaults(func=cmd_run)
+    return parser
+
+
+def main(argv=None):
+    """
+    Main function to run the building cooling load prediction pipeline.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # No subcommand (including the legacy `--buildings ...` form) means `run`
+    if not argv or (argv[0] not in COMMAND_MODULES and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "run")
+    args = build_parser().parse_args(argv)
+    load_command(args.command)
+    return args.func(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
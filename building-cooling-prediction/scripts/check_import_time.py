@@ -0,0 +1,97 @@
+"""Check that every ``main.py`` subcommand starts within its import-time budget.
+
+Each subcommand's imports (``main.COMMAND_MODULES``) are timed in a fresh
+interpreter, keeping the fastest of ``--repeat`` runs to filter out noise.
+The check fails when a subcommand exceeds its budget or imports a module it
+must not load (e.g. ``ingest`` pulling in scikit-learn). Run it from the
+project directory:
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --scale 2   # slower machine
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Wall-clock budget in milliseconds for importing each subcommand's modules
+BUDGETS_MS = {
+    'ingest': 1000,
+    'features': 1000,
+    'train': 4000,
+    'predict': 4000,
+    'evaluate': 4000,
+    'run': 4000,
+    'tune': 4000,
+    'serve': 1000,
+}
+
+HEAVY = ('tensorflow', 'xgboost', 'lightgbm', 'matplotlib')
+# Modules a subcommand must not import at all
+FORBIDDEN = {
+    'ingest': HEAVY + ('sklearn',),
+    'features': HEAVY + ('sklearn',),
+    'train': HEAVY,
+    'predict': HEAVY,
+    'evaluate': HEAVY,
+    'run': HEAVY,
+    'tune': HEAVY,
+    # Compiled artifacts score with NumPy alone
+    'serve': HEAVY + ('sklearn',),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+main.load_command(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({'ms': elapsed * 1000, 'modules': sorted({m.split('.')[0] for m in sys.modules})}))
+"""
+
+
+def measure(command: str) -> tuple[float, set[str]]:
+    """Import time (ms) of ``command`` in a fresh interpreter and the top-level modules it loaded."""
+
+    out = subprocess.run(
+        [sys.executable, '-c', PROBE, command],
+        cwd=PROJECT_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    return result['ms'], set(result['modules'])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the main.py subcommands")
+    parser.add_argument("commands", nargs="*", default=list(BUDGETS_MS), help="Subcommands to check (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per subcommand; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. for slow CI machines")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    failures = []
+    for command in args.commands:
+        runs = [measure(command) for _ in range(max(1, args.repeat))]
+        ms = min(t for t, _ in runs)
+        budget = BUDGETS_MS[command] * args.scale
+        forbidden = sorted(set(FORBIDDEN[command]) & runs[0][1])
+        ok = ms <= budget and not forbidden
+        print(f"{command:<9} {ms:7.0f} ms  (budget {budget:.0f} ms)  {'ok' if ok else 'FAIL'}")
+        if forbidden:
+            print(f"          imports {', '.join(forbidden)}")
+        if not ok:
+            failures.append(command)
+
+    if failures:
+        print(f"Import-time budget exceeded for: {', '.join(failures)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
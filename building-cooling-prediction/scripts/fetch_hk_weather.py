@@ -1,4 +1,6 @@
-import os
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import pandas as pd
 import requests
@@ -6,10 +8,21 @@ from requests.adapters import HTTPAdapter, Retry
 
 EXTERNAL_DIR = Path("data/raw/external")
 CACHE_DIR = EXTERNAL_DIR / "cache"
-STATION = "HKO"
+ARCHIVE_PATH = EXTERNAL_DIR / "hk_weather_archive.csv"
+STATIONS = ["HKO"]
 
-URL_TEMP = f"https://data.weather.gov.hk/weatherAPI/opendata/opendata.php?dataType=CLMTEMP&rformat=csv&station={STATION}"
-URL_RAIN_ALL = f"https://data.weather.gov.hk/weatherAPI/cis/csvfile/{STATION}/ALL/daily_{STATION}_RF_ALL.csv"
+BASE_URL = "https://data.weather.gov.hk"
+URL_TEMP = "{base}/weatherAPI/opendata/opendata.php?dataType=CLMTEMP&rformat=csv&station={station}"
+URL_RAIN_ALL = "{base}/weatherAPI/cis/csvfile/{station}/ALL/daily_{station}_RF_ALL.csv"
+
+# Downloads per station: URL template and cache file name
+SOURCES = {
+    "temperature": (URL_TEMP, "{station}_CLMTEMP_all.csv"),
+    "rainfall": (URL_RAIN_ALL, "{station}_RF_ALL.csv"),
+}
+
+ARCHIVE_COLUMNS = ["station", "date", "Tmax", "Tmin", "Tmean", "Rain_mm"]
+VALUE_COLUMNS = ARCHIVE_COLUMNS[2:]
 
 def session_with_retries():
     s = requests.Session()
@@ -24,23 +37,47 @@ def session_with_retries():
     s.headers.update({"User-Agent": "hk-weather-fetch/1.0"})
     return s
 
-def fetch_csv(url: str, cache_name: str) -> pd.DataFrame:
-    EXTERNAL_DIR.mkdir(parents=True, exist_ok=True)
+def _meta_path(cache_path: Path) -> Path:
+    return cache_path.with_name(cache_path.name + ".meta.json")
+
+def fetch_csv(url: str, cache_name: str) -> tuple[pd.DataFrame, bool]:
+    """Download ``url`` into the cache, skipping the body when the server says it is unchanged.
+
+    The ETag / Last-Modified of the previous download are sent back as
+    If-None-Match / If-Modified-Since. Returns the parsed CSV and whether it
+    changed since the last download.
+    """
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_path = CACHE_DIR / cache_name
+    meta_path = _meta_path(cache_path)
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() and cache_path.exists() else {}
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    # One session per call: downloads run in parallel threads
     s = session_with_retries()
     try:
-        r = s.get(url, timeout=30)
+        r = s.get(url, headers=headers, timeout=30)
+        if r.status_code == 304:
+            return pd.read_csv(cache_path), False
         r.raise_for_status()
         # write a cache copy so you can re-run offline
-        cache_path = CACHE_DIR / cache_name
         cache_path.write_bytes(r.content)
-        return pd.read_csv(cache_path)
+        meta_path.write_text(json.dumps({
+            "url": url,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+        }))
+        return pd.read_csv(cache_path), True
     except Exception as e:
         # Fallback to cache if present
-        cache_path = CACHE_DIR / cache_name
         if cache_path.exists():
             print(f"[warn] Network failed, using cached file: {cache_path.name} ({e})")
-            return pd.read_csv(cache_path)
+            return pd.read_csv(cache_path), False
         raise RuntimeError(
             f"Download failed for {url} ({e}). "
             f"If you are behind a proxy, set HTTPS_PROXY/HTTP_PROXY. "
@@ -97,34 +134,125 @@ def tidy_rainfall(df_rf: pd.DataFrame) -> pd.DataFrame:
 def merge_temp_rain(temp: pd.DataFrame, rain: pd.DataFrame) -> pd.DataFrame:
     return pd.merge(temp, rain[["date","Rain_mm"]], on="date", how="outer").sort_values("date")
 
-def slice_year_month(df: pd.DataFrame, year: int, month: int | None = None) -> pd.DataFrame:
-    df = df[df["date"].dt.year == year]
-    if month:
-        df = df[df["date"].dt.month == month]
+def slice_date_range(df: pd.DataFrame, start: str | None = None, end: str | None = None) -> pd.DataFrame:
+    if start:
+        df = df[df["date"] >= pd.Timestamp(start)]
+    if end:
+        df = df[df["date"] <= pd.Timestamp(end)]
     return df
 
-def main():
-    # Try to download (or use cache)
-    temp_csv = fetch_csv(URL_TEMP, f"{STATION}_CLMTEMP_all.csv")
-    rain_csv = fetch_csv(URL_RAIN_ALL, f"{STATION}_RF_ALL.csv")
+def fetch_source(station: str, source: str, base_url: str = BASE_URL) -> tuple[pd.DataFrame, bool]:
+    """Download (or revalidate) one source of one station; see ``SOURCES``."""
+    url, cache_name = SOURCES[source]
+    return fetch_csv(url.format(base=base_url, station=station), cache_name.format(station=station))
+
+def combine_station(station: str, temp_csv: pd.DataFrame, rain_csv: pd.DataFrame) -> pd.DataFrame:
+    """Daily temperature and rainfall of one station in archive layout."""
+    combined = merge_temp_rain(tidy_temperature(temp_csv), tidy_rainfall(rain_csv))
+    combined.insert(0, "station", station)
+    return combined.reindex(columns=ARCHIVE_COLUMNS)
+
+def load_archive(path: Path = ARCHIVE_PATH) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+    archive = pd.read_csv(path)
+    archive["date"] = pd.to_datetime(archive["date"], format="%Y-%m-%d")
+    return archive
 
-    temp = tidy_temperature(temp_csv)
-    rain = tidy_rainfall(rain_csv)
-    combined = merge_temp_rain(temp, rain)
+def _write_archive(rows: pd.DataFrame, path: Path, append: bool) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if append:
+        rows.to_csv(path, mode="a", header=False, index=False, date_format="%Y-%m-%d")
+        return
+    tmp = path.with_name(path.name + ".tmp")
+    rows.to_csv(tmp, index=False, date_format="%Y-%m-%d")
+    tmp.replace(path)
 
-    # Outputs required by the challenge
-    y2023 = slice_year_month(combined, 2023)
-    (EXTERNAL_DIR / "hk_weather_2023.csv").write_text(y2023.to_csv(index=False), encoding="utf-8")
+def merge_into_archive(new: pd.DataFrame, archive: pd.DataFrame, path: Path = ARCHIVE_PATH) -> tuple[int, int]:
+    """Add new (station, date) rows and fill in stored rows the sources now complete or revise.
 
-    jan2024 = slice_year_month(combined, 2024, 1)
-    (EXTERNAL_DIR / "hk_weather_2024_jan.csv").write_text(jan2024.to_csv(index=False), encoding="utf-8")
+    New dates are appended. A stored row whose values are missing or differ
+    from the downloaded ones is updated (a missing downloaded value never
+    erases a stored one), in which case the archive is rewritten atomically.
+    This covers days stored while one source was a day behind the other.
+    Returns the number of added and updated rows.
+    """
+    new = new.drop_duplicates(["station", "date"], keep="last").set_index(["station", "date"])
+    stored = archive.set_index(["station", "date"])
+    fresh = new[~new.index.isin(stored.index)].sort_index()
+
+    overlap = new.index.intersection(stored.index)
+    old_values = stored.loc[overlap, VALUE_COLUMNS].astype(float)
+    merged = new.loc[overlap, VALUE_COLUMNS].astype(float).combine_first(old_values).reindex_like(old_values)
+    same = (merged == old_values) | (merged.isna() & old_values.isna())
+    updated = merged[~same.all(axis=1)]
+
+    if not updated.empty:
+        stored.loc[updated.index, VALUE_COLUMNS] = updated
+        rows = pd.concat([stored, fresh]).sort_index()
+        _write_archive(rows.reset_index().reindex(columns=ARCHIVE_COLUMNS), path, append=False)
+    elif not fresh.empty:
+        rows = fresh.reset_index().reindex(columns=ARCHIVE_COLUMNS)
+        _write_archive(rows, path, append=path.exists())
+    return len(fresh), len(updated)
+
+def update_archive(
+    stations: list[str],
+    base_url: str = BASE_URL,
+    archive_path: Path = ARCHIVE_PATH,
+    max_workers: int = 8,
+) -> pd.DataFrame:
+    """Fetch every source of every station concurrently and merge new dates into the archive."""
+    jobs = [(station, source) for station in stations for source in SOURCES]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = dict(zip(jobs, pool.map(lambda job: fetch_source(*job, base_url), jobs)))
+
+    archive = load_archive(archive_path)
+    archived_stations = set(archive["station"])
+    changed = []
+    for station in stations:
+        (temp_csv, temp_changed), (rain_csv, rain_changed) = (results[station, s] for s in SOURCES)
+        if temp_changed or rain_changed or station not in archived_stations:
+            changed.append(combine_station(station, temp_csv, rain_csv))
+    if changed:
+        added, updated = merge_into_archive(pd.concat(changed, ignore_index=True), archive, archive_path)
+        print(f"Added {added} new and updated {updated} station-days in {archive_path.as_posix()}")
+        archive = load_archive(archive_path)
+    else:
+        print("All sources unchanged; archive is up to date.")
+    return archive
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch Hong Kong Observatory daily weather into a local archive")
+    parser.add_argument("--stations", nargs="+", default=STATIONS, help="Station codes (default: HKO)")
+    parser.add_argument("--start", help="First date to export (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date to export (YYYY-MM-DD)")
+    parser.add_argument("--output", help="Write the selected stations/date range from the archive to this CSV")
+    parser.add_argument("--base-url", default=BASE_URL, help="Server to download from (e.g. a local mirror)")
+    parser.add_argument("--archive", default=str(ARCHIVE_PATH), help="Path of the persistent weather archive")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    archive_path = Path(args.archive)
+    try:
+        archive = update_archive(args.stations, base_url=args.base_url, archive_path=archive_path)
+    except RuntimeError as e:
+        print(e)
+        print("\nIf you hit DNS/proxy errors again, manually download these files:")
+        for station in args.stations:
+            for url, cache_name in SOURCES.values():
+                print(" -", url.format(base=args.base_url, station=station), " -> cache file:",
+                      (CACHE_DIR / cache_name.format(station=station)).as_posix())
+        raise SystemExit(1)
 
-    print("Saved:")
-    print(" -", (EXTERNAL_DIR / "hk_weather_2023.csv").as_posix())
-    print(" -", (EXTERNAL_DIR / "hk_weather_2024_jan.csv").as_posix())
-    print("\nIf you hit DNS/proxy errors again, manually download these two:")
-    print(" 1) ", URL_TEMP, "  -> cache file:", (CACHE_DIR / f"{STATION}_CLMTEMP_all.csv").as_posix())
-    print(" 2) ", URL_RAIN_ALL, " -> cache file:", (CACHE_DIR / f"{STATION}_RF_ALL.csv").as_posix())
+    if args.output:
+        selected = archive[archive["station"].isin(args.stations)]
+        selected = slice_date_range(selected, args.start, args.end).sort_values(["station", "date"])
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        selected.to_csv(out, index=False, date_format="%Y-%m-%d")
+        print(f"Saved {len(selected)} rows to {out.as_posix()}")
 
 if __name__ == "__main__":
     main()
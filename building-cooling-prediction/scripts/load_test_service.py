@@ -0,0 +1,119 @@
+"""Load-test a running forecast service (``python main.py serve``).
+
+Opens ``--concurrency`` keep-alive connections, each sending forecast
+requests back to back for ``--duration`` seconds (or ``--requests`` in
+total), and reports throughput, client-side latency percentiles and the
+server's ``/stats``. Uses only the standard library and NumPy:
+
+    python main.py serve &
+    python scripts/load_test_service.py --concurrency 32 --duration 20
+    python scripts/load_test_service.py --unix-socket /tmp/forecast.sock --hours 48
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+async def _open(args):
+    if args.unix_socket:
+        return await asyncio.open_unix_connection(args.unix_socket)
+    url = urlparse(args.url)
+    return await asyncio.open_connection(url.hostname, url.port or 80)
+
+
+async def request(reader, writer, method: str, path: str, payload=None) -> tuple[int, dict]:
+    """Send one HTTP/1.1 request on an open connection and read the JSON response."""
+    body = b'' if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(args, deadline: float, budget: list, latencies: list, statuses: dict, rng: random.Random):
+    reader, writer = await _open(args)
+    try:
+        while time.perf_counter() < deadline and (budget[0] is None or budget[0] > 0):
+            if budget[0] is not None:
+                budget[0] -= 1
+            payload = {'hours': rng.randint(1, args.hours)}
+            if args.building:
+                payload['building'] = rng.choice(args.building)
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, 'POST', '/forecast', payload)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(args) -> dict:
+    reader, writer = await _open(args)
+    _, health = await request(reader, writer, 'GET', '/health')
+    print(f"Buildings: {', '.join(health['buildings'])}")
+
+    latencies, statuses = [], {}
+    budget = [args.requests]
+    start = time.perf_counter()
+    deadline = start + (args.duration if args.requests is None else float('inf'))
+    await asyncio.gather(*(
+        client(args, deadline, budget, latencies, statuses, random.Random(args.seed + i))
+        for i in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    _, server_stats = await request(reader, writer, 'GET', '/stats')
+    writer.close()
+    ms = np.array(latencies) * 1000
+    report = {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_s': len(latencies) / elapsed,
+        'statuses': statuses,
+        'latency_ms': {f'p{p}': float(np.percentile(ms, p)) for p in (50, 90, 95, 99)} if len(ms) else {},
+        'server': server_stats,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help='Service URL (default: %(default)s)')
+    parser.add_argument('--unix-socket', help='Connect to this Unix socket instead of --url')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent connections (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run (default: %(default)s)')
+    parser.add_argument('--requests', type=int, help='Stop after this many requests instead of --duration')
+    parser.add_argument('--hours', type=int, default=24, help='Longest horizon requested (default: %(default)s)')
+    parser.add_argument('--building', nargs='+', help='Buildings to spread requests over (default: the only one)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"{report['requests']} requests in {report['seconds']:.1f}s "
+          f"({report['requests_per_s']:.0f}/s) with {args.concurrency} connections, statuses {report['statuses']}")
+    print("Client latency (ms): " + ', '.join(f'{k} {v:.1f}' for k, v in report['latency_ms'].items()))
+    batch = report['server'].get('batch_size', {})
+    if batch:
+        print(f"Server batches: {report['server']['batches']}, mean size {batch['mean']:.1f}, max {batch['max']:.0f}")
+    print(json.dumps(report['server'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
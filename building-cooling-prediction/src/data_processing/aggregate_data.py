@@ -1,4 +1,5 @@
 import pandas as pd
+from .load_data import parse_timestamps
 
 def aggregate_to_hourly(df: pd.DataFrame, timestamp_col: str = 'timestamp') -> pd.DataFrame:
     """
@@ -11,7 +12,7 @@ def aggregate_to_hourly(df: pd.DataFrame, timestamp_col: str = 'timestamp') -> p
     Returns:
         DataFrame with hourly aggregated data.
     """
-    df[timestamp_col] = pd.to_datetime(df[timestamp_col], dayfirst=True)
+    df[timestamp_col] = parse_timestamps(df[timestamp_col])
     df.set_index(timestamp_col, inplace=True)
     hourly_df = df.resample('h').mean()
     return hourly_df.reset_index()
@@ -1,31 +1,72 @@
+import re
+import numpy as np
 import pandas as pd
 from src.utils import constants
 
+# Telemetry columns are named like "CHR-01-CHWFWR": chiller id, then measurement
+CHILLER_COLUMN_PATTERN = re.compile(r'^(CHR-(\d+))-([A-Z]+)$')
+
+
+def discover_chillers(columns, fields=('CHWFWR', 'CHWSWT', 'CHWRWT')) -> list[str]:
+    """
+    Discovers the chillers present in a set of column names.
+
+    Args:
+        columns: Column names to scan.
+        fields: Measurements a chiller must have all of to be included.
+
+    Returns:
+        Chiller ids (e.g. ``"CHR-01"``) sorted by chiller number.
+    """
+    found: dict[str, set] = {}
+    numbers: dict[str, int] = {}
+    for col in columns:
+        match = CHILLER_COLUMN_PATTERN.match(str(col))
+        if match:
+            chiller_id, number, field = match.groups()
+            found.setdefault(chiller_id, set()).add(field)
+            numbers[chiller_id] = int(number)
+    complete = [c for c, present in found.items() if set(fields) <= present]
+    return sorted(complete, key=lambda c: (numbers[c], c))
+
+
+def replace_columns(df: pd.DataFrame, block: pd.DataFrame) -> pd.DataFrame:
+    """Appends ``block``'s columns to ``df`` in one step, replacing any that already exist."""
+    existing = [c for c in block.columns if c in df.columns]
+    if existing:
+        df = df.drop(columns=existing)
+    return pd.concat([df, block.set_axis(df.index)], axis=1)
+
+
 def calculate_chiller_cooling_load(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculates the cooling load for each chiller and the total cooling load.
 
+    Chillers are discovered from the ``CHR-XX-CHWFWR/CHWSWT/CHWRWT`` column
+    names, and the loads of all chillers are computed as one 2D array
+    operation.
+
     Args:
         df: DataFrame with building data.
 
     Returns:
         DataFrame with calculated cooling loads for each chiller and the total cooling load.
     """
-    for i in range(1, 4):  # For chillers 1, 2, and 3
-        chiller_id = f"CHR-0{i}"
-        flow_rate_col = f"{chiller_id}-CHWFWR"
-        supply_temp_col = f"{chiller_id}-CHWSWT"
-        return_temp_col = f"{chiller_id}-CHWRWT"
-        cooling_load_col = f"{chiller_id}-CL"
-
-        if all(col in df.columns for col in [flow_rate_col, supply_temp_col, return_temp_col]):
-            delta_t = df[return_temp_col] - df[supply_temp_col]
-            # Cooling Load (kW) = 4.19 * FR * ΔT / 3600
-            df[cooling_load_col] = (constants.CP_WATER * df[flow_rate_col] * delta_t) / 3600
-
-    # Calculate Total Cooling Load
-    chiller_load_cols = [f"CHR-0{i}-CL" for i in range(1, 4) if f"CHR-0{i}-CL" in df.columns]
-    if chiller_load_cols:
-        df['Total_Cooling_Load'] = df[chiller_load_cols].sum(axis=1)
-
-    return df
\ No newline at end of file
+    chillers = discover_chillers(df.columns)
+    if not chillers:
+        return df
+
+    flow_rate = df[[f"{c}-CHWFWR" for c in chillers]].to_numpy(dtype=float)
+    supply_temp = df[[f"{c}-CHWSWT" for c in chillers]].to_numpy(dtype=float)
+    return_temp = df[[f"{c}-CHWRWT" for c in chillers]].to_numpy(dtype=float)
+
+    delta_t = return_temp - supply_temp
+    # Cooling Load (kW) = 4.19 * FR * ΔT / 3600
+    loads = (constants.CP_WATER * flow_rate * delta_t) / 3600
+
+    # Total Cooling Load (NaN loads count as zero, as with DataFrame.sum)
+    total = np.nansum(loads, axis=1)
+
+    columns = [f"{c}-CL" for c in chillers] + ['Total_Cooling_Load']
+    block = pd.DataFrame(np.column_stack([loads, total]), columns=columns)
+    return replace_columns(df, block)
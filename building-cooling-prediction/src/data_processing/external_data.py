@@ -1,6 +1,136 @@
+import hashlib
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from .load_data import load_csv_data, resolve_path
+from .ingest import DEFAULT_CACHE_DIR, cached_file_digest, load_cached_csv, read_columnar, write_columnar
+from .load_data import load_csv_data, parse_timestamps, resolve_path
+
+NS_PER_HOUR = 3_600 * 10**9
+NS_PER_DAY = 24 * NS_PER_HOUR
+# Hour of the daily temperature maximum used for the diurnal curve
+DIURNAL_PEAK_HOUR = 15
+
+
+class WeatherStore:
+    """Sorted, de-duplicated, columnar weather data.
+
+    Built once from the configured weather files and then sliced by date range
+    without touching the CSVs again. Dates are held as int64 epoch nanoseconds
+    next to one NumPy array per weather column; a store written with
+    :meth:`save` can be reopened memory-mapped, so several processes share the
+    same pages.
+    """
+
+    def __init__(self, dates: np.ndarray, columns: dict[str, np.ndarray]):
+        self.dates = dates
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, weather_df: pd.DataFrame) -> 'WeatherStore':
+        """Build a store from a frame with a ``date`` column (last duplicate wins)."""
+        if 'date' not in weather_df.columns:
+            raise KeyError("Weather data must contain a 'date' column")
+        dates = _epoch_ns(weather_df['date'])
+        order = np.argsort(dates, kind='stable')
+        dates = dates[order]
+        keep = np.r_[dates[1:] != dates[:-1], True] if len(dates) else np.zeros(0, dtype=bool)
+        rows = order[keep]
+        columns = {
+            str(c): weather_df[c].to_numpy()[rows]
+            for c in weather_df.columns
+            if c != 'date'
+        }
+        return cls(dates[keep], columns)
+
+    @classmethod
+    def from_paths(cls, *paths: str, cache_dir: str | None = None) -> 'WeatherStore':
+        """Build a store from weather CSVs, read through the columnar ingest cache."""
+        if not paths:
+            raise ValueError("No weather data provided")
+        frames = []
+        for p in paths:
+            path = resolve_path(str(p))
+            if not path.exists():
+                raise FileNotFoundError(f"Weather file not found: {path}")
+            frames.append(load_cached_csv(str(path), cache_dir=cache_dir))
+        return cls.from_frame(pd.concat(frames, ignore_index=True))
+
+    @classmethod
+    def cached(cls, *paths: str, cache_dir: str | None = None) -> 'WeatherStore':
+        """Open the on-disk store for ``paths`` memory-mapped, building it on first use."""
+        return cls.load(cls.cached_path(*paths, cache_dir=cache_dir))
+
+    @classmethod
+    def cached_path(cls, *paths: str, cache_dir: str | None = None) -> Path:
+        """Directory of the on-disk store for ``paths``, building it if needed.
+
+        The directory is keyed by the content digests of the source files, so
+        editing any of them triggers a rebuild.
+        """
+        if not paths:
+            raise ValueError("No weather data provided")
+        sources = [str(resolve_path(str(p))) for p in paths]
+        for source in sources:
+            if not Path(source).exists():
+                raise FileNotFoundError(f"Weather file not found: {source}")
+        digests = [cached_file_digest(source, cache_dir) for source in sources]
+        key = hashlib.blake2b('|'.join(digests).encode(), digest_size=16).hexdigest()
+        directory = resolve_path(cache_dir or DEFAULT_CACHE_DIR) / f"weather-{key}"
+        if not (directory / 'meta.json').exists():
+            cls.from_paths(*sources, cache_dir=cache_dir).save(directory)
+        return directory
+
+    def save(self, directory: str | Path) -> Path:
+        """Write the store as columnar ``.npy`` files."""
+        return write_columnar(self.to_frame(), directory, timestamp_cols=['date'])
+
+    @classmethod
+    def load(cls, directory: str | Path, mmap: bool = True) -> 'WeatherStore':
+        """Open a store written by :meth:`save`; its arrays are read-only and shared."""
+        frame = read_columnar(directory, mmap=mmap, read_only=True)
+        dates = frame['date'].to_numpy(dtype='datetime64[ns]').view('int64')
+        return cls(dates, {c: frame[c].to_numpy() for c in frame.columns if c != 'date'})
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def slice(self, start=None, end=None) -> pd.DataFrame:
+        """Weather rows with ``start <= date <= end`` as a frame of array views.
+
+        Either bound may be omitted. Bounds accept anything ``pd.Timestamp`` does.
+        """
+        lo = 0 if start is None else np.searchsorted(self.dates, pd.Timestamp(start).value, side='left')
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, pd.Timestamp(end).value, side='right')
+        data = {'date': self.dates[lo:hi].view('datetime64[ns]')}
+        data.update({name: values[lo:hi] for name, values in self.columns.items()})
+        return pd.DataFrame(data, copy=False)
+
+    def to_frame(self) -> pd.DataFrame:
+        """The whole store as a frame with a ``date`` column."""
+        return self.slice()
+
+
+# Stores built by :func:`get_weather_store`, keyed by source paths and file stats
+_STORES: dict[tuple, WeatherStore] = {}
+
+
+def get_weather_store(*paths: str, cache_dir: str | None = None) -> WeatherStore:
+    """Return a process-wide shared store for ``paths``.
+
+    Repeated calls (e.g. from every ``create_features`` invocation or notebook
+    cell) reuse the same in-memory store until one of the files changes.
+    """
+    resolved = [resolve_path(str(p)) for p in paths]
+    key = []
+    for path in resolved:
+        if not path.exists():
+            raise FileNotFoundError(f"Weather file not found: {path}")
+        stat = path.stat()
+        key.append((str(path), stat.st_size, stat.st_mtime_ns))
+    key = tuple(key)
+    if key not in _STORES:
+        _STORES[key] = WeatherStore.cached(*map(str, resolved), cache_dir=cache_dir)
+    return _STORES[key]
 
 
 def load_weather_data(*paths: str) -> pd.DataFrame:
@@ -15,30 +145,84 @@ def load_weather_data(*paths: str) -> pd.DataFrame:
     Returns
     -------
     pd.DataFrame
-        Concatenated weather data sorted by date.
+        Concatenated weather data sorted by date, one row per date (the
+        last file wins on duplicates). The frame owns its (writable) data
+        and nothing is cached on disk; the pipeline shares a read-only
+        :class:`WeatherStore` from :func:`get_weather_store` instead.
     """
-    dataframes = []
+    if not paths:
+        raise ValueError("No weather data provided")
+    frames = []
     for p in paths:
         path = resolve_path(str(p))
         if not path.exists():
             raise FileNotFoundError(f"Weather file not found: {path}")
-        dataframes.append(load_csv_data(str(path)))
+        frames.append(load_csv_data(str(path)))
+    return WeatherStore.from_frame(pd.concat(frames, ignore_index=True)).to_frame().copy()
 
-    if not dataframes:
-        raise ValueError("No weather data provided")
 
-    weather_df = pd.concat(dataframes, ignore_index=True)
-    weather_df['date'] = pd.to_datetime(weather_df['date'])
-    weather_df = weather_df.sort_values('date')
-    return weather_df
+def _epoch_ns(values) -> np.ndarray:
+    """Timestamps as int64 nanoseconds since the epoch."""
+    return parse_timestamps(values).to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def _lookup(keys: np.ndarray, table_keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Positions of ``keys`` in the sorted ``table_keys`` and a mask of exact matches."""
+    idx = np.searchsorted(table_keys, keys)
+    idx = np.minimum(idx, max(len(table_keys) - 1, 0))
+    matched = (table_keys[idx] == keys) if len(table_keys) else np.zeros(len(keys), dtype=bool)
+    return idx, matched
+
+
+def _take(weather_df: pd.DataFrame, columns: list[str], idx: np.ndarray, matched: np.ndarray) -> pd.DataFrame:
+    """Gather weather rows by position, leaving unmatched rows as NaN."""
+    taken = weather_df[columns].iloc[idx].reset_index(drop=True)
+    if not matched.all():
+        taken = taken.where(pd.Series(matched))
+    return taken
+
+
+def _interpolate_daily(
+    weather_df: pd.DataFrame,
+    columns: list[str],
+    day_keys: np.ndarray,
+    target_ns: np.ndarray,
+    matched: np.ndarray,
+) -> pd.DataFrame:
+    """Linearly interpolate daily values to hourly timestamps, anchored at noon.
+
+    When ``Tmax``/``Tmin`` are available, ``Tmean`` additionally follows a
+    cosine diurnal cycle peaking at 15:00 with the day's half-range as amplitude.
+    """
+    anchors = (day_keys * NS_PER_DAY + NS_PER_DAY // 2).astype(float)
+    x = target_ns.astype(float)
+    day_idx = np.searchsorted(day_keys, target_ns // NS_PER_DAY).clip(0, len(day_keys) - 1)
+    out = {}
+    for col in columns:
+        values = weather_df[col]
+        if pd.api.types.is_numeric_dtype(values):
+            out[col] = np.interp(x, anchors, values.to_numpy(dtype=float))
+        else:
+            out[col] = values.to_numpy()[day_idx]
+    if {'Tmax', 'Tmin', 'Tmean'} <= set(columns):
+        half_range = (weather_df['Tmax'].to_numpy(dtype=float) - weather_df['Tmin'].to_numpy(dtype=float))[day_idx] / 2
+        hour = (target_ns % NS_PER_DAY) / NS_PER_HOUR
+        out['Tmean'] = out['Tmean'] + half_range * np.cos(2 * np.pi * (hour - DIURNAL_PEAK_HOUR) / 24)
+    frame = pd.DataFrame(out, columns=columns)
+    return frame.where(pd.Series(matched)) if not matched.all() else frame
 
 
 def merge_with_weather(
     df: pd.DataFrame,
     weather_df: pd.DataFrame,
     timestamp_col: str,
+    resolution: str = 'daily',
 ) -> pd.DataFrame:
-    """Merge building data with external weather data on the date field.
+    """Merge building data with external weather data.
+
+    Rows are matched on int64 day (or hour) keys with a binary search over the
+    sorted weather dates, so no object-dtype ``datetime.date`` arrays are built
+    and the join scales to multi-year hourly frames.
 
     Parameters
     ----------
@@ -48,19 +232,43 @@ def merge_with_weather(
         DataFrame returned by :func:`load_weather_data`.
     timestamp_col:
         Name of the timestamp column in ``df``.
+    resolution:
+        ``'daily'`` gives every hour its day's values. ``'hourly'`` uses hourly
+        observations when ``weather_df`` has intra-day timestamps (matching on
+        the hour), and otherwise interpolates the daily values to each hour.
 
     Returns
     -------
     pd.DataFrame
-        ``df`` with weather columns joined on matching dates.
+        ``df`` with the weather columns (except ``date``) appended. Rows
+        without matching weather get ``NaN``.
     """
+    if resolution not in ('daily', 'hourly'):
+        raise ValueError(f"Unknown weather resolution: {resolution!r}")
+
     df = df.copy()
-    df[timestamp_col] = pd.to_datetime(df[timestamp_col])
-    merged = df.merge(
-        weather_df,
-        left_on=df[timestamp_col].dt.date,
-        right_on=weather_df['date'].dt.date,
-        how='left',
-    )
-    return merged.drop(columns=['date'])
+    df[timestamp_col] = parse_timestamps(df[timestamp_col])
+    target_ns = _epoch_ns(df[timestamp_col])
+
+    weather_ns = _epoch_ns(weather_df['date'])
+    order = np.argsort(weather_ns, kind='stable')
+    weather_df = weather_df.iloc[order].reset_index(drop=True)
+    weather_ns = weather_ns[order]
+    columns = [c for c in weather_df.columns if c != 'date']
+
+    hourly_observations = bool((weather_ns % NS_PER_DAY != 0).any())
+    unit = NS_PER_HOUR if resolution == 'hourly' and hourly_observations else NS_PER_DAY
+    weather_keys = weather_ns // unit
+    # Keep the last observation per key
+    last = np.r_[weather_keys[1:] != weather_keys[:-1], True]
+    weather_df = weather_df[last].reset_index(drop=True)
+    weather_keys = weather_keys[last]
+
+    idx, matched = _lookup(target_ns // unit, weather_keys)
+    if resolution == 'hourly' and not hourly_observations and len(weather_keys):
+        joined = _interpolate_daily(weather_df, columns, weather_keys, target_ns, matched)
+    else:
+        joined = _take(weather_df, columns, idx, matched)
 
+    df = df.drop(columns=[c for c in columns if c in df.columns])
+    return pd.concat([df.reset_index(drop=True), joined], axis=1)
@@ -0,0 +1,214 @@
+"""Append-only hourly aggregation driven by a high-water mark.
+
+``aggregate_to_hourly`` resamples the whole history on every call. The
+functions here keep the processed hourly CSV plus a small JSON state file
+holding the latest raw timestamp seen (the watermark) and the raw rows of the
+hour that is still open. A refresh only aggregates rows newer than the
+watermark, appends the hours they complete and updates the state, so its cost
+scales with the size of the delta rather than with the history.
+
+Unlike the batch output, the hourly CSV never contains the open hour; it is
+appended once a row from a later hour arrives.
+
+The state also records how far the raw CSV has been read, so
+:func:`read_new_rows` parses only the lines appended since the last refresh
+instead of the whole file, and how long the hourly CSV was when it was
+saved. The CSV is appended before the state is replaced, so a refresh that
+dies in between leaves hours the state does not know about; the next refresh
+truncates them away and aggregates them again instead of appending
+duplicates.
+"""
+
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .calculate_cooling_load import calculate_chiller_cooling_load
+from .load_data import parse_timestamps, resolve_path
+from .streaming import CSV_DATE_FORMAT, HourlyAggregator
+
+
+def default_state_path(hourly_path: str) -> Path:
+    """Return the state file stored next to ``hourly_path``."""
+
+    path = resolve_path(hourly_path)
+    return path.with_name(f"{path.stem}.state.json")
+
+
+def load_aggregator_state(state_path: str | Path) -> HourlyAggregator | None:
+    """Load the persisted aggregator, or ``None`` when no state exists yet."""
+
+    path = Path(state_path)
+    if not path.exists():
+        return None
+    return HourlyAggregator.from_state(json.loads(path.read_text()))
+
+
+def save_aggregator_state(aggregator: HourlyAggregator, state_path: str | Path) -> None:
+    """Atomically write ``aggregator``'s state to ``state_path``."""
+
+    path = Path(state_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(aggregator.to_state()))
+    os.replace(tmp, path)
+
+
+# Bytes before the stored offset that must be unchanged for it to be reused
+_CHECKPOINT_BYTES = 4096
+
+
+def _checkpoint(f, offset: int) -> str:
+    start = max(offset - _CHECKPOINT_BYTES, 0)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def read_new_rows(file_path: str, source: dict | None = None) -> tuple[pd.DataFrame, dict]:
+    """Parse the complete lines of a raw CSV appended after ``source``.
+
+    Args:
+        file_path: Raw telemetry CSV that only grows by appended lines.
+        source: Position returned by an earlier call (stored in the aggregator
+            state). When it is missing, or the file's header or the bytes
+            before the position changed, the whole file is read.
+
+    Returns:
+        The new rows and the position to pass next time. A trailing line
+        without a newline (still being written) is left for the next call.
+    """
+    path = resolve_path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {path}")
+    with open(path, 'rb') as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        start = len(header)
+        if (
+            source is not None
+            and source.get('path') == str(path)
+            and source.get('header') == header.decode('utf-8', 'replace')
+            and start <= source.get('offset', -1) <= size
+            and _checkpoint(f, source['offset']) == source.get('checkpoint')
+        ):
+            start = source['offset']
+        f.seek(start)
+        data = f.read()
+        end = start + data.rfind(b'\n') + 1
+        body = data[:end - start]
+        position = {
+            'path': str(path),
+            'header': header.decode('utf-8', 'replace'),
+            'offset': end,
+            'checkpoint': _checkpoint(f, end),
+        }
+    rows = pd.read_csv(io.BytesIO(header + body))
+    return rows, position
+
+
+def _restore_output(out: Path, aggregator: HourlyAggregator) -> None:
+    """Cut ``out`` back to the size recorded with ``aggregator``'s state."""
+
+    if aggregator.output_bytes is None or not out.exists():
+        return
+    size = out.stat().st_size
+    if size < aggregator.output_bytes:
+        raise ValueError(
+            f"{out} is shorter than when its state was saved ({size} < {aggregator.output_bytes} bytes); "
+            f"delete {default_state_path(str(out))} to rebuild it from the full history"
+        )
+    if size > aggregator.output_bytes:
+        # Hours appended by a refresh that did not get to save its state
+        os.truncate(out, aggregator.output_bytes)
+
+
+def rows_after_watermark(
+    df: pd.DataFrame,
+    watermark: pd.Timestamp | None,
+    timestamp_col: str = 'record_timestamp',
+) -> pd.DataFrame:
+    """Return the rows of a time-sorted frame that are newer than ``watermark``.
+
+    Uses a binary search on the timestamp column, so selecting a small delta
+    from a long (e.g. memory-mapped) history does not scan it.
+    """
+    if watermark is None:
+        return df
+    timestamps = parse_timestamps(df[timestamp_col]).to_numpy(dtype='datetime64[ns]')
+    start = np.searchsorted(timestamps, np.datetime64(watermark, 'ns'), side='right')
+    return df.iloc[start:]
+
+
+def update_hourly_training_data(
+    new_rows: pd.DataFrame,
+    hourly_path: str,
+    timestamp_col: str = 'record_timestamp',
+    state_path: str | None = None,
+    source: dict | None = None,
+) -> int:
+    """Aggregate newly arrived raw rows and append the hours they complete.
+
+    Args:
+        new_rows: Raw 15-minute telemetry, sorted by ``timestamp_col``. Rows at
+            or before the stored watermark (already processed) are ignored.
+        hourly_path: Hourly CSV to append to. Without a state file it is
+            (re)written from ``new_rows``, which then act as the full history.
+        timestamp_col: Name of the timestamp column.
+        state_path: Location of the state file; defaults to
+            ``<hourly_path stem>.state.json`` next to the CSV.
+        source: Position of :func:`read_new_rows` after ``new_rows``, saved with
+            the state so the next refresh starts there.
+
+    Returns:
+        Number of hourly rows appended.
+
+    Raises:
+        ValueError: The hourly CSV is shorter than the state records, i.e. it
+            was replaced or truncated outside of this function.
+    """
+    out = resolve_path(hourly_path)
+    state_file = Path(state_path) if state_path else default_state_path(hourly_path)
+    aggregator = load_aggregator_state(state_file)
+    fresh = aggregator is None
+    if fresh:
+        aggregator = HourlyAggregator(timestamp_col)
+    else:
+        _restore_output(out, aggregator)
+
+    rows = new_rows.copy()
+    rows[timestamp_col] = parse_timestamps(rows[timestamp_col])
+    rows = rows_after_watermark(rows, aggregator.watermark, timestamp_col)
+    if source is not None:
+        aggregator.source = source
+    if rows.empty:
+        if source is not None and not fresh:
+            save_aggregator_state(aggregator, state_file)
+        return 0
+
+    hourly = aggregator.update(calculate_chiller_cooling_load(rows.reset_index(drop=True)))
+    if not hourly.empty:
+        write_header = fresh or not out.exists()
+        if not write_header:
+            with open(out) as f:
+                existing = f.readline().rstrip('\n').split(',')
+            if existing != list(hourly.columns):
+                raise ValueError(
+                    f"New rows produce columns {list(hourly.columns)}, "
+                    f"which do not match the existing header of {out}: {existing}"
+                )
+        out.parent.mkdir(parents=True, exist_ok=True)
+        hourly.to_csv(
+            out,
+            mode='w' if write_header else 'a',
+            header=write_header,
+            index=False,
+            date_format=CSV_DATE_FORMAT,
+        )
+    aggregator.output_bytes = out.stat().st_size if out.exists() else None
+    save_aggregator_state(aggregator, state_file)
+    return len(hourly)
@@ -0,0 +1,250 @@
+"""Typed columnar cache for raw CSV inputs.
+
+Each CSV is converted once into a directory of ``.npy`` column files keyed by a
+hash of the file contents. Timestamp columns are parsed a single time (with the
+format detected up front) and stored as int64 nanoseconds since the epoch.
+Later loads memory-map the column files instead of re-parsing text, and a
+changed source file hashes to a new key so stale entries are never served.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .load_data import TIMESTAMP_COLUMNS, load_csv_data, resolve_path, timestamps_to_epoch
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = "data/cache/ingest"
+_META_FILE = "meta.json"
+_INDEX_FILE = "index.json"
+
+
+def file_digest(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """Return the BLAKE2b hex digest of a file's contents."""
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_columnar(
+    df: pd.DataFrame,
+    directory: str | Path,
+    timestamp_cols: Iterable[str] = (),
+    extra_meta: dict | None = None,
+) -> Path:
+    """Write ``df`` as one ``.npy`` file per column plus a ``meta.json``.
+
+    Parameters
+    ----------
+    df:
+        Frame to store. Numeric columns keep their dtype, ``timestamp_cols``
+        are stored as int64 epoch nanoseconds and any other column is stored
+        as fixed-width unicode (missing values become empty strings).
+    directory:
+        Target directory. It is written under a temporary name and renamed
+        into place so readers never observe a half-written entry. An existing
+        directory is replaced.
+    timestamp_cols:
+        Columns to parse and store as epoch nanoseconds.
+    extra_meta:
+        Optional additional entries for ``meta.json``.
+
+    Returns
+    -------
+    Path
+        The directory that was written.
+    """
+    directory = Path(directory)
+    tmp = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    timestamp_cols = set(timestamp_cols)
+    columns = []
+    for i, col in enumerate(df.columns):
+        file_name = f"col_{i:04d}.npy"
+        if col in timestamp_cols:
+            values = timestamps_to_epoch(df[col])
+            kind = "timestamp"
+        elif pd.api.types.is_bool_dtype(df[col]) or pd.api.types.is_numeric_dtype(df[col]):
+            values = df[col].to_numpy()
+            kind = "numeric"
+        else:
+            values = df[col].fillna("").astype(str).to_numpy(dtype=str)
+            kind = "string"
+        np.save(tmp / file_name, np.ascontiguousarray(values), allow_pickle=False)
+        columns.append({"name": str(col), "file": file_name, "kind": kind})
+
+    meta = {"format_version": CACHE_FORMAT_VERSION, "n_rows": len(df), "columns": columns}
+    meta.update(extra_meta or {})
+    (tmp / _META_FILE).write_text(json.dumps(meta, indent=2))
+
+    if directory.exists():
+        shutil.rmtree(directory)
+    try:
+        tmp.rename(directory)
+    except OSError:
+        # Another process renamed an identical entry into place first.
+        shutil.rmtree(tmp, ignore_errors=True)
+    return directory
+
+
+def read_columnar(
+    directory: str | Path,
+    columns: Iterable[str] | None = None,
+    mmap: bool = True,
+    read_only: bool = False,
+) -> pd.DataFrame:
+    """Load a directory written by :func:`write_columnar`.
+
+    Parameters
+    ----------
+    directory:
+        Directory containing ``meta.json`` and the column files.
+    columns:
+        Optional subset of columns to load; other column files are not opened.
+    mmap:
+        Memory-map the column files instead of reading them.
+    read_only:
+        Map the files read-only, so writes to the frame raise. By default
+        they are mapped copy-on-write: the frame is writable, pages are
+        shared until written and the files themselves never change.
+
+    Returns
+    -------
+    pd.DataFrame
+        Frame backed directly by the (memory-mapped) arrays. Timestamp columns
+        are exposed as ``datetime64[ns]`` views of the stored int64 values.
+    """
+    directory = Path(directory)
+    meta = json.loads((directory / _META_FILE).read_text())
+    wanted = None if columns is None else list(columns)
+    specs = {c["name"]: c for c in meta["columns"]}
+    if wanted is not None:
+        missing = [c for c in wanted if c not in specs]
+        if missing:
+            raise KeyError(f"Columns not found in {directory}: {missing}")
+    names = wanted if wanted is not None else list(specs)
+    mode = ("r" if read_only else "c") if mmap else None
+
+    data = {}
+    for name in names:
+        spec = specs[name]
+        values = np.load(directory / spec["file"], mmap_mode=mode)
+        if spec["kind"] == "timestamp":
+            values = values.view("datetime64[ns]")
+        elif spec["kind"] == "string":
+            values = pd.Series(values, dtype="str").replace("", np.nan).to_numpy()
+        data[name] = values
+    return pd.DataFrame(data, columns=names, copy=False)
+
+
+def _cache_root(cache_dir: str | None) -> Path:
+    return resolve_path(cache_dir or DEFAULT_CACHE_DIR)
+
+
+def _cached_digest(path: Path, root: Path) -> str:
+    """Content digest of ``path``, reusing the last one while size/mtime are unchanged."""
+
+    index_path = root / _INDEX_FILE
+    try:
+        index = json.loads(index_path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        index = {}
+    stat = path.stat()
+    key = str(path)
+    entry = index.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["digest"]
+    digest = file_digest(path)
+    index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_name(f"{_INDEX_FILE}.tmp-{os.getpid()}")
+    tmp.write_text(json.dumps(index, indent=2))
+    os.replace(tmp, index_path)
+    return digest
+
+
+def cached_file_digest(file_path: str, cache_dir: str | None = None) -> str:
+    """Content digest of ``file_path``, only rehashing when its size or mtime changed."""
+
+    return _cached_digest(resolve_path(file_path), _cache_root(cache_dir))
+
+
+def cache_entry_path(file_path: str, cache_dir: str | None = None) -> Path:
+    """Return the cache directory that holds (or would hold) ``file_path``."""
+
+    path = resolve_path(file_path)
+    return _cache_root(cache_dir) / f"{path.stem}-{cached_file_digest(str(path), cache_dir)}"
+
+
+def _prune_stale_entries(entry: Path, source: Path) -> None:
+    """Remove cache entries for earlier contents of ``source``."""
+
+    for candidate in entry.parent.glob(f"{source.stem}-*"):
+        if candidate == entry or not (candidate / _META_FILE).exists():
+            continue
+        try:
+            meta = json.loads((candidate / _META_FILE).read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        if meta.get("source") == str(source):
+            shutil.rmtree(candidate, ignore_errors=True)
+
+
+def load_cached_csv(
+    file_path: str,
+    timestamp_cols: Iterable[str] | None = None,
+    cache_dir: str | None = None,
+    mmap: bool = True,
+    read_only: bool = False,
+) -> pd.DataFrame:
+    """Load a CSV through the columnar cache.
+
+    On the first call for a given file content the CSV is parsed, its
+    timestamp columns converted to epoch nanoseconds and the result written to
+    the cache. Subsequent calls memory-map the cached columns. Entries for
+    older versions of the same file are removed when a new one is written.
+
+    Parameters
+    ----------
+    file_path:
+        Path to the CSV file (relative paths are resolved against the repo).
+    timestamp_cols:
+        Columns to parse as timestamps. Defaults to any column whose name is in
+        ``TIMESTAMP_COLUMNS``.
+    cache_dir:
+        Cache root; defaults to ``data/cache/ingest`` under the project root.
+    mmap:
+        Memory-map cached columns instead of reading them into memory.
+    read_only:
+        Return a read-only frame (see :func:`read_columnar`); by default it
+        is writable like one from :func:`load_csv_data`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The CSV contents with timestamp columns as ``datetime64[ns]``.
+    """
+    path = resolve_path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {path}")
+
+    entry = cache_entry_path(str(path), cache_dir)
+    if not (entry / _META_FILE).exists():
+        df = load_csv_data(str(path))
+        if timestamp_cols is None:
+            timestamp_cols = [c for c in df.columns if c in TIMESTAMP_COLUMNS]
+        write_columnar(df, entry, timestamp_cols, extra_meta={"source": str(path)})
+        _prune_stale_entries(entry, path)
+    return read_columnar(entry, mmap=mmap, read_only=read_only)
@@ -1,6 +1,26 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+# Column names recognised as timestamps, in order of preference.
+TIMESTAMP_COLUMNS = ('prediction_time', 'record_timestamp', 'timestamp', 'datetime', 'date')
+
+# Explicit formats tried (in order) before falling back to pandas' per-element
+# inference. ISO formats come first; of the slash formats, day-first variants
+# are tried before month-first ones to match the raw exports.
+DATETIME_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y',
+)
+
 
 def _project_root() -> Path:
     """Return the repository root (two levels up from this file)."""
@@ -18,6 +38,64 @@ def resolve_path(file_path: str) -> Path:
         return p
     return _project_root() / p
 
+def detect_datetime_format(values, sample_size: int = 1000) -> str | None:
+    """
+    Detects the datetime format of a column of timestamp strings.
+
+    The candidates in ``DATETIME_FORMATS`` are checked against an evenly spaced
+    sample of the non-null values, so the cost does not depend on column length.
+
+    Args:
+        values: Array-like of timestamp strings.
+        sample_size: Maximum number of values to test each candidate against.
+
+    Returns:
+        The first matching format string, or ``None`` if none of them match.
+    """
+    series = pd.Series(values).dropna()
+    if series.empty:
+        return None
+    step = max(1, len(series) // sample_size)
+    sample = series.iloc[::step].astype(str)
+    for fmt in DATETIME_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt)
+        except (ValueError, TypeError):
+            continue
+        return fmt
+    return None
+
+
+def parse_timestamps(values) -> pd.Series:
+    """
+    Parses timestamps once, using an explicitly detected format.
+
+    Values that are already ``datetime64`` are returned unchanged, so callers
+    can parse defensively without paying for it twice.
+
+    Args:
+        values: Series (or array-like) of timestamps.
+
+    Returns:
+        A ``datetime64`` Series aligned with ``values``.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    fmt = detect_datetime_format(series)
+    if fmt is not None:
+        try:
+            return pd.to_datetime(series, format=fmt)
+        except ValueError:
+            pass
+    return pd.to_datetime(series, format='mixed', dayfirst=True)
+
+
+def timestamps_to_epoch(values) -> np.ndarray:
+    """Converts timestamps to int64 nanoseconds since the Unix epoch (NaT stays as ``iNaT``)."""
+    return parse_timestamps(values).to_numpy(dtype='datetime64[ns]').view('int64')
+
+
 def load_csv_data(file_path: str) -> pd.DataFrame:
     """
     Loads data from a CSV file.
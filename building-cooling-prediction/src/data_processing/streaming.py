@@ -0,0 +1,218 @@
+"""Bounded-memory chunked processing of 15-minute telemetry.
+
+The batch pipeline loads the whole telemetry file, computes chiller loads and
+resamples everything in memory. The helpers here read the file in
+time-ordered chunks instead, so peak memory is set by ``chunksize`` rather
+than by the size of the file, while producing the same hourly output.
+"""
+
+from typing import Iterator
+
+import pandas as pd
+
+from .aggregate_data import aggregate_to_hourly
+from .calculate_cooling_load import calculate_chiller_cooling_load
+from .load_data import parse_timestamps, resolve_path
+
+# Written explicitly so every chunk is formatted like the batch output, even
+# chunks whose timestamps all fall on midnight.
+CSV_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class HourlyAggregator:
+    """Incrementally aggregate time-ordered rows into hourly means.
+
+    Rows belonging to the most recent (possibly incomplete) hour are held back
+    until a row from a later hour arrives. Every hour is therefore averaged
+    from all of its raw rows in a single pass, which keeps the result
+    identical to :func:`aggregate_to_hourly` on the full history. Empty hours
+    between emitted blocks are filled with ``NaN`` rows, as ``resample`` does.
+    """
+
+    def __init__(self, timestamp_col: str = 'record_timestamp'):
+        self.timestamp_col = timestamp_col
+        self.pending: pd.DataFrame | None = None
+        self.last_emitted_hour: pd.Timestamp | None = None
+        # Latest raw timestamp seen so far
+        self.watermark: pd.Timestamp | None = None
+        # Position in the raw file read so far (see incremental.read_new_rows)
+        self.source: dict | None = None
+        # Size in bytes of the hourly output holding the hours emitted so far
+        # (see incremental.update_hourly_training_data)
+        self.output_bytes: int | None = None
+
+    def update(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Consume a chunk and return the hours it completed.
+
+        Args:
+            chunk: Raw rows, sorted by ``timestamp_col`` and later than any row
+                seen before.
+
+        Returns:
+            Hourly means for every hour that can no longer receive rows.
+        """
+        ts = self.timestamp_col
+        chunk = chunk.copy()
+        chunk[ts] = parse_timestamps(chunk[ts])
+        if chunk.empty:
+            return self._empty_like(chunk)
+        if not chunk[ts].is_monotonic_increasing:
+            raise ValueError("Telemetry chunks must be sorted by timestamp.")
+        if self.watermark is not None and chunk[ts].iloc[0] < self.watermark:
+            raise ValueError(
+                f"Chunk starts at {chunk[ts].iloc[0]}, before the last seen timestamp {self.watermark}."
+            )
+        self.watermark = chunk[ts].iloc[-1]
+
+        frame = chunk if self.pending is None else pd.concat([self.pending, chunk], ignore_index=True)
+        open_hour = frame[ts].iloc[-1].floor('h')
+        is_open = (frame[ts] >= open_hour).to_numpy()
+        self.pending = frame[is_open].reset_index(drop=True)
+        return self._emit(frame[~is_open])
+
+    def flush(self) -> pd.DataFrame:
+        """Close the open hour and return it (plus any preceding empty hours)."""
+        if self.pending is None:
+            return pd.DataFrame()
+        rows, self.pending = self.pending, self.pending.iloc[0:0]
+        return self._emit(rows)
+
+    def to_state(self) -> dict:
+        """Return a JSON-serialisable snapshot of the aggregator."""
+        pending = None
+        if self.pending is not None:
+            frame = self.pending.copy()
+            frame[self.timestamp_col] = frame[self.timestamp_col].dt.strftime(CSV_DATE_FORMAT)
+            pending = frame.to_dict(orient='split', index=False)
+        def fmt(value):
+            return None if value is None else value.strftime(CSV_DATE_FORMAT)
+
+        return {
+            'timestamp_col': self.timestamp_col,
+            'watermark': fmt(self.watermark),
+            'last_emitted_hour': fmt(self.last_emitted_hour),
+            'pending': pending,
+            'source': self.source,
+            'output_bytes': self.output_bytes,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'HourlyAggregator':
+        """Rebuild an aggregator from :meth:`to_state` output."""
+        aggregator = cls(state['timestamp_col'])
+        if state.get('watermark'):
+            aggregator.watermark = pd.Timestamp(state['watermark'])
+        if state.get('last_emitted_hour'):
+            aggregator.last_emitted_hour = pd.Timestamp(state['last_emitted_hour'])
+        aggregator.source = state.get('source')
+        aggregator.output_bytes = state.get('output_bytes')
+        pending = state.get('pending')
+        if pending is not None:
+            frame = pd.DataFrame(pending['data'], columns=pending['columns'])
+            frame[aggregator.timestamp_col] = parse_timestamps(frame[aggregator.timestamp_col])
+            aggregator.pending = frame
+        return aggregator
+
+    def _emit(self, rows: pd.DataFrame) -> pd.DataFrame:
+        if rows.empty:
+            return self._empty_like(rows)
+        hourly = aggregate_to_hourly(rows.reset_index(drop=True), timestamp_col=self.timestamp_col)
+        if self.last_emitted_hour is not None:
+            start = self.last_emitted_hour + pd.Timedelta(hours=1)
+            full_range = pd.date_range(start, hourly[self.timestamp_col].iloc[-1], freq='h')
+            hourly = (
+                hourly.set_index(self.timestamp_col)
+                .reindex(full_range)
+                .rename_axis(self.timestamp_col)
+                .reset_index()
+            )
+        self.last_emitted_hour = hourly[self.timestamp_col].iloc[-1]
+        return hourly
+
+    def _empty_like(self, rows: pd.DataFrame) -> pd.DataFrame:
+        return rows.iloc[0:0].reset_index(drop=True)
+
+
+def iter_csv_chunks(file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield a CSV file as DataFrames of at most ``chunksize`` rows."""
+    with pd.read_csv(resolve_path(file_path), chunksize=chunksize) as reader:
+        yield from reader
+
+
+def stream_hourly_cooling_load(
+    file_path: str,
+    timestamp_col: str = 'record_timestamp',
+    chunksize: int = 50_000,
+    chiller_loads_path: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Compute chiller loads and hourly means chunk by chunk.
+
+    Args:
+        file_path: Raw telemetry CSV, sorted by ``timestamp_col``.
+        timestamp_col: Name of the timestamp column.
+        chunksize: Number of raw rows read per chunk.
+        chiller_loads_path: Optional CSV to which the 15-minute chiller loads
+            are appended as they are computed.
+
+    Yields:
+        Blocks of completed hourly rows, in time order.
+    """
+    aggregator = HourlyAggregator(timestamp_col)
+    loads_out = resolve_path(chiller_loads_path) if chiller_loads_path else None
+    if loads_out is not None:
+        loads_out.parent.mkdir(parents=True, exist_ok=True)
+
+    first = True
+    for chunk in iter_csv_chunks(file_path, chunksize):
+        chunk[timestamp_col] = parse_timestamps(chunk[timestamp_col])
+        loads = calculate_chiller_cooling_load(chunk)
+        if loads_out is not None:
+            loads.to_csv(
+                loads_out,
+                mode='w' if first else 'a',
+                header=first,
+                index=False,
+                date_format=CSV_DATE_FORMAT,
+            )
+        first = False
+        hourly = aggregator.update(loads)
+        if not hourly.empty:
+            yield hourly
+
+    hourly = aggregator.flush()
+    if not hourly.empty:
+        yield hourly
+
+
+def run_streaming_aggregation(
+    file_path: str,
+    hourly_path: str,
+    timestamp_col: str = 'record_timestamp',
+    chunksize: int = 50_000,
+    chiller_loads_path: str | None = None,
+) -> int:
+    """Stream ``file_path`` into an hourly CSV without holding it in memory.
+
+    Args:
+        file_path: Raw telemetry CSV.
+        hourly_path: Output path for the hourly aggregated CSV.
+        timestamp_col: Name of the timestamp column.
+        chunksize: Number of raw rows read per chunk.
+        chiller_loads_path: Optional output path for the 15-minute loads.
+
+    Returns:
+        Number of hourly rows written.
+    """
+    out = resolve_path(hourly_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    n_rows = 0
+    for hourly in stream_hourly_cooling_load(file_path, timestamp_col, chunksize, chiller_loads_path):
+        hourly.to_csv(
+            out,
+            mode='w' if n_rows == 0 else 'a',
+            header=n_rows == 0,
+            index=False,
+            date_format=CSV_DATE_FORMAT,
+        )
+        n_rows += len(hourly)
+    return n_rows
@@ -1,8 +1,15 @@
-from typing import Iterator, Tuple, Optional
+import time
+import warnings
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Tuple, Optional
 
 import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.model_selection import KFold, TimeSeriesSplit, train_test_split
 
+from .metrics import nrmse
+
 
 def simple_train_test_split(X, y, test_size: float = 0.2, random_state: int = 42):
     return train_test_split(X, y, test_size=test_size, random_state=random_state)
@@ -24,13 +31,151 @@ def time_series_split(
     X,
     y,
     n_splits: int = 5,
+    gap: int = 0,
+    max_train_size: Optional[int] = None,
+    test_size: Optional[int] = None,
 ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
     """Time-series aware train/test indices.
 
     Ensures that the training indices are always before the validation indices
-    to prevent data leakage when dealing with temporal data.
+    to prevent data leakage when dealing with temporal data. ``gap`` rows
+    between the two are left out, so lag and rolling features of the
+    validation rows never overlap the training targets.
     """
 
-    tscv = TimeSeriesSplit(n_splits=n_splits)
+    tscv = TimeSeriesSplit(n_splits=n_splits, gap=gap, max_train_size=max_train_size, test_size=test_size)
     for train_idx, test_idx in tscv.split(X):
         yield train_idx, test_idx
+
+
+@dataclass
+class CVResult:
+    """Outcome of :func:`cross_validate_time_series`.
+
+    ``fold_scores`` holds the score of every fold that was run, in time
+    order, and ``fold_sizes`` its number of validation rows; ``stopped``
+    says why the remaining folds were skipped, if any.
+    """
+
+    fold_scores: list = field(default_factory=list)
+    fold_sizes: list = field(default_factory=list)
+    n_splits: int = 0
+    stopped: Optional[str] = None
+    elapsed: float = 0.0
+    y_valid: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    y_pred: np.ndarray = field(default_factory=lambda: np.zeros(0))
+
+    @property
+    def score(self) -> float:
+        """Mean fold score (NaN if no fold ran)."""
+        return float(np.mean(self.fold_scores)) if self.fold_scores else float('nan')
+
+    @property
+    def std(self) -> float:
+        return float(np.std(self.fold_scores)) if self.fold_scores else float('nan')
+
+    @property
+    def complete(self) -> bool:
+        return len(self.fold_scores) == self.n_splits
+
+
+def _fit_fold(estimator, X, y, train_idx, valid_idx, metric):
+    """Fit a fresh copy of ``estimator`` on one fold and score it (and time it)."""
+    start = time.perf_counter()
+    model = clone(estimator)
+    model.fit(X[train_idx], y[train_idx])
+    preds = model.predict(X[valid_idx])
+    return metric(y[valid_idx], preds), preds, time.perf_counter() - start
+
+
+def cross_validate_time_series(
+    estimator,
+    X,
+    y,
+    n_splits: int = 5,
+    gap: int = 0,
+    max_train_size: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    metric: Callable = nrmse,
+    best_score=None,
+    abort_tolerance: float = 0.1,
+    time_budget: Optional[float] = None,
+) -> CVResult:
+    """Score ``estimator`` on expanding time-series folds, fitting folds in parallel.
+
+    Folds run on ``n_jobs`` worker processes. ``X`` is memory-mapped once and
+    shared read-only by all workers instead of being copied to each. Results
+    are collected in fold order, and after every fold the run stops early,
+    cancelling the folds still running or queued, when:
+
+    * the mean score so far is worse than ``best_score`` by more than
+      ``abort_tolerance`` (relative), i.e. the candidate cannot win. Given
+      the best candidate's fold scores, the comparison is against its mean
+      over the same folds, or
+    * the next fold would likely not finish within ``time_budget`` seconds.
+
+    Parameters
+    ----------
+    estimator:
+        Unfitted scikit-learn style estimator (cloned for every fold).
+    X, y:
+        Features and target in time order.
+    n_splits, gap, max_train_size:
+        Fold layout, see :func:`time_series_split`.
+    n_jobs:
+        Worker processes (``-1`` for all cores, ``None`` or ``1`` to fit in
+        this process).
+    metric:
+        ``metric(y_true, y_pred)``, lower is better.
+    best_score:
+        Score (or per-fold scores) of the current best candidate, enabling
+        the early abort.
+    abort_tolerance:
+        Relative margin over ``best_score`` tolerated before aborting.
+    time_budget:
+        Seconds available for the whole run.
+
+    Returns
+    -------
+    CVResult
+        Per-fold scores, their mean, and the out-of-fold predictions.
+    """
+    start = time.perf_counter()
+    X = np.ascontiguousarray(X)
+    y = np.asarray(y)
+    folds = list(time_series_split(X, y, n_splits=n_splits, gap=gap, max_train_size=max_train_size))
+    result = CVResult(n_splits=len(folds))
+    valid, preds = [], []
+
+    # max_nbytes=0 memory-maps every array argument, so workers share one copy.
+    # The generator yields each fold as soon as it (and every earlier one) is
+    # done; leaving the loop cancels the rest.
+    with warnings.catch_warnings(), Parallel(
+        n_jobs=n_jobs, max_nbytes=0, mmap_mode='r', return_as='generator',
+    ) as parallel:
+        warnings.filterwarnings('ignore', message='.*tasks which were still being processed')
+        outcomes = parallel(delayed(_fit_fold)(estimator, X, y, tr, va, metric) for tr, va in folds)
+        for (_, va), (score, fold_preds, fold_seconds) in zip(folds, outcomes):
+            result.fold_scores.append(float(score))
+            result.fold_sizes.append(len(va))
+            valid.append(y[va])
+            preds.append(fold_preds)
+            done = len(result.fold_scores)
+            if done == len(folds):
+                break
+            if best_score is not None:
+                reference = float(best_score) if np.isscalar(best_score) else float(np.mean(best_score[:done]))
+                if result.score > reference * (1 + abort_tolerance):
+                    result.stopped = f'score {result.score:.4f} is worse than the best {reference:.4f}'
+                    break
+            # Later folds train on more data, so assume the next one is slower
+            elapsed = time.perf_counter() - start
+            if time_budget is not None and elapsed + fold_seconds * 1.25 > time_budget:
+                result.stopped = f'time budget of {time_budget:.0f}s reached after {done} folds'
+                break
+        outcomes.close()
+
+    result.elapsed = time.perf_counter() - start
+    if valid:
+        result.y_valid, result.y_pred = np.concatenate(valid), np.concatenate(preds)
+    return result
@@ -2,19 +2,24 @@
 
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 
+def _prepare_path(save_path: str):
+    """Ensure the directory for ``save_path`` exists and return ``pyplot``.
 
-def _prepare_path(save_path: str) -> None:
-    """Ensure the directory for ``save_path`` exists."""
+    matplotlib is imported here rather than at module level because it is
+    slow to import and only needed when a plot is actually drawn.
+    """
+
+    import matplotlib.pyplot as plt
 
     Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+    return plt
 
 
 def plot_predictions(y_true, y_pred, save_path: str):
     """Line plot comparing actual and predicted values."""
 
-    _prepare_path(save_path)
+    plt = _prepare_path(save_path)
     plt.figure()
     plt.plot(y_true, label="Actual")
     plt.plot(y_pred, label="Predicted")
@@ -28,7 +33,7 @@ def plot_residuals(y_true, y_pred, save_path: str):
     """Plot the residuals (``y_true - y_pred``)."""
 
     residuals = y_true - y_pred
-    _prepare_path(save_path)
+    plt = _prepare_path(save_path)
     plt.figure()
     plt.plot(residuals)
     plt.title("Residuals")
@@ -48,7 +53,7 @@ def plot_nrmse_comparison(results: dict, save_path: str):
         File location where the plot will be saved.
     """
 
-    _prepare_path(save_path)
+    plt = _prepare_path(save_path)
     plt.figure()
     models = list(results.keys())
     scores = [results[m] for m in models]
@@ -62,7 +67,7 @@ def plot_nrmse_comparison(results: dict, save_path: str):
 def plot_feature_importance(importances, feature_names, save_path: str):
     """Horizontal bar chart of feature importances."""
 
-    _prepare_path(save_path)
+    plt = _prepare_path(save_path)
     plt.figure()
     order = range(len(feature_names))
     plt.barh(order, importances)
@@ -0,0 +1,207 @@
+"""Precomputed calendar lookup table with Hong Kong public holidays.
+
+Every calendar feature of an hour is a pure function of the hour, so instead
+of decomposing timestamps on every call (``isocalendar()`` in particular
+builds a whole DataFrame) :class:`CalendarTable` computes them once for whole
+years. It stores compact int8/int16 columns indexed by hours since the epoch,
+and a lookup is a single integer gather.
+
+Hong Kong general holidays for 2023-2025 are listed below. Other years come
+from the optional ``holidays`` package; without it they get no holidays (and
+a warning).
+"""
+
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing.external_data import NS_PER_HOUR
+
+# Hong Kong general holidays (month, day)
+HK_PUBLIC_HOLIDAYS = {
+    2023: (
+        (1, 2), (1, 23), (1, 24), (1, 25), (4, 5), (4, 7), (4, 8), (4, 10), (5, 1), (5, 26),
+        (6, 22), (7, 1), (9, 30), (10, 2), (10, 23), (12, 25), (12, 26),
+    ),
+    2024: (
+        (1, 1), (2, 10), (2, 12), (2, 13), (3, 29), (3, 30), (4, 1), (4, 4), (5, 1), (5, 15),
+        (6, 10), (7, 1), (9, 18), (10, 1), (10, 11), (12, 25), (12, 26),
+    ),
+    2025: (
+        (1, 1), (1, 29), (1, 30), (1, 31), (4, 4), (4, 18), (4, 19), (4, 21), (5, 1), (5, 5),
+        (5, 31), (7, 1), (10, 1), (10, 7), (10, 29), (12, 25), (12, 26),
+    ),
+}
+
+# Columns of the table and their dtypes
+CALENDAR_COLUMNS = {
+    'hour': np.int8,
+    'dayofweek': np.int8,
+    'dayofyear': np.int16,
+    'month': np.int8,
+    'year': np.int16,
+    'weekofyear': np.int8,
+    'is_holiday': np.int8,
+    'is_bridge_day': np.int8,
+    'is_working_day': np.int8,
+}
+
+
+# Years already warned about
+_WARNED: set[int] = set()
+
+
+def holiday_dates(year: int, warn: bool = True) -> np.ndarray:
+    """Hong Kong public holidays of ``year`` as ``datetime64[D]``."""
+
+    if year in HK_PUBLIC_HOLIDAYS:
+        return np.array(
+            [f'{year}-{month:02d}-{day:02d}' for month, day in HK_PUBLIC_HOLIDAYS[year]],
+            dtype='datetime64[D]',
+        )
+    try:
+        import holidays
+    except ImportError:  # pragma: no cover - optional dependency
+        if warn and year not in _WARNED:
+            _WARNED.add(year)
+            warnings.warn(f"No Hong Kong holiday data for {year}; install 'holidays' to cover it")
+        return np.array([], dtype='datetime64[D]')
+    return np.array(sorted(holidays.HongKong(years=year)), dtype='datetime64[D]')
+
+
+def _years(days: np.ndarray) -> np.ndarray:
+    return np.unique(days.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970)
+
+
+def _holiday_mask(days: np.ndarray, quiet=()) -> np.ndarray:
+    """Whether each of ``days`` (days since the epoch) is a public holiday.
+
+    Missing holiday data for ``quiet`` years is not warned about.
+    """
+    holiday_days = np.concatenate([
+        holiday_dates(int(year), warn=year not in quiet) for year in _years(days)
+    ]).astype(np.int64)
+    return np.isin(days, holiday_days)
+
+
+def _day_fields(days: np.ndarray) -> dict[str, np.ndarray]:
+    """Calendar fields of consecutive ``days`` (days since the epoch)."""
+
+    dates = days.astype('datetime64[D]')
+    years = dates.astype('datetime64[Y]')
+    months = dates.astype('datetime64[M]')
+    # 1970-01-01 was a Thursday; Monday is 0
+    dayofweek = (days + 3) % 7
+
+    # ISO week: the week belongs to the year of its Thursday
+    thursday = (days - dayofweek + 3).astype('datetime64[D]')
+    iso_year_start = thursday.astype('datetime64[Y]').astype('datetime64[D]')
+    weekofyear = (thursday - iso_year_start).astype(np.int64) // 7 + 1
+
+    # One extra day on each side so the first and last day can be bridge days
+    around = np.arange(days[0] - 1, days[-1] + 2, dtype=np.int64)
+    holiday = _holiday_mask(around, quiet=set(_years(around)) - set(_years(days)))
+    working = ((around + 3) % 7 < 5) & ~holiday
+    return {
+        'dayofweek': dayofweek,
+        'dayofyear': (dates - years.astype('datetime64[D]')).astype(np.int64) + 1,
+        'month': (months - years.astype('datetime64[M]')).astype(np.int64) + 1,
+        'year': years.astype(np.int64) + 1970,
+        'weekofyear': weekofyear,
+        'is_holiday': holiday[1:-1],
+        # A working day squeezed between two days off
+        'is_bridge_day': working[1:-1] & ~working[:-2] & ~working[2:],
+        'is_working_day': working[1:-1],
+    }
+
+
+class CalendarTable:
+    """Calendar features of every hour from ``start_hour`` on.
+
+    Parameters
+    ----------
+    start_hour:
+        First hour covered, in hours since the epoch.
+    columns:
+        One array per field in :data:`CALENDAR_COLUMNS`, all the same length.
+    """
+
+    def __init__(self, start_hour: int, columns: dict[str, np.ndarray]):
+        self.start_hour = start_hour
+        self.columns = columns
+
+    @classmethod
+    def for_years(cls, first_year: int, last_year: int) -> 'CalendarTable':
+        """Build the table for whole years ``first_year`` to ``last_year``."""
+
+        start = np.datetime64(f'{first_year}-01-01', 'D').astype(np.int64)
+        stop = np.datetime64(f'{last_year + 1}-01-01', 'D').astype(np.int64)
+        fields = _day_fields(np.arange(start, stop, dtype=np.int64))
+        columns = {'hour': np.tile(np.arange(24), stop - start)}
+        columns.update({name: np.repeat(values, 24) for name, values in fields.items()})
+        return cls(int(start) * 24, {name: columns[name].astype(dtype) for name, dtype in CALENDAR_COLUMNS.items()})
+
+    def __len__(self) -> int:
+        return len(self.columns['hour'])
+
+    @property
+    def years(self) -> tuple[int, int]:
+        """First and last year covered."""
+        return int(self.columns['year'][0]), int(self.columns['year'][-1])
+
+    def covers(self, hours: np.ndarray) -> bool:
+        return len(hours) == 0 or (hours.min() >= self.start_hour and hours.max() < self.start_hour + len(self))
+
+    def lookup(self, hours: np.ndarray, columns=None) -> dict[str, np.ndarray]:
+        """Gather the fields of ``hours`` (hours since the epoch, all covered)."""
+
+        idx = np.asarray(hours, dtype=np.int64) - self.start_hour
+        return {name: self.columns[name][idx] for name in (columns or CALENDAR_COLUMNS)}
+
+
+# Table shared by all lookups in this process, grown to cover new years
+_TABLE: CalendarTable | None = None
+
+
+def calendar_table(hours: np.ndarray) -> CalendarTable:
+    """Return the shared table, extended so that it covers ``hours``."""
+
+    global _TABLE
+    if _TABLE is None or not _TABLE.covers(hours):
+        years = pd.to_datetime(np.array([hours.min(), hours.max()]) * NS_PER_HOUR).year
+        first, last = int(years[0]), int(years[1])
+        if _TABLE is not None:
+            first, last = min(first, _TABLE.years[0]), max(last, _TABLE.years[1])
+        _TABLE = CalendarTable.for_years(first, last)
+    return _TABLE
+
+
+def calendar_features(timestamps, columns=None) -> dict[str, np.ndarray]:
+    """
+    Calendar fields of ``timestamps`` looked up in the shared table.
+
+    Args:
+        timestamps: Datetime-like values (naive, local time).
+        columns: Fields to return; defaults to all of :data:`CALENDAR_COLUMNS`.
+
+    Returns:
+        Mapping of field name to array. Missing timestamps (NaT) give NaN,
+        which makes those arrays float.
+    """
+    values = pd.DatetimeIndex(timestamps).as_unit('ns').asi8
+    if len(values) == 0:
+        return {name: np.zeros(0, dtype=CALENDAR_COLUMNS[name]) for name in (columns or CALENDAR_COLUMNS)}
+    missing = values == np.iinfo(np.int64).min
+    hours = values[~missing] // NS_PER_HOUR if missing.any() else values // NS_PER_HOUR
+    looked_up = calendar_table(hours).lookup(hours, columns)
+    if not missing.any():
+        return looked_up
+    out = {}
+    for name, field in looked_up.items():
+        full = np.full(len(values), np.nan)
+        full[~missing] = field
+        out[name] = full
+    return out
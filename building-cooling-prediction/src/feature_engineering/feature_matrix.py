@@ -0,0 +1,187 @@
+"""Model-ready feature matrices built in a single pass.
+
+``create_features`` grows a DataFrame column by column, which is convenient
+for inspection and the processed CSVs. Models only need a dense array, so
+:func:`build_feature_matrix` computes the same features straight into one
+preallocated, C-contiguous float32 matrix with a matching list of names.
+Lags and rolling means come from one cumulative sum per column, so their cost
+does not grow with the window size.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+# (name, left column, right column) of the products added by create_weather_features
+INTERACTIONS = (
+    ('temp_x_hour', 'temperature_celsius', 'hour'),
+    ('humidity_x_hour', 'humidity_percent', 'hour'),
+)
+
+
+@dataclass
+class FeatureMatrix:
+    """A dense feature matrix and the name of each of its columns."""
+
+    values: np.ndarray
+    feature_names: list[str]
+
+    def to_frame(self, index=None) -> pd.DataFrame:
+        return pd.DataFrame(self.values, columns=self.feature_names, index=index)
+
+
+def lag_feature_names(col: str, window: int) -> tuple[str, str]:
+    """Names of the lag and rolling-mean features of ``col`` for ``window``."""
+
+    return f'{col}_lag_{window}', f'{col}_rolling_mean_{window}'
+
+
+def lag_rolling_features(values, window_sizes: Sequence[int], out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Lags and trailing rolling means of one series for several windows.
+
+    Column ``2 * j`` of the result is the series shifted by ``window_sizes[j]``
+    and column ``2 * j + 1`` is the mean of the ``window_sizes[j]`` values
+    before each row (``shift(1).rolling(window).mean()``), which is NaN unless
+    the whole window is observed. All windows are read off a single
+    cumulative sum.
+
+    Args:
+        values: 1-D series.
+        window_sizes: Positive window sizes.
+        out: Optional ``(len(values), 2 * len(window_sizes))`` array (or view)
+            to write into.
+
+    Returns:
+        ``out``, or a new float64 array when it was not given.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    if out is None:
+        out = np.empty((n, 2 * len(window_sizes)), dtype=np.float64)
+
+    observed = ~np.isnan(x)
+    # prefix[i] = sum of the first i values (NaN counted as 0); counts likewise
+    prefix = np.zeros(n + 1)
+    np.cumsum(np.where(observed, x, 0.0), out=prefix[1:])
+    counts = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(observed, out=counts[1:])
+
+    for j, window in enumerate(window_sizes):
+        if window < 1:
+            raise ValueError(f"Window sizes must be positive, got {window}")
+        w = min(window, n)
+        lag, mean = out[:, 2 * j], out[:, 2 * j + 1]
+        lag[:w] = np.nan
+        lag[w:] = x[:n - w]
+        mean[:w] = np.nan
+        full = (counts[w:n] - counts[:n - w]) == window
+        mean[w:] = np.where(full, (prefix[w:n] - prefix[:n - w]) / window, np.nan)
+    return out
+
+
+def numeric_feature_names(df: pd.DataFrame, exclude: Iterable[str] = ()) -> list[str]:
+    """Names of the numeric columns of ``df`` (those a model can use), in order."""
+
+    excluded = set(exclude)
+    return [c for c in df.select_dtypes(include='number').columns if c not in excluded]
+
+
+def build_feature_matrix(
+    df: pd.DataFrame,
+    cols_to_lag: list[str],
+    window_sizes: list[int],
+    feature_names: list[str] | None = None,
+    exclude: Iterable[str] = (),
+    dtype=np.float32,
+) -> FeatureMatrix:
+    """
+    Builds the lag, rolling-mean and weather interaction features as a matrix.
+
+    Produces the numeric columns of ``create_features`` in the same order:
+    the numeric columns of ``df``, then lag and rolling mean per column and
+    window, then the weather/hour interactions.
+
+    Args:
+        df: Frame with time, weather and technical features (everything
+            ``create_features`` computes before the lag features).
+        cols_to_lag: Columns to create lag features for; missing ones are
+            skipped.
+        window_sizes: Window sizes for the lag and rolling features.
+        feature_names: Column layout to produce instead of the default one,
+            e.g. the training columns when building test features. Names that
+            cannot be computed from ``df`` are filled with NaN.
+        exclude: Numeric columns of ``df`` to leave out (e.g. the target).
+        dtype: dtype of the matrix.
+
+    Returns:
+        FeatureMatrix with a C-contiguous ``(len(df), n_features)`` array.
+    """
+    base = numeric_feature_names(df, exclude)
+    lagged = [c for c in cols_to_lag if c in df.columns]
+    if feature_names is None:
+        feature_names = list(base)
+        for col in lagged:
+            for window in window_sizes:
+                feature_names.extend(lag_feature_names(col, window))
+        feature_names.extend(name for name, left, right in INTERACTIONS if left in df and right in df)
+    position = {name: i for i, name in enumerate(feature_names)}
+
+    n = len(df)
+    matrix = np.full((n, len(feature_names)), np.nan, dtype=dtype)
+    for col in base:
+        if col in position:
+            matrix[:, position[col]] = df[col].to_numpy(dtype=np.float64)
+
+    for col in lagged:
+        windows = [w for w in window_sizes if any(name in position for name in lag_feature_names(col, w))]
+        if not windows:
+            continue
+        columns = [position.get(name) for w in windows for name in lag_feature_names(col, w)]
+        start = columns[0]
+        if None not in columns and columns == list(range(start, start + len(columns))):
+            # Default layout: write straight into the matrix
+            lag_rolling_features(df[col].to_numpy(), windows, out=matrix[:, start:start + len(columns)])
+        else:
+            block = lag_rolling_features(df[col].to_numpy(), windows)
+            for k, i in enumerate(columns):
+                if i is not None:
+                    matrix[:, i] = block[:, k]
+
+    for name, left, right in INTERACTIONS:
+        if name in position and left in df and right in df:
+            matrix[:, position[name]] = df[left].to_numpy(dtype=np.float64) * df[right].to_numpy(dtype=np.float64)
+
+    return FeatureMatrix(matrix, list(feature_names))
+
+
+def frame_to_matrix(
+    df: pd.DataFrame,
+    feature_names: list[str] | None = None,
+    exclude: Iterable[str] = (),
+    dtype=np.float32,
+) -> FeatureMatrix:
+    """
+    Copies the numeric columns of an already built feature frame into a matrix.
+
+    Args:
+        df: Feature frame, e.g. the output of ``create_features``.
+        feature_names: Columns to take, in order; missing ones become NaN.
+            Defaults to the numeric columns of ``df``.
+        exclude: Columns to leave out of the default selection.
+        dtype: dtype of the matrix.
+
+    Returns:
+        FeatureMatrix with a C-contiguous array.
+    """
+    if feature_names is None:
+        feature_names = numeric_feature_names(df, exclude)
+    matrix = np.full((len(df), len(feature_names)), np.nan, dtype=dtype)
+    for i, name in enumerate(feature_names):
+        if name in df.columns:
+            matrix[:, i] = df[name].to_numpy(dtype=np.float64)
+    return FeatureMatrix(matrix, list(feature_names))
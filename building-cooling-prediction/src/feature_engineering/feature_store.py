@@ -0,0 +1,322 @@
+"""Versioned on-disk feature store partitioned by building and month.
+
+Feature frames are written with :func:`~src.data_processing.ingest.write_columnar`
+(one ``.npy`` file per column) under::
+
+    <root>/<feature_set>/<schema hash>/building=<name>/month=<YYYY-MM>/
+
+The schema hash covers the column names and dtypes, so a changed feature set
+gets a new directory instead of mixing with old partitions. Each building
+records the schema it was last written with (``<feature_set>/latest/``), so
+buildings with different columns (e.g. chiller counts) coexist. Reads only open
+the partitions of the requested buildings and months, only the requested
+column files, and only the rows of the requested time range (partitions are
+sorted by time, so the range is found with a binary search on the
+timestamps).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing.ingest import read_columnar, write_columnar
+from src.data_processing.load_data import TIMESTAMP_COLUMNS, parse_timestamps, resolve_path
+
+STORE_FORMAT_VERSION = 1
+DEFAULT_FEATURE_STORE_DIR = "data/feature_store"
+_SCHEMA_FILE = "schema.json"
+_MANIFEST_FILE = "_manifest.json"
+_LATEST_DIR = "latest"
+
+
+def schema_hash(df: pd.DataFrame, timestamp_col: str) -> str:
+    """Hash of the column names and dtypes of ``df`` (and the store format)."""
+
+    schema = {
+        "format_version": STORE_FORMAT_VERSION,
+        "timestamp_col": timestamp_col,
+        "columns": [[str(c), str(dtype)] for c, dtype in df.dtypes.items()],
+    }
+    return hashlib.blake2b(json.dumps(schema).encode(), digest_size=8).hexdigest()
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def _month_bounds(start, end) -> tuple[str | None, str | None]:
+    """First and last ``YYYY-MM`` partition overlapping ``[start, end)``."""
+
+    first = None if start is None else str(pd.Timestamp(start).to_datetime64().astype("datetime64[M]"))
+    last = None
+    if end is not None:
+        # The month of the last instant before ``end``
+        last = str((pd.Timestamp(end) - pd.Timedelta(1)).to_datetime64().astype("datetime64[M]"))
+    return first, last
+
+
+class FeatureStore:
+    """Feature frames of many buildings, stored by month.
+
+    Parameters
+    ----------
+    root:
+        Store directory (relative paths are resolved against the project root).
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_FEATURE_STORE_DIR):
+        self.root = resolve_path(str(root))
+
+    def _set_dir(self, feature_set: str) -> Path:
+        return self.root / feature_set
+
+    def schemas(self, feature_set: str) -> list[str]:
+        """Schema hashes stored for ``feature_set``."""
+        directory = self._set_dir(feature_set)
+        if not directory.exists():
+            return []
+        return sorted(p.name for p in directory.iterdir() if (p / _SCHEMA_FILE).exists())
+
+    def _pointer(self, feature_set: str, building: str) -> Path:
+        return self._set_dir(feature_set) / _LATEST_DIR / f"building={building}"
+
+    def latest_schemas(self, feature_set: str) -> dict[str, str]:
+        """Schema hash each building's ``feature_set`` features were last written with."""
+        directory = self._set_dir(feature_set) / _LATEST_DIR
+        if not directory.is_dir():
+            return {}
+        return {
+            p.name.split("=", 1)[1]: p.read_text().strip()
+            for p in sorted(directory.glob("building=*"))
+            if ".tmp-" not in p.name
+        }
+
+    def latest_schema(self, feature_set: str, building: str) -> str:
+        """Hash of the schema ``building``'s ``feature_set`` features were last written with."""
+        try:
+            return self._pointer(feature_set, building).read_text().strip()
+        except FileNotFoundError:
+            raise KeyError(f"No {feature_set!r} features stored for building {building!r} in {self.root}") from None
+
+    def _resolve(self, feature_set: str, buildings: Iterable[str] | None, schema: str | None) -> tuple[str, list[str]]:
+        """The schema to read and the buildings to read it for.
+
+        Without an explicit ``schema`` the buildings' latest schemas are used,
+        which must then agree.
+        """
+        if schema is not None:
+            return schema, self.buildings(feature_set, schema) if buildings is None else list(buildings)
+        latest = self.latest_schemas(feature_set)
+        names = sorted(latest) if buildings is None else list(buildings)
+        if not names:
+            raise KeyError(f"No features stored for {feature_set!r} in {self.root}")
+        unknown = [b for b in names if b not in latest]
+        if unknown:
+            raise KeyError(f"No {feature_set!r} features stored for buildings {unknown}")
+        by_schema: dict[str, list[str]] = {}
+        for building in names:
+            by_schema.setdefault(latest[building], []).append(building)
+        if len(by_schema) > 1:
+            groups = "; ".join(f"{h}: {', '.join(b)}" for h, b in by_schema.items())
+            raise ValueError(
+                f"The {feature_set!r} features of these buildings have different schemas ({groups}); "
+                "select buildings sharing one or pass schema="
+            )
+        return next(iter(by_schema)), names
+
+    def schema(self, feature_set: str, schema: str | None = None, buildings: Iterable[str] | None = None) -> dict:
+        """Columns, dtypes and timestamp column of a stored schema.
+
+        Defaults to the latest schema of ``buildings`` (all buildings), which
+        must be the same for all of them.
+        """
+        schema, _ = self._resolve(feature_set, buildings, schema)
+        return json.loads((self._set_dir(feature_set) / schema / _SCHEMA_FILE).read_text())
+
+    def buildings(self, feature_set: str, schema: str | None = None) -> list[str]:
+        """Buildings with features in ``feature_set`` (under ``schema``, if given)."""
+        if schema is None:
+            return sorted(self.latest_schemas(feature_set))
+        directory = self._set_dir(feature_set) / schema
+        return sorted(p.name.split("=", 1)[1] for p in directory.glob("building=*") if p.is_dir())
+
+    def version(self, feature_set: str, building: str, schema: str | None = None) -> str | None:
+        """The ``version`` a building was last written with, or ``None``."""
+        try:
+            directory = self._set_dir(feature_set) / (schema or self.latest_schema(feature_set, building))
+            manifest = json.loads((directory / f"building={building}" / _MANIFEST_FILE).read_text())
+        except (KeyError, FileNotFoundError, json.JSONDecodeError):
+            return None
+        return manifest.get("version")
+
+    def write(
+        self,
+        feature_set: str,
+        building: str,
+        df: pd.DataFrame,
+        timestamp_col: str | None = None,
+        version: str | None = None,
+    ) -> Path:
+        """Store the features of one building, replacing what it had under the same schema.
+
+        Parameters
+        ----------
+        feature_set:
+            Name of the feature set, e.g. ``'train'`` or ``'test'``.
+        building:
+            Building name (the partition key).
+        df:
+            Feature frame with a timestamp column.
+        timestamp_col:
+            Timestamp column; defaults to the first of the usual names present.
+        version:
+            Optional label recorded with the partitions (e.g. the pipeline
+            stage key), returned by :meth:`version`.
+
+        Returns
+        -------
+        Path
+            The building's directory.
+        """
+        if timestamp_col is None:
+            timestamp_col = next((c for c in TIMESTAMP_COLUMNS if c in df.columns), None)
+            if timestamp_col is None:
+                raise KeyError(f"No timestamp column found; tried {', '.join(TIMESTAMP_COLUMNS)}")
+        df = df.copy()
+        df[timestamp_col] = parse_timestamps(df[timestamp_col])
+        if df[timestamp_col].isna().any():
+            raise ValueError(f"Cannot partition rows without a timestamp ({timestamp_col!r} has missing values)")
+        df = df.sort_values(timestamp_col, kind="stable").reset_index(drop=True)
+
+        schema = schema_hash(df, timestamp_col)
+        schema_dir = self._set_dir(feature_set) / schema
+        building_dir = schema_dir / f"building={building}"
+        building_dir.mkdir(parents=True, exist_ok=True)
+        if not (schema_dir / _SCHEMA_FILE).exists():
+            _atomic_write_text(schema_dir / _SCHEMA_FILE, json.dumps({
+                "format_version": STORE_FORMAT_VERSION,
+                "timestamp_col": timestamp_col,
+                "columns": [str(c) for c in df.columns],
+                "dtypes": [str(dtype) for dtype in df.dtypes],
+            }, indent=2))
+
+        months = df[timestamp_col].to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+        bounds = np.flatnonzero(np.r_[True, months[1:] != months[:-1], True]) if len(df) else [0]
+        written = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            month = str(months[lo])
+            write_columnar(df.iloc[lo:hi], building_dir / f"month={month}", timestamp_cols=[timestamp_col])
+            written.append(month)
+        for stale in building_dir.glob("month=*"):
+            if stale.is_dir() and stale.name.split("=", 1)[1] not in written and ".tmp-" not in stale.name:
+                shutil.rmtree(stale, ignore_errors=True)
+
+        _atomic_write_text(building_dir / _MANIFEST_FILE, json.dumps(
+            {"version": version, "n_rows": len(df), "months": written}, indent=2
+        ))
+        pointer = self._pointer(feature_set, building)
+        pointer.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write_text(pointer, schema)
+        return building_dir
+
+    def partitions(
+        self,
+        feature_set: str,
+        buildings: Iterable[str] | None = None,
+        start=None,
+        end=None,
+        schema: str | None = None,
+    ) -> list[tuple[str, Path]]:
+        """``(building, directory)`` of the month partitions overlapping ``[start, end)``."""
+        schema, names = self._resolve(feature_set, buildings, schema)
+        schema_dir = self._set_dir(feature_set) / schema
+        first, last = _month_bounds(start, end)
+        found = []
+        for building in names:
+            building_dir = schema_dir / f"building={building}"
+            if not building_dir.is_dir():
+                raise KeyError(f"No {feature_set!r} features stored for building {building!r}")
+            for part in sorted(building_dir.glob("month=*")):
+                month = part.name.split("=", 1)[1]
+                if ".tmp-" in month or (first and month < first) or (last and month > last):
+                    continue
+                found.append((building, part))
+        return found
+
+    def read(
+        self,
+        feature_set: str,
+        buildings: Iterable[str] | None = None,
+        start=None,
+        end=None,
+        columns: Iterable[str] | None = None,
+        schema: str | None = None,
+    ) -> pd.DataFrame:
+        """Load features, touching only the partitions, rows and columns asked for.
+
+        Parameters
+        ----------
+        feature_set:
+            Name the features were written under.
+        buildings:
+            Buildings to load; default all.
+        start, end:
+            Half-open time range ``[start, end)``; either may be omitted.
+        columns:
+            Feature columns to load; default all. The timestamp column is
+            always included.
+        schema:
+            Schema hash to read; default the latest one of the buildings.
+            Raises ``ValueError`` when they were last written with different
+            schemas.
+
+        Returns
+        -------
+        pd.DataFrame
+            A ``building`` column, the timestamp column and the requested
+            columns, ordered by building and time.
+        """
+        schema, buildings = self._resolve(feature_set, buildings, schema)
+        spec = self.schema(feature_set, schema)
+        timestamp_col = spec["timestamp_col"]
+        if columns is None:
+            columns = spec["columns"]
+        names = [timestamp_col, *(c for c in columns if c != timestamp_col)]
+        missing = [c for c in names if c not in spec["columns"]]
+        if missing:
+            raise KeyError(f"Columns not in the {feature_set!r} feature set: {missing}")
+
+        lo_ns = None if start is None else pd.Timestamp(start).value
+        hi_ns = None if end is None else pd.Timestamp(end).value
+        chunks: dict[str, list[np.ndarray]] = {name: [] for name in names}
+        owners, counts = [], []
+        for building, part in self.partitions(feature_set, buildings, start, end, schema):
+            # Month partitions are small: reading beats setting up one memory map per file
+            frame = read_columnar(part, columns=names, mmap=False)
+            ts = frame[timestamp_col].to_numpy().view("int64")
+            lo = 0 if lo_ns is None else np.searchsorted(ts, lo_ns, side="left")
+            hi = len(ts) if hi_ns is None else np.searchsorted(ts, hi_ns, side="left")
+            if hi > lo:
+                for name in names:
+                    chunks[name].append(frame[name].to_numpy()[lo:hi])
+                owners.append(building)
+                counts.append(hi - lo)
+
+        dtypes = dict(zip(spec["columns"], spec["dtypes"]))
+        data = {"building": pd.Series(np.repeat(np.array(owners, dtype=object), counts), dtype=str)}
+        for name in names:
+            if chunks[name]:
+                data[name] = np.concatenate(chunks[name])
+            else:
+                data[name] = pd.Series(dtype=dtypes[name])
+        return pd.DataFrame(data, columns=["building", *names])
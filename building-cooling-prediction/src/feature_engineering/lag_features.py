@@ -1,26 +1,63 @@
 import pandas as pd
+from src.data_processing.calculate_cooling_load import replace_columns
+from src.feature_engineering.feature_matrix import lag_feature_names, lag_rolling_features
+from src.feature_engineering.registry import FeatureGroup
 
-def create_lag_features(df: pd.DataFrame, cols_to_lag: list[str], window_sizes: list[int]) -> pd.DataFrame:
+def create_lag_features(
+    df: pd.DataFrame, cols_to_lag: list[str], window_sizes: list[int], feature_names=None
+) -> pd.DataFrame:
     """
     Creates lag and rolling window features for specified columns.
 
+    All windows of a column are computed in one pass over a cumulative sum
+    (see :func:`~src.feature_engineering.feature_matrix.lag_rolling_features`)
+    and the new columns are added to ``df`` in a single step.
+
     Args:
         df: DataFrame with time-series data.
         cols_to_lag: List of column names to create lag features for.
         window_sizes: List of window sizes for rolling features.
+        feature_names: Features to create (default: all); windows none of
+            whose features are needed are not computed.
 
     Returns:
         DataFrame with new lag and rolling window features.
     """
+    wanted = None if feature_names is None else set(feature_names)
+    blocks = []
     for col in cols_to_lag:
         if col not in df.columns:
             # Skip missing columns to be robust across train/test
             continue
-        for window in window_sizes:
-            # Lag features
-            df[f'{col}_lag_{window}'] = df[col].shift(window)
+        windows = [
+            w for w in window_sizes
+            if wanted is None or not wanted.isdisjoint(lag_feature_names(col, w))
+        ]
+        if not windows:
+            continue
+        names = [name for window in windows for name in lag_feature_names(col, window)]
+        block = pd.DataFrame(lag_rolling_features(df[col].to_numpy(), windows), columns=names)
+        blocks.append(block if wanted is None else block[[n for n in names if n in wanted]])
+
+    if not blocks:
+        return df
+    return replace_columns(df, pd.concat(blocks, axis=1))
+
+
+def _lag_outputs(available, context) -> dict:
+    return {
+        name: (col,)
+        for col in context.cols_to_lag
+        if col in available
+        for window in context.window_sizes
+        for name in lag_feature_names(col, window)
+    }
 
-            # Rolling mean features
-            df[f'{col}_rolling_mean_{window}'] = df[col].shift(1).rolling(window=window).mean()
 
-    return df
+LAG_GROUP = FeatureGroup(
+    name='lags',
+    outputs=_lag_outputs,
+    compute=lambda df, names, context: create_lag_features(
+        df, context.cols_to_lag, context.window_sizes, names
+    ),
+)
@@ -0,0 +1,313 @@
+"""Incremental feature computation for one new hourly reading at a time.
+
+``create_features`` recomputes every feature over the whole history. For live
+inference :class:`OnlineFeatureState` keeps only what the next row needs:
+
+* per lagged column, ring buffers with the last ``max(window_sizes)`` values
+  and running sums (prefix sums and observed counts), so each lag and rolling
+  mean is a lookup and one subtraction;
+* the weather and calendar values of the current day, taken from a block of
+  days joined in one go when the day changes. Only the weather columns the
+  features need (resolved through the feature registry) are joined.
+
+The running sums are the same prefix sums
+:func:`~src.feature_engineering.feature_matrix.lag_rolling_features` uses, in
+the same order, so a state seeded with the same history reproduces the batch
+features exactly. Like the batch features, lags are counted in rows, not in
+hours, so readings are expected once per hour without gaps.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing.external_data import NS_PER_DAY, NS_PER_HOUR, WeatherStore
+from src.feature_engineering.calendar import CALENDAR_COLUMNS, calendar_table
+from src.feature_engineering.feature_matrix import INTERACTIONS, lag_feature_names
+from src.feature_engineering.registry import FeatureContext, resolve_features
+from src.feature_engineering.weather_features import merge_weather
+
+# Days of weather joined at once when the current day leaves the cached block
+WEATHER_BLOCK_DAYS = 32
+
+_NAN = float('nan')
+
+
+class _LagState:
+    """Ring buffers of one column: recent values, prefix sums and observed counts."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.values = [_NAN] * capacity
+        # Prefix sums/counts of the last ``capacity + 1`` positions; slot
+        # ``n % (capacity + 1)`` holds the totals over the first ``n`` values
+        self.prefix = [0.0] * (capacity + 1)
+        self.counts = [0] * (capacity + 1)
+        self.n = 0
+
+    def push(self, value: float) -> None:
+        size = self.capacity + 1
+        observed = value == value
+        self.values[self.n % self.capacity] = value
+        self.prefix[(self.n + 1) % size] = self.prefix[self.n % size] + (value if observed else 0.0)
+        self.counts[(self.n + 1) % size] = self.counts[self.n % size] + observed
+        self.n += 1
+
+    def seed(self, values: np.ndarray) -> None:
+        """Load a whole history at once (equivalent to pushing every value)."""
+        x = np.asarray(values, dtype=np.float64)
+        observed = ~np.isnan(x)
+        prefix = np.zeros(len(x) + 1)
+        np.cumsum(np.where(observed, x, 0.0), out=prefix[1:])
+        counts = np.zeros(len(x) + 1, dtype=np.int64)
+        np.cumsum(observed, out=counts[1:])
+        size = self.capacity + 1
+        self.n = len(x)
+        for i in range(max(0, self.n - self.capacity), self.n):
+            self.values[i % self.capacity] = float(x[i])
+        for i in range(max(0, self.n + 1 - size), self.n + 1):
+            self.prefix[i % size] = float(prefix[i])
+            self.counts[i % size] = int(counts[i])
+
+    def copy(self) -> '_LagState':
+        clone = copy.copy(self)
+        clone.values, clone.prefix, clone.counts = list(self.values), list(self.prefix), list(self.counts)
+        return clone
+
+    def amend(self, values: Sequence[float]) -> None:
+        """Replace the last ``len(values)`` pushed values, e.g. placeholders by predictions."""
+        if len(values) > min(self.n, self.capacity):
+            raise ValueError(f"Cannot amend {len(values)} values of a buffer holding {min(self.n, self.capacity)}")
+        self.n -= len(values)
+        for value in values:
+            self.push(float(value))
+
+    def lag(self, window: int) -> float:
+        if self.n < window:
+            return _NAN
+        return self.values[(self.n - window) % self.capacity]
+
+    def rolling_mean(self, window: int) -> float:
+        if self.n < window:
+            return _NAN
+        size = self.capacity + 1
+        now, then = self.n % size, (self.n - window) % size
+        if self.counts[now] - self.counts[then] != window:
+            return _NAN
+        return (self.prefix[now] - self.prefix[then]) / window
+
+
+class OnlineFeatureState:
+    """
+    Streaming counterpart of ``create_features`` for one building.
+
+    Args:
+        feature_names: Features to produce, in order (typically the training
+            columns of the model). Names that are neither time, weather,
+            chiller delta-T, lag or interaction features are read from the
+            observation; unknown ones are NaN.
+        cols_to_lag: Columns with lag and rolling mean features.
+        window_sizes: Window sizes for the lag and rolling features.
+        weather: Weather data or a shared :class:`WeatherStore`.
+        weather_resolution: ``'daily'`` or ``'hourly'``, as for
+            ``create_features``.
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        cols_to_lag: list[str],
+        window_sizes: list[int],
+        weather: pd.DataFrame | WeatherStore,
+        weather_resolution: str = 'daily',
+    ):
+        if any(w < 1 for w in window_sizes):
+            raise ValueError(f"Window sizes must be positive, got {window_sizes}")
+        self.feature_names = list(feature_names)
+        self.cols_to_lag = list(cols_to_lag)
+        self.window_sizes = list(window_sizes)
+        self.weather = weather if isinstance(weather, WeatherStore) else WeatherStore.from_frame(weather)
+        self.weather_resolution = weather_resolution
+        self._weather_context = FeatureContext(
+            'timestamp', self.cols_to_lag, self.window_sizes, self.weather, weather_resolution
+        )
+        plan = resolve_features([*self.feature_names, *self.cols_to_lag], ['timestamp'], self._weather_context)
+        self.weather_columns = next((names for group, names in plan if group.name == 'weather'), [])
+
+        capacity = max(self.window_sizes)
+        self.lags = {col: _LagState(capacity) for col in self.cols_to_lag}
+        self._day = None
+        self._block_start: int | None = None
+        self._block_weather: np.ndarray | None = None
+        self._day_weather: np.ndarray | None = None
+        self._day_calendar: dict[str, int] = {}
+        self._compile()
+
+    def _compile(self) -> None:
+        """Resolve once where each feature comes from."""
+
+        lag_sources = {}
+        for col in self.cols_to_lag:
+            for w in self.window_sizes:
+                lag_name, mean_name = lag_feature_names(col, w)
+                lag_sources[lag_name] = (self.lags[col], w, False)
+                lag_sources[mean_name] = (self.lags[col], w, True)
+        interactions = {name: (left, right) for name, left, right in INTERACTIONS}
+
+        self._base_slots = []  # (position, name) filled from the base row
+        self._lag_slots = []  # (position, state, window, is_mean)
+        for i, name in enumerate(self.feature_names):
+            if name in lag_sources:
+                self._lag_slots.append((i, *lag_sources[name]))
+            else:
+                self._base_slots.append((i, name))
+        self._interactions = [(name, *interactions[name]) for name in self.feature_names if name in interactions]
+        self._delta_t = [
+            (name, name[:-len('delta_t')] + 'CHWRWT', name[:-len('delta_t')] + 'CHWSWT')
+            for name in self.feature_names
+            if name.endswith('-delta_t')
+        ]
+
+    @classmethod
+    def from_history(
+        cls,
+        history: pd.DataFrame,
+        timestamp_col: str,
+        feature_names: Sequence[str],
+        cols_to_lag: list[str],
+        window_sizes: list[int],
+        weather: pd.DataFrame | WeatherStore,
+        weather_resolution: str = 'daily',
+    ) -> 'OnlineFeatureState':
+        """
+        Creates a state whose next :meth:`update` continues after ``history``.
+
+        Args:
+            history: Hourly data (e.g. the processed hourly CSV) in time order.
+            timestamp_col: Name of the timestamp column.
+
+        The other arguments are those of the constructor.
+
+        Returns:
+            The seeded state.
+        """
+        from src.utils.helpers import prepare_base_features
+
+        state = cls(feature_names, cols_to_lag, window_sizes, weather, weather_resolution)
+        if len(history):
+            # Only the lagged columns are needed to seed the buffers
+            base = prepare_base_features(
+                history, timestamp_col, weather_df=state.weather, weather_resolution=weather_resolution,
+                feature_names=state.cols_to_lag,
+            )
+            for col, lag_state in state.lags.items():
+                values = base[col].to_numpy(dtype=np.float64) if col in base else np.full(len(base), np.nan)
+                lag_state.seed(values)
+        return state
+
+    def copy(self) -> 'OnlineFeatureState':
+        """
+        Independent state continuing from the same reading.
+
+        Only the lag buffers are copied; the weather store and the cached
+        weather block are shared (they are never modified in place), so
+        many forecasts can start from one seeded state cheaply.
+        """
+        clone = copy.copy(self)
+        clone.lags = {col: state.copy() for col, state in self.lags.items()}
+        clone._compile()
+        return clone
+
+    def _refresh_day(self, day: int) -> None:
+        """Switch to ``day``, joining the weather of the next block of days if needed."""
+
+        offset = day - self._block_start if self._block_start is not None else -1
+        if not 0 <= offset < WEATHER_BLOCK_DAYS:
+            # One join per block keeps the per-reading cost at a lookup
+            start = pd.Timestamp(day * NS_PER_DAY)
+            hours = pd.DataFrame({'timestamp': pd.date_range(start, periods=24 * WEATHER_BLOCK_DAYS, freq='h')})
+            merged = merge_weather(hours, self._weather_context, self.weather_columns)
+            self._block_weather = merged[self.weather_columns].to_numpy(dtype=np.float64)
+            self._block_start, offset = day, 0
+
+        self._day_weather = self._block_weather[24 * offset:24 * (offset + 1)]
+        first_hour = np.array([day * 24])
+        fields = calendar_table(first_hour).lookup(first_hour, [c for c in CALENDAR_COLUMNS if c != 'hour'])
+        self._day_calendar = {name: int(values[0]) for name, values in fields.items()}
+        self._day = day
+
+    def _base_row(self, timestamp, observation: Mapping[str, float]) -> dict[str, float]:
+        """Observation plus the time, weather and technical features of its hour."""
+
+        ns = pd.Timestamp(timestamp).value
+        day, hour = divmod(ns, NS_PER_DAY)
+        if day != self._day:
+            self._refresh_day(day)
+
+        row = dict(observation)
+        row.update(self._day_calendar)
+        row['hour'] = hour // NS_PER_HOUR
+        for name, value in zip(self.weather_columns, self._day_weather[hour // NS_PER_HOUR]):
+            row[name] = value
+        for name, return_col, supply_col in self._delta_t:
+            row[name] = float(row.get(return_col, _NAN)) - float(row.get(supply_col, _NAN))
+        for name, left, right in self._interactions:
+            row[name] = float(row.get(left, _NAN)) * float(row.get(right, _NAN))
+        return row
+
+    def _vector(self, row: dict[str, float], dtype) -> np.ndarray:
+        out = [_NAN] * len(self.feature_names)
+        for i, name in self._base_slots:
+            value = row.get(name, _NAN)
+            out[i] = _NAN if value is None else float(value)
+        for i, state, window, is_mean in self._lag_slots:
+            out[i] = state.rolling_mean(window) if is_mean else state.lag(window)
+        return np.array(out, dtype=dtype)
+
+    def features(self, timestamp, observation: Mapping[str, float], dtype=np.float64) -> np.ndarray:
+        """
+        Feature vector of a reading without adding it to the history.
+
+        Args:
+            timestamp: Hour of the reading.
+            observation: Raw values of the reading by column name (missing
+                columns are NaN). For a forecast this is whatever is known
+                about the coming hour.
+            dtype: dtype of the returned vector.
+
+        Returns:
+            1-D array ordered like ``feature_names``.
+        """
+        return self._vector(self._base_row(timestamp, observation), dtype)
+
+    def update(self, timestamp, observation: Mapping[str, float], dtype=np.float64) -> np.ndarray:
+        """
+        Feature vector of a new reading, which then becomes part of the history.
+
+        Takes the same arguments as :meth:`features`. The lags of the next
+        reading include this one.
+        """
+        row = self._base_row(timestamp, observation)
+        vector = self._vector(row, dtype)
+        for col, state in self.lags.items():
+            value = row.get(col, _NAN)
+            state.push(_NAN if value is None else float(value))
+        return vector
+
+    def amend(self, column: str, values: Sequence[float]) -> None:
+        """
+        Replace the most recent values of a lagged column.
+
+        Used to feed predictions back: readings pushed by :meth:`update` with
+        an unknown (NaN) value of ``column`` get the predicted values, exactly
+        as if they had been pushed with them.
+
+        Args:
+            column: One of ``cols_to_lag``.
+            values: New values of the last ``len(values)`` readings, oldest first.
+        """
+        self.lags[column].amend(values)
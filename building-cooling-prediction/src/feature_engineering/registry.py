@@ -0,0 +1,221 @@
+"""Declarative registry of feature groups.
+
+Each module in ``src/feature_engineering/`` declares its feature group: the
+columns it can produce, the columns each one is computed from, and a function
+computing a subset of them. :func:`resolve_features` turns a list of required
+features into the minimal sequence of group computations, in dependency
+order, so features a model does not use (an interaction, an unused lag
+window, a whole group) are never computed.
+
+Groups are plain data, so a new one is added with :func:`register` instead of
+by editing ``create_features``::
+
+    register(FeatureGroup('cooling_degree_hours', outputs=..., compute=...))
+"""
+
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass
+from typing import Callable, Collection, Iterable, Sequence
+
+import pandas as pd
+
+# Built-in groups as (module, attribute), registered in this order on first
+# use. The order is the column order of ``create_features``.
+BUILTIN_GROUPS = (
+    ('src.feature_engineering.time_features', 'CALENDAR_GROUP'),
+    ('src.feature_engineering.weather_features', 'WEATHER_GROUP'),
+    ('src.feature_engineering.technical_features', 'TECHNICAL_GROUP'),
+    ('src.feature_engineering.lag_features', 'LAG_GROUP'),
+    ('src.feature_engineering.weather_features', 'INTERACTION_GROUP'),
+)
+
+# Groups that make up ``prepare_base_features`` (everything lags build on)
+BASE_GROUPS = ('calendar', 'weather', 'technical')
+
+
+@dataclass
+class FeatureContext:
+    """Settings the feature groups are computed with.
+
+    Attributes:
+        timestamp_col: Name of the (parsed) timestamp column.
+        cols_to_lag: Columns with lag and rolling mean features.
+        window_sizes: Window sizes for the lag and rolling features.
+        weather: Weather data or a shared ``WeatherStore``; no weather
+            features without it.
+        weather_resolution: ``'daily'`` or ``'hourly'``.
+    """
+
+    timestamp_col: str
+    cols_to_lag: Sequence[str] = ()
+    window_sizes: Sequence[int] = ()
+    weather: object = None
+    weather_resolution: str = 'daily'
+
+
+@dataclass(frozen=True)
+class FeatureGroup:
+    """A set of features computed together.
+
+    Attributes:
+        name: Unique name of the group.
+        outputs: ``outputs(available, context)`` maps every column the group
+            can produce, given the ``available`` columns, to the columns it
+            is computed from.
+        compute: ``compute(df, names, context)`` returns ``df`` with the
+            columns ``names`` (a subset of the outputs) added.
+    """
+
+    name: str
+    outputs: Callable[[Collection[str], FeatureContext], dict[str, tuple[str, ...]]]
+    compute: Callable[[pd.DataFrame, list[str], FeatureContext], pd.DataFrame]
+
+
+_GROUPS: dict[str, FeatureGroup] = {}
+_BUILTINS_LOADED = False
+
+
+def _load_builtin_groups() -> None:
+    global _BUILTINS_LOADED
+    if _BUILTINS_LOADED:
+        return
+    _BUILTINS_LOADED = True
+    builtin = {}
+    for module, attribute in BUILTIN_GROUPS:
+        group = getattr(importlib.import_module(module), attribute)
+        builtin[group.name] = group
+    # Built-in groups go first, before any registered while importing them
+    _GROUPS.update({**builtin, **_GROUPS})
+
+
+def register(group: FeatureGroup, replace: bool = False) -> FeatureGroup:
+    """
+    Adds a feature group to the registry.
+
+    Args:
+        group: The group to add.
+        replace: Replace a registered group of the same name instead of
+            raising ``ValueError``.
+
+    Returns:
+        The group, so declarations can be written as ``X = register(...)``.
+    """
+    _load_builtin_groups()
+    if group.name in _GROUPS and not replace:
+        raise ValueError(f"Feature group {group.name!r} is already registered")
+    _GROUPS[group.name] = group
+    return group
+
+
+def feature_groups() -> list[FeatureGroup]:
+    """Registered groups in registration order."""
+    _load_builtin_groups()
+    return list(_GROUPS.values())
+
+
+def feature_catalogue(
+    available: Iterable[str], context: FeatureContext
+) -> dict[str, tuple[FeatureGroup, tuple[str, ...]]]:
+    """
+    Every feature the registered groups can produce from ``available`` columns.
+
+    Outputs of one group can be inputs of another (e.g. lags of a weather
+    column), so groups are asked again until no new feature appears.
+
+    Returns:
+        Mapping of feature name to its group and input columns, in
+        registration order.
+    """
+    groups = feature_groups()
+    known = set(available)
+    for _ in range(len(groups) + 1):
+        catalogue: dict[str, tuple[FeatureGroup, tuple[str, ...]]] = {}
+        for group in groups:
+            for name, inputs in group.outputs(known, context).items():
+                catalogue.setdefault(name, (group, tuple(inputs)))
+        if catalogue.keys() <= known:
+            break
+        known.update(catalogue)
+    return catalogue
+
+
+def resolve_features(
+    feature_names: Iterable[str] | None,
+    available: Iterable[str],
+    context: FeatureContext,
+) -> list[tuple[FeatureGroup, list[str]]]:
+    """
+    The group computations needed for ``feature_names``.
+
+    Args:
+        feature_names: Required features; ``None`` for everything the groups
+            can produce. Names that are neither available nor producible are
+            ignored (callers fill them with NaN).
+        available: Columns the input data already has.
+        context: Feature settings.
+
+    Returns:
+        ``(group, columns to compute)`` steps in an order where every group
+        runs after the groups it takes inputs from.
+    """
+    available = list(available)
+    catalogue = feature_catalogue(available, context)
+    pending = list(catalogue) if feature_names is None else list(feature_names)
+    needed: set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name in needed or name not in catalogue:
+            continue
+        needed.add(name)
+        pending.extend(catalogue[name][1])
+
+    steps: dict[str, list[str]] = {}
+    depends: dict[str, set[str]] = {}
+    for name, (group, inputs) in catalogue.items():
+        if name in needed:
+            steps.setdefault(group.name, []).append(name)
+            depends.setdefault(group.name, set()).update(
+                catalogue[i][0].name for i in inputs if i in catalogue and catalogue[i][0] is not group
+            )
+
+    # Dependency order, ties broken by registration order
+    order = [group for group in feature_groups() if group.name in steps]
+    plan = []
+    done: set[str] = set()
+    while order:
+        ready = next((g for g in order if depends[g.name] <= done), None)
+        if ready is None:
+            raise ValueError(f"Cyclic feature group dependencies: {[g.name for g in order]}")
+        order.remove(ready)
+        plan.append((ready, steps[ready.name]))
+        done.add(ready.name)
+    return plan
+
+
+def compute_features(
+    df: pd.DataFrame,
+    context: FeatureContext,
+    feature_names: Iterable[str] | None = None,
+    groups: Collection[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Computes the features in ``feature_names`` and nothing else.
+
+    Args:
+        df: Input data with ``context.timestamp_col``.
+        context: Feature settings.
+        feature_names: Required features; ``None`` for all of them.
+        groups: Run only these groups. The inputs of the other groups are
+            still resolved, so e.g. ``BASE_GROUPS`` yields exactly the base
+            columns the required lag features are computed from.
+
+    Returns:
+        ``df`` with the computed features (and the intermediate features
+        they depend on) added.
+    """
+    for group, names in resolve_features(feature_names, df.columns, context):
+        if groups is None or group.name in groups:
+            df = group.compute(df, names, context)
+    return df
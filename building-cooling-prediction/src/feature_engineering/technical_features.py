@@ -1,22 +1,41 @@
 import pandas as pd
+from src.data_processing.calculate_cooling_load import discover_chillers, replace_columns
+from src.feature_engineering.registry import FeatureGroup
 
-def create_technical_features(df: pd.DataFrame) -> pd.DataFrame:
+def create_technical_features(df: pd.DataFrame, feature_names=None) -> pd.DataFrame:
     """
     Engineers domain-specific technical features.
 
     Args:
         df: DataFrame with building data.
+        feature_names: Features to create (default: all).
 
     Returns:
         DataFrame with new technical features.
     """
-    for i in range(1, 4):  # For chillers 1, 2, and 3
-        chiller_id = f"CHR-0{i}"
-        supply_temp_col = f"{chiller_id}-CHWSWT"
-        return_temp_col = f"{chiller_id}-CHWRWT"
-        delta_t_col = f"{chiller_id}-delta_t"
+    # Every chiller with both supply and return temperatures gets a delta-T
+    chillers = discover_chillers(df.columns, fields=('CHWSWT', 'CHWRWT'))
+    if feature_names is not None:
+        wanted = set(feature_names)
+        chillers = [c for c in chillers if f"{c}-delta_t" in wanted]
+    if not chillers:
+        return df
 
-        if supply_temp_col in df.columns and return_temp_col in df.columns:
-            df[delta_t_col] = df[return_temp_col] - df[supply_temp_col]
+    supply_temp = df[[f"{c}-CHWSWT" for c in chillers]].to_numpy(dtype=float)
+    return_temp = df[[f"{c}-CHWRWT" for c in chillers]].to_numpy(dtype=float)
+    delta_t = pd.DataFrame(return_temp - supply_temp, columns=[f"{c}-delta_t" for c in chillers])
+    return replace_columns(df, delta_t)
 
-    return df
+
+def _technical_outputs(available, context) -> dict:
+    return {
+        f"{c}-delta_t": (f"{c}-CHWRWT", f"{c}-CHWSWT")
+        for c in discover_chillers(available, fields=('CHWSWT', 'CHWRWT'))
+    }
+
+
+TECHNICAL_GROUP = FeatureGroup(
+    name='technical',
+    outputs=_technical_outputs,
+    compute=lambda df, names, context: create_technical_features(df, names),
+)
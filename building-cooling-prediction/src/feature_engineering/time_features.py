@@ -1,12 +1,22 @@
 import pandas as pd
+from src.data_processing.load_data import parse_timestamps
+from src.feature_engineering.calendar import CALENDAR_COLUMNS, calendar_features
+from src.feature_engineering.registry import FeatureGroup
 
-def create_time_features(df: pd.DataFrame, timestamp_col: str) -> pd.DataFrame:
+# Columns added by create_time_features
+TIME_FEATURES = tuple(CALENDAR_COLUMNS)
+
+def create_time_features(df: pd.DataFrame, timestamp_col: str, feature_names=None) -> pd.DataFrame:
     """
     Creates time-based features from a timestamp column.
 
+    Calendar fields and the Hong Kong holiday, bridge-day and working-day
+    flags are looked up in the precomputed calendar table.
+
     Args:
         df: DataFrame with a timestamp column.
         timestamp_col: The name of the timestamp column.
+        feature_names: Features of ``TIME_FEATURES`` to create (default: all).
 
     Returns:
         DataFrame with new time-based features.
@@ -20,12 +30,22 @@ def create_time_features(df: pd.DataFrame, timestamp_col: str) -> pd.DataFrame:
         else:
             raise KeyError(f"Timestamp column not found. Tried: {timestamp_col}, prediction_time, record_timestamp, timestamp, datetime")
 
-    df[timestamp_col] = pd.to_datetime(df[timestamp_col], dayfirst=True)
-    df['hour'] = df[timestamp_col].dt.hour
-    df['dayofweek'] = df[timestamp_col].dt.dayofweek
-    df['dayofyear'] = df[timestamp_col].dt.dayofyear
-    df['month'] = df[timestamp_col].dt.month
-    df['year'] = df[timestamp_col].dt.year
-    df['weekofyear'] = df[timestamp_col].dt.isocalendar().week.astype(int)
+    df[timestamp_col] = parse_timestamps(df[timestamp_col])
+    columns = None if feature_names is None else [c for c in TIME_FEATURES if c in set(feature_names)]
+    for name, values in calendar_features(df[timestamp_col], columns).items():
+        df[name] = values
 
     return df
+
+
+def _calendar_outputs(available, context) -> dict:
+    if context.timestamp_col not in available:
+        return {}
+    return {name: (context.timestamp_col,) for name in TIME_FEATURES}
+
+
+CALENDAR_GROUP = FeatureGroup(
+    name='calendar',
+    outputs=_calendar_outputs,
+    compute=lambda df, names, context: create_time_features(df, context.timestamp_col, names),
+)
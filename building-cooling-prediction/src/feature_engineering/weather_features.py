@@ -1,19 +1,92 @@
 import pandas as pd
+from src.data_processing.external_data import WeatherStore, merge_with_weather
+from src.feature_engineering.feature_matrix import INTERACTIONS
+from src.feature_engineering.registry import FeatureGroup
 
-def create_weather_features(df: pd.DataFrame) -> pd.DataFrame:
+def create_weather_features(df: pd.DataFrame, feature_names=None) -> pd.DataFrame:
     """
     Creates new features by interacting weather data with time features.
 
     Args:
         df: DataFrame with weather and time features.
+        feature_names: Features to create (default: all).
 
     Returns:
         DataFrame with new interaction features.
     """
-    if 'temperature_celsius' in df.columns and 'hour' in df.columns:
-        df['temp_x_hour'] = df['temperature_celsius'] * df['hour']
-
-    if 'humidity_percent' in df.columns and 'hour' in df.columns:
-        df['humidity_x_hour'] = df['humidity_percent'] * df['hour']
+    for name, left, right in INTERACTIONS:
+        if feature_names is not None and name not in feature_names:
+            continue
+        if left in df.columns and right in df.columns:
+            df[name] = df[left] * df[right]
 
     return df
+
+
+def weather_columns(weather: pd.DataFrame | WeatherStore | None) -> list[str]:
+    """Columns a weather frame or store adds to the data it is merged with."""
+
+    if weather is None:
+        return []
+    if isinstance(weather, WeatherStore):
+        return list(weather.columns)
+    return [c for c in weather.columns if c != 'date']
+
+
+def merge_weather(df: pd.DataFrame, context, feature_names=None) -> pd.DataFrame:
+    """
+    Merges the weather of ``context`` into ``df`` (see ``merge_with_weather``).
+
+    A :class:`WeatherStore` is sliced to the days covered by ``df`` (plus one
+    either side for interpolation) first.
+
+    Args:
+        df: Data with the timestamp column of ``context``.
+        context: A :class:`~src.feature_engineering.registry.FeatureContext`.
+        feature_names: Weather columns to merge (default: all).
+
+    Returns:
+        DataFrame with the weather columns appended.
+    """
+    weather = context.weather
+    if isinstance(weather, WeatherStore):
+        timestamps = df[context.timestamp_col]
+        weather = weather.slice(
+            timestamps.min().normalize() - pd.Timedelta(days=1),
+            timestamps.max().normalize() + pd.Timedelta(days=1),
+        )
+    if feature_names is not None:
+        columns = [c for c in weather_columns(weather) if c in set(feature_names)]
+        if 'Tmean' in columns and context.weather_resolution == 'hourly':
+            # The diurnal cycle of Tmean is derived from the daily range
+            columns += [c for c in ('Tmax', 'Tmin') if c in weather.columns and c not in columns]
+        merged = merge_with_weather(df, weather[['date', *columns]], context.timestamp_col, context.weather_resolution)
+        return merged.drop(columns=[c for c in columns if c not in set(feature_names)])
+    return merge_with_weather(df, weather, context.timestamp_col, resolution=context.weather_resolution)
+
+
+def _weather_outputs(available, context) -> dict:
+    if context.timestamp_col not in available:
+        return {}
+    return {name: (context.timestamp_col,) for name in weather_columns(context.weather)}
+
+
+def _interaction_outputs(available, context) -> dict:
+    return {
+        name: (left, right)
+        for name, left, right in INTERACTIONS
+        if left in available and right in available
+    }
+
+
+WEATHER_GROUP = FeatureGroup(
+    name='weather',
+    outputs=_weather_outputs,
+    compute=lambda df, names, context: merge_weather(df, context, names),
+)
+
+INTERACTION_GROUP = FeatureGroup(
+    name='weather_interactions',
+    outputs=_interaction_outputs,
+    compute=lambda df, names, context: create_weather_features(df, names),
+)
@@ -0,0 +1,281 @@
+"""Self-describing model artifacts with memory-mapped arrays.
+
+An artifact is a directory::
+
+    <name>/
+        manifest.json       format version, feature schema, training window,
+                            metrics, code version and the model layout
+        arrays/*.npy        uncompressed arrays of the compiled tree models
+        objects/*.joblib    models that cannot be compiled, pickled uncompressed
+
+Tree models are stored as :class:`~src.models.compiled_trees.CompiledTrees`
+node arrays, and ensembles as their members plus weights. Loading only reads
+the manifest; the arrays are memory-mapped read-only on the first
+prediction, so several scoring processes on one host share the same pages
+instead of each unpickling a private copy.
+
+:meth:`ModelArtifact.predict` checks its input against the recorded feature
+schema and raises ``ValueError`` on a mismatch instead of scoring misaligned
+columns.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+from datetime import datetime, timezone
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+import joblib
+import numpy as np
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+
+def _git_commit() -> str | None:
+    """Commit of the source tree, or ``None`` outside a git checkout."""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=Path(__file__).resolve().parent,
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def _to_json(value):
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class _Writer:
+    def __init__(self, directory: Path, compile_trees: bool):
+        self.directory = directory
+        self.compile_trees = compile_trees
+        self.count = 0
+
+    def _name(self) -> str:
+        self.count += 1
+        return f'model_{self.count - 1:03d}'
+
+    def write(self, model) -> dict:
+        from src.models.compiled_trees import CompiledTrees, compile_model
+        from src.models.ensemble import AverageEnsemble, WeightedEnsemble
+
+        if isinstance(model, AverageEnsemble):
+            return {'kind': 'average_ensemble', 'members': [self.write(m) for m in model.models]}
+        if isinstance(model, WeightedEnsemble):
+            return {
+                'kind': 'weighted_ensemble',
+                'members': [self.write(m) for m in model.models],
+                'weights': [float(w) for w in model.weights],
+                'intercept': float(model.intercept),
+                'max_threads': model.max_threads,
+            }
+        if self.compile_trees and not isinstance(model, CompiledTrees):
+            try:
+                model = compile_model(model)
+            except (TypeError, ValueError):
+                pass
+        name = self._name()
+        if isinstance(model, CompiledTrees):
+            files = {}
+            for field, values in model.arrays().items():
+                files[field] = f'arrays/{name}.{field}.npy'
+                np.save(self.directory / files[field], np.ascontiguousarray(values), allow_pickle=False)
+            return {'kind': 'compiled_trees', 'arrays': files, 'settings': model.settings}
+        # Uncompressed, so joblib can memory-map the NumPy arrays inside
+        file = f'objects/{name}.joblib'
+        joblib.dump(model, self.directory / file)
+        return {'kind': 'pickle', 'file': file, 'type': f'{type(model).__module__}.{type(model).__name__}'}
+
+
+def save_artifact(
+    path: str | Path,
+    model,
+    feature_columns: Sequence[str],
+    training_window: tuple[Any, Any] | None = None,
+    metrics: Mapping[str, Any] | None = None,
+    code_version: str | None = None,
+    extra: Mapping[str, Any] | None = None,
+    compile_trees: bool = True,
+) -> Path:
+    """Write ``model`` and its manifest as an artifact directory.
+
+    Parameters
+    ----------
+    path:
+        Artifact directory. It is written under a temporary name and renamed
+        into place, replacing an existing artifact.
+    model:
+        A fitted estimator, a compiled model or an ensemble of these.
+    feature_columns:
+        Input columns in the order the model expects them.
+    training_window:
+        First and last timestamp of the training data.
+    metrics:
+        Validation scores to record (e.g. ``{'nrmse': 0.09}``).
+    code_version:
+        Identifier of the code and configuration that produced the model
+        (e.g. the pipeline stage key). The git commit is recorded as well
+        when available.
+    extra:
+        Further manifest entries.
+    compile_trees:
+        Store tree models as compiled node arrays. Models that cannot be
+        compiled are pickled.
+
+    Returns
+    -------
+    Path
+        The artifact directory.
+    """
+    directory = Path(path)
+    tmp = directory.with_name(f'{directory.name}.tmp-{os.getpid()}')
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    (tmp / 'arrays').mkdir(parents=True)
+    (tmp / 'objects').mkdir()
+
+    layout = _Writer(tmp, compile_trees).write(model)
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'features': {'columns': [str(c) for c in feature_columns], 'n_features': len(feature_columns)},
+        'training_window': None if training_window is None else {
+            'start': _to_json(training_window[0]), 'end': _to_json(training_window[1]),
+        },
+        'metrics': _to_json(dict(metrics or {})),
+        'code_version': code_version,
+        'git_commit': _git_commit(),
+        'model': layout,
+    }
+    manifest.update(_to_json(dict(extra or {})))
+    (tmp / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+    if directory.exists():
+        shutil.rmtree(directory)
+    tmp.rename(directory)
+    return directory
+
+
+class ModelArtifact:
+    """A model artifact opened with :func:`load_artifact`.
+
+    Only the manifest is read on construction; :attr:`model` loads (or
+    memory-maps) the arrays on first access.
+    """
+
+    def __init__(self, path: str | Path, manifest: dict, mmap: bool = True):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.mmap = mmap
+
+    @property
+    def feature_columns(self) -> list[str]:
+        return self.manifest['features']['columns']
+
+    @property
+    def metrics(self) -> dict:
+        return self.manifest.get('metrics', {})
+
+    @property
+    def training_window(self) -> dict | None:
+        return self.manifest.get('training_window')
+
+    @cached_property
+    def model(self):
+        """The model, with its arrays memory-mapped when ``mmap`` is set."""
+        return self._read(self.manifest['model'])
+
+    def _read(self, layout: dict):
+        from src.models.compiled_trees import CompiledTrees
+        from src.models.ensemble import AverageEnsemble, WeightedEnsemble
+
+        mode = 'r' if self.mmap else None
+        kind = layout['kind']
+        if kind == 'compiled_trees':
+            arrays = {
+                field: np.load(self.path / file, mmap_mode=mode, allow_pickle=False)
+                for field, file in layout['arrays'].items()
+            }
+            return CompiledTrees(**arrays, **layout['settings'])
+        if kind == 'average_ensemble':
+            return AverageEnsemble([self._read(member) for member in layout['members']])
+        if kind == 'weighted_ensemble':
+            return WeightedEnsemble(
+                [self._read(member) for member in layout['members']], layout['weights'],
+                intercept=layout.get('intercept', 0.0), max_threads=layout.get('max_threads'),
+            )
+        if kind == 'pickle':
+            return joblib.load(self.path / layout['file'], mmap_mode=mode)
+        raise ValueError(f"Unknown model kind {kind!r} in {self.path / MANIFEST_FILE}")
+
+    def check_features(self, X):
+        """Return ``X`` as an array in the recorded column order, or raise ``ValueError``.
+
+        DataFrames are matched by column name (extra columns are ignored,
+        missing ones are an error). Arrays carry no names and must have
+        exactly the recorded number of columns.
+        """
+        expected = self.feature_columns
+        if hasattr(X, 'columns'):
+            missing = [c for c in expected if c not in X.columns]
+            if missing:
+                raise ValueError(
+                    f"Input lacks {len(missing)} feature(s) the model in {self.path} was trained on: {missing}"
+                )
+            return X[expected].to_numpy()
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != len(expected):
+            raise ValueError(
+                f"Model in {self.path} expects {len(expected)} features ({', '.join(expected)}), got shape {X.shape}"
+            )
+        return X
+
+    def predict(self, X) -> np.ndarray:
+        """Predict after checking ``X`` against the feature schema."""
+        return self.model.predict(self.check_features(X))
+
+
+def load_artifact(path: str | Path, mmap: bool = True) -> ModelArtifact:
+    """Open an artifact written by :func:`save_artifact`.
+
+    Parameters
+    ----------
+    path:
+        Artifact directory.
+    mmap:
+        Memory-map the arrays read-only instead of reading them into memory.
+
+    Returns
+    -------
+    ModelArtifact
+        The artifact; the model itself is loaded on first use.
+    """
+    path = Path(path)
+    try:
+        manifest = json.loads((path / MANIFEST_FILE).read_text())
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No model artifact at {path} (missing {MANIFEST_FILE})") from None
+    version = manifest.get('format_version')
+    if version != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Artifact {path} has format version {version}; this code reads version {ARTIFACT_FORMAT_VERSION}"
+        )
+    return ModelArtifact(path, manifest, mmap=mmap)
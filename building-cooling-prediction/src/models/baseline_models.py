@@ -1,7 +1,14 @@
 import numpy as np
+import pandas as pd
 from dataclasses import dataclass
+from sklearn.base import BaseEstimator, RegressorMixin
 from sklearn.linear_model import LinearRegression
 
+from src.data_processing.load_data import parse_timestamps
+
+# Number of slots of each calendar profile
+PROFILES = {'hour_of_day': 24, 'hour_of_week': 24 * 7, 'hour_month': 24 * 12}
+
 
 @dataclass
 class MeanBaseline:
@@ -61,3 +68,191 @@ class LinearRegressionBaseline:
         if X_arr.ndim == 1:
             X_arr = X_arr.reshape(-1, 1)
         return self.model.predict(X_arr)
+
+
+def hour_index(timestamps) -> np.ndarray:
+    """Whole hours since 1970-01-01 of ``timestamps`` as int64.
+
+    Datetime input is used as is; anything else is parsed with
+    :func:`~src.data_processing.load_data.parse_timestamps`.
+    """
+    values = parse_timestamps(pd.Series(np.asarray(timestamps)))
+    if values.isna().any():
+        raise ValueError(f"{int(values.isna().sum())} timestamp(s) could not be parsed")
+    return values.to_numpy(dtype='datetime64[ns]').astype('datetime64[h]').astype(np.int64)
+
+
+def hourly_matrix(timestamps, temperature=None) -> np.ndarray:
+    """``(n, 1)`` or ``(n, 2)`` float array of hour indices and temperatures.
+
+    The baselines accept it in place of a frame, e.g. to score them with
+    :func:`~src.evaluation.validation.cross_validate_time_series`.
+    """
+    columns = [hour_index(timestamps).astype(np.float64)]
+    if temperature is not None:
+        columns.append(np.asarray(temperature, dtype=np.float64))
+    return np.column_stack(columns)
+
+
+def calendar_slots(hours: np.ndarray, profile: str) -> np.ndarray:
+    """Profile slot (``0 .. PROFILES[profile] - 1``) of each hour index."""
+    hour_of_day = hours % 24
+    if profile == 'hour_of_day':
+        return hour_of_day
+    if profile == 'hour_of_week':
+        # 1970-01-01 was a Thursday; Monday is day 0
+        return ((hours // 24 + 3) % 7) * 24 + hour_of_day
+    if profile == 'hour_month':
+        month = (hours // 24).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64) % 12
+        return month * 24 + hour_of_day
+    raise ValueError(f"Unknown profile {profile!r}; expected one of {', '.join(PROFILES)}")
+
+
+def _calendar_inputs(X, timestamp_col: str, temperature_col: str):
+    """Hour indices and temperatures (or ``None``) of a frame, timestamps or :func:`hourly_matrix`."""
+    if hasattr(X, 'columns'):
+        temperature = X[temperature_col].to_numpy(dtype=np.float64) if temperature_col in X.columns else None
+        return hour_index(X[timestamp_col]), temperature
+    X = np.asarray(X)
+    if X.ndim == 2 and np.issubdtype(X.dtype, np.number):
+        return X[:, 0].astype(np.int64), (X[:, 1] if X.shape[1] > 1 else None)
+    return hour_index(X.ravel()), None
+
+
+def _group_means(keys: np.ndarray, values: np.ndarray, size: int, fallback, min_count: int) -> np.ndarray:
+    """Mean of ``values`` per key, ``fallback`` where a key has fewer than ``min_count`` values."""
+    counts = np.bincount(keys, minlength=size)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    return np.where(counts >= max(min_count, 1), means, fallback)
+
+
+class SeasonalNaiveBaseline(BaseEstimator, RegressorMixin):
+    """Repeats the last observed season: each hour gets the most recent
+    training value ``k * season_length`` hours before it.
+
+    ``X`` holds the timestamps: a frame with ``timestamp_col``, an array of
+    timestamps, or the output of :func:`hourly_matrix`. Slots never observed
+    get the training mean.
+    """
+
+    def __init__(self, season_length: int = 24 * 7, timestamp_col: str = 'record_timestamp'):
+        self.season_length = season_length
+        self.timestamp_col = timestamp_col
+
+    def fit(self, X, y):
+        hours, _ = _calendar_inputs(X, self.timestamp_col, '')
+        y = np.asarray(y, dtype=np.float64).ravel()
+        valid = ~np.isnan(y)
+        if not np.any(valid):
+            raise ValueError("No valid samples after dropping NaNs in y.")
+        hours, y = hours[valid], y[valid]
+        self.mean_ = float(y.mean())
+        # Latest observation of every slot: first occurrence in reverse time order
+        order = np.argsort(hours, kind='stable')[::-1]
+        slots, first = np.unique(hours[order] % self.season_length, return_index=True)
+        self.table_ = np.full(self.season_length, self.mean_)
+        self.table_[slots] = y[order][first]
+        return self
+
+    def predict(self, X):
+        hours, _ = _calendar_inputs(X, self.timestamp_col, '')
+        return self.table_[hours % self.season_length]
+
+
+class ProfileBaseline(BaseEstimator, RegressorMixin):
+    """Mean target per calendar slot, optionally per temperature bin as well.
+
+    Fitting is a pair of ``np.bincount`` reductions over integer slot keys
+    and predicting an array lookup, so years of hourly data take
+    milliseconds. Without temperatures (missing column or NaN values) the
+    prediction falls back to the plain calendar profile, which makes the
+    model usable when weather data is unavailable.
+
+    Parameters
+    ----------
+    profile:
+        ``'hour_of_day'``, ``'hour_of_week'`` or ``'hour_month'`` (hour of
+        day by month).
+    temperature_bins:
+        Number of equal-frequency temperature bins, or the bin edges;
+        ``None`` for a calendar profile only.
+    min_count:
+        Training values a slot (or slot and bin) needs; sparser ones fall
+        back to the calendar profile, then to the overall mean.
+    timestamp_col, temperature_col:
+        Columns read when ``X`` is a frame.
+    """
+
+    def __init__(
+        self,
+        profile: str = 'hour_of_week',
+        temperature_bins=None,
+        min_count: int = 1,
+        timestamp_col: str = 'record_timestamp',
+        temperature_col: str = 'temperature_celsius',
+    ):
+        self.profile = profile
+        self.temperature_bins = temperature_bins
+        self.min_count = min_count
+        self.timestamp_col = timestamp_col
+        self.temperature_col = temperature_col
+
+    def _bins(self, temperature: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.bin_edges_, temperature, side='right')
+
+    def fit(self, X, y):
+        hours, temperature = _calendar_inputs(X, self.timestamp_col, self.temperature_col)
+        y = np.asarray(y, dtype=np.float64).ravel()
+        valid = ~np.isnan(y)
+        if not np.any(valid):
+            raise ValueError("No valid samples after dropping NaNs in y.")
+        n_slots = PROFILES.get(self.profile, 0)
+        slots = calendar_slots(hours, self.profile)
+        self.mean_ = float(y[valid].mean())
+        self.profile_ = _group_means(slots[valid], y[valid], n_slots, self.mean_, self.min_count)
+
+        self.bin_edges_ = None
+        self.table_ = None
+        if self.temperature_bins is None:
+            return self
+        if temperature is None:
+            raise ValueError(f"Temperature bins need a {self.temperature_col!r} column (or hourly_matrix temperatures)")
+        known = valid & ~np.isnan(temperature)
+        if np.isscalar(self.temperature_bins):
+            quantiles = np.linspace(0, 1, int(self.temperature_bins) + 1)[1:-1]
+            edges = np.quantile(temperature[known], quantiles) if np.any(known) else []
+        else:
+            edges = self.temperature_bins
+        self.bin_edges_ = np.unique(np.asarray(edges, dtype=np.float64))
+        n_bins = len(self.bin_edges_) + 1
+        keys = slots[known] * n_bins + self._bins(temperature[known])
+        fallback = np.repeat(self.profile_, n_bins)
+        self.table_ = _group_means(keys, y[known], n_slots * n_bins, fallback, self.min_count).reshape(n_slots, n_bins)
+        return self
+
+    def predict(self, X):
+        hours, temperature = _calendar_inputs(X, self.timestamp_col, self.temperature_col)
+        slots = calendar_slots(hours, self.profile)
+        prediction = self.profile_[slots]
+        if self.table_ is not None and temperature is not None:
+            known = ~np.isnan(temperature)
+            prediction[known] = self.table_[slots[known], self._bins(temperature[known])]
+        return prediction
+
+
+BASELINES = {
+    'seasonal_naive': lambda: SeasonalNaiveBaseline(24 * 7),
+    'hour_of_week': lambda: ProfileBaseline('hour_of_week'),
+    'hour_month': lambda: ProfileBaseline('hour_month'),
+    'hour_month_temperature': lambda: ProfileBaseline('hour_month', temperature_bins=10),
+}
+
+
+def make_baseline(name: str):
+    """Unfitted baseline by name (see ``BASELINES``)."""
+    try:
+        return BASELINES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown baseline {name!r}; expected one of {', '.join(BASELINES)}") from None
@@ -0,0 +1,397 @@
+"""Flat-array inference engine for fitted tree ensembles.
+
+:func:`compile_model` turns a fitted forest or boosted ensemble (scikit-learn
+trees, forests and gradient boosting, XGBoost or LightGBM) into a
+:class:`CompiledTrees`. All trees are stored as one structure of arrays, with
+one entry per node: split feature, threshold, left and right child, the side
+missing values go to, and the node value. Prediction descends every
+(tree, row) pair one level per step with vectorised gathers, and it only
+needs NumPy.
+
+The arithmetic follows the original library so predictions are identical.
+Inputs are cast to the dtype the library compares in. Splits are rewritten
+as ``x <= threshold``. Leaf values are pre-scaled the way the library scales
+them, and tree outputs are added one tree at a time, in tree order, onto the
+same base score.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+
+# (tree, row) pairs descended at once; bounds the memory of large batches
+_CHUNK_PAIRS = 1 << 20
+
+
+@dataclass
+class CompiledTrees:
+    """A tree ensemble as flat node arrays.
+
+    Leaves point to themselves and are marked in ``is_leaf``.
+
+    Parameters
+    ----------
+    feature, threshold, missing_left, value, is_leaf:
+        Per-node arrays of all trees.
+    children:
+        ``(n_nodes, 2)`` global indices of the left and right child.
+    roots:
+        Index of the root node of every tree, in summation order.
+    n_features:
+        Number of input columns.
+    base_score:
+        Value the tree outputs are added onto.
+    divisor:
+        The sum is divided by this at the end (the tree count for averaging
+        forests).
+    input_dtype, sum_dtype:
+        Dtype inputs are compared in and dtype tree outputs are summed in.
+    """
+
+    feature: np.ndarray
+    threshold: np.ndarray
+    children: np.ndarray
+    missing_left: np.ndarray
+    value: np.ndarray
+    is_leaf: np.ndarray
+    roots: np.ndarray
+    n_features: int
+    base_score: float = 0.0
+    divisor: float = 1.0
+    input_dtype: str = 'float32'
+    sum_dtype: str = 'float64'
+
+    def __post_init__(self):
+        # Left and right child of node i at 2i and 2i + 1: one gather per level.
+        # A view, so memory-mapped children stay shared between processes.
+        self._children = self.children.reshape(-1)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.children[:, 0]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.children[:, 1]
+
+    @property
+    def settings(self) -> dict:
+        """The non-array fields, as JSON-serialisable values."""
+        return {
+            'n_features': self.n_features, 'base_score': self.base_score, 'divisor': self.divisor,
+            'input_dtype': self.input_dtype, 'sum_dtype': self.sum_dtype,
+        }
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        """The node arrays by field name."""
+        return {name: getattr(self, name) for name in ARRAY_FIELDS}
+
+    def predict(self, X) -> np.ndarray:
+        """Predict rows of ``X`` (``(n_samples, n_features)``)."""
+
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n, {self.n_features}), got {X.shape}")
+        step = max(1, _CHUNK_PAIRS // max(self.n_trees, 1))
+        out = np.empty(len(X), dtype=self.sum_dtype)
+        for lo in range(0, len(X), step):
+            out[lo:lo + step] = self._predict_chunk(X[lo:lo + step])
+        return out
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf reached by every (tree, row) pair, ``(n_trees, n_rows)``."""
+
+        n = len(X)
+        flat = X.ravel()
+        has_nan = np.isnan(flat).any()
+        node = np.repeat(self.roots, n)
+        # Pairs still at an internal node, their current node and row offset
+        pos = np.flatnonzero(~self.is_leaf[node])
+        cur = node[pos]
+        offset = (pos % n) * self.n_features
+        while pos.size:
+            x = flat[offset + self.feature[cur]]
+            go_right = ~(x <= self.threshold[cur])
+            if has_nan:
+                go_right &= ~(np.isnan(x) & self.missing_left[cur])
+            cur = self._children[2 * cur + go_right]
+            leaf = self.is_leaf[cur]
+            if leaf.any():
+                node[pos[leaf]] = cur[leaf]
+                descend = ~leaf
+                pos, cur, offset = pos[descend], cur[descend], offset[descend]
+        return node.reshape(self.n_trees, n)
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        values = self.value[self._leaves(X)]
+        out = np.full(len(X), self.base_score, dtype=self.sum_dtype)
+        # One tree at a time, in order: the libraries' summation order
+        for tree_values in values:
+            out += tree_values
+        if self.divisor != 1:
+            out /= self.divisor
+        return out
+
+    def save(self, path: str | Path) -> None:
+        """Write the arrays and settings to one uncompressed ``.npz`` file."""
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(self.settings)), **self.arrays())
+
+    @classmethod
+    def load(cls, path: str | Path) -> 'CompiledTrees':
+        """Read a model written by :meth:`save`."""
+
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(**{name: data[name] for name in ARRAY_FIELDS}, **meta)
+
+
+ARRAY_FIELDS = ('feature', 'threshold', 'children', 'missing_left', 'value', 'is_leaf', 'roots')
+
+
+def _concat(trees: list[dict], **settings) -> CompiledTrees:
+    """Stack per-tree node arrays (local child indices) into one model."""
+
+    sizes = np.array([len(tree['value']) for tree in trees], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    arrays = {}
+    for name in ('feature', 'threshold', 'missing_left', 'value', 'is_leaf'):
+        arrays[name] = np.concatenate([tree[name] for tree in trees])
+    for name in ('left', 'right'):
+        # Leaves point to themselves
+        arrays[name] = np.concatenate([
+            np.where(tree['is_leaf'], np.arange(len(tree['value'])), tree[name]) + start
+            for tree, start in zip(trees, starts)
+        ])
+    n_nodes = int(sizes.sum())
+    index = np.int32 if n_nodes < np.iinfo(np.int32).max else np.int64
+    return CompiledTrees(
+        feature=np.where(arrays['is_leaf'], 0, arrays['feature']).astype(np.int32),
+        threshold=arrays['threshold'].astype(np.float64),
+        children=np.column_stack([arrays['left'], arrays['right']]).astype(index),
+        missing_left=arrays['missing_left'].astype(bool),
+        value=arrays['value'].astype(settings.get('sum_dtype', 'float64')),
+        is_leaf=arrays['is_leaf'].astype(bool),
+        roots=starts.astype(index),
+        **settings,
+    )
+
+
+def _sklearn_tree(tree, scale: float | None = None) -> dict:
+    if tree.n_outputs != 1:
+        raise ValueError("Only single-output trees can be compiled")
+    value = tree.value[:, 0, 0]
+    if scale is not None:
+        # predict_stages adds ``scale * value`` in double precision
+        value = scale * value
+    missing = getattr(tree, 'missing_go_to_left', None)
+    return {
+        'feature': tree.feature,
+        'threshold': tree.threshold,
+        'left': tree.children_left,
+        'right': tree.children_right,
+        'missing_left': np.zeros(tree.node_count, dtype=bool) if missing is None else missing.astype(bool),
+        'value': value,
+        'is_leaf': tree.children_left == -1,
+    }
+
+
+def _compile_sklearn(model) -> CompiledTrees:
+    from sklearn.ensemble import (
+        ExtraTreesRegressor,
+        GradientBoostingRegressor,
+        HistGradientBoostingRegressor,
+        RandomForestRegressor,
+    )
+    from sklearn.tree import BaseDecisionTree
+
+    if isinstance(model, BaseDecisionTree):
+        return _concat([_sklearn_tree(model.tree_)], n_features=model.n_features_in_)
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+        # Tree outputs are summed into zeros, then divided by the tree count
+        return _concat(
+            [_sklearn_tree(est.tree_) for est in model.estimators_],
+            n_features=model.n_features_in_, divisor=float(len(model.estimators_)),
+        )
+    if isinstance(model, GradientBoostingRegressor):
+        if model.init_ == 'zero':
+            base = 0.0
+        elif type(model.init_).__name__ == 'DummyRegressor':
+            base = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+        else:
+            raise ValueError("Only constant (default) init estimators can be compiled")
+        return _concat(
+            [_sklearn_tree(stage[0].tree_, model.learning_rate) for stage in model.estimators_],
+            n_features=model.n_features_in_, base_score=base,
+        )
+    if isinstance(model, HistGradientBoostingRegressor):
+        if type(model._loss.link).__name__ != 'IdentityLink':
+            raise ValueError(f"Only identity-link losses can be compiled, not {model.loss!r}")
+        trees = []
+        for (predictor,) in model._predictors:
+            nodes = predictor.nodes
+            if nodes['is_categorical'].any():
+                raise ValueError("Categorical splits cannot be compiled")
+            trees.append({
+                'feature': nodes['feature_idx'],
+                'threshold': nodes['num_threshold'],
+                'left': nodes['left'],
+                'right': nodes['right'],
+                'missing_left': nodes['missing_go_to_left'],
+                'value': nodes['value'],
+                'is_leaf': nodes['is_leaf'].astype(bool),
+            })
+        return _concat(
+            trees, n_features=model.n_features_in_,
+            base_score=float(np.ravel(model._baseline_prediction)[0]), input_dtype='float64',
+        )
+    raise TypeError(f"Cannot compile {type(model).__name__}")
+
+
+def _compile_xgboost(model) -> CompiledTrees:
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    config = json.loads(booster.save_config())
+    dump = json.loads(booster.save_raw(raw_format='json'))
+    learner = dump['learner']
+    if learner['gradient_booster']['name'] != 'gbtree':
+        raise ValueError("Only gbtree boosters can be compiled")
+    objective = config['learner']['objective']['name']
+    if objective not in ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror'):
+        raise ValueError(f"Only identity-link objectives can be compiled, not {objective!r}")
+
+    trees = learner['gradient_booster']['model']['trees']
+    best = getattr(model, 'best_iteration', None)
+    if best is not None:
+        trees = trees[:best + 1]
+    compiled = []
+    for tree in trees:
+        if any(tree.get('split_type', [])):
+            raise ValueError("Categorical splits cannot be compiled")
+        left = np.asarray(tree['left_children'])
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        is_leaf = left == -1
+        # XGBoost goes left on ``x < t``; for float32 inputs that is ``x <= nextafter(t, -inf)``
+        threshold = np.nextafter(conditions, np.float32(-np.inf))
+        compiled.append({
+            'feature': np.asarray(tree['split_indices']),
+            'threshold': threshold,
+            'left': left,
+            'right': np.asarray(tree['right_children']),
+            'missing_left': np.asarray(tree['default_left'], dtype=bool),
+            # Leaves keep their value in ``split_conditions``
+            'value': np.where(is_leaf, conditions, 0),
+            'is_leaf': is_leaf,
+        })
+    base = str(learner['learner_model_param']['base_score']).strip('[]')
+    return _concat(
+        compiled, n_features=int(learner['learner_model_param']['num_feature']),
+        base_score=float(np.float32(base)), sum_dtype='float32',
+    )
+
+
+def _compile_lightgbm(model) -> CompiledTrees:
+    booster = getattr(model, 'booster_', model)
+    dump = booster.dump_model()
+    objective = str(dump.get('objective', '')).split()[0]
+    if objective not in ('regression', 'regression_l1', 'huber', 'fair', 'quantile'):
+        raise ValueError(f"Only identity-link objectives can be compiled, not {objective!r}")
+
+    compiled = []
+    for info in dump['tree_info']:
+        nodes: list[dict] = []
+
+        def visit(node) -> int:
+            index = len(nodes)
+            nodes.append(node)
+            if 'leaf_index' not in node and 'split_index' in node:
+                node['_left'] = visit(node['left_child'])
+                node['_right'] = visit(node['right_child'])
+            return index
+
+        visit(info['tree_structure'])
+        is_leaf = np.array(['split_index' not in node for node in nodes])
+        threshold = np.zeros(len(nodes))
+        missing_left = np.zeros(len(nodes), dtype=bool)
+        for i, node in enumerate(nodes):
+            if is_leaf[i]:
+                if 'leaf_coeff' in node:
+                    raise ValueError("Linear trees cannot be compiled")
+                continue
+            if node['decision_type'] != '<=':
+                raise ValueError("Categorical splits cannot be compiled")
+            threshold[i] = node['threshold']
+            if node['missing_type'] == 'NaN':
+                missing_left[i] = node['default_left']
+            elif node['missing_type'] == 'None':
+                # NaN is read as 0.0
+                missing_left[i] = 0.0 <= threshold[i]
+            else:
+                raise ValueError("Zero-as-missing splits cannot be compiled")
+        compiled.append({
+            'feature': np.array([node.get('split_feature', 0) for node in nodes]),
+            'threshold': threshold,
+            'left': np.array([node.get('_left', -1) for node in nodes]),
+            'right': np.array([node.get('_right', -1) for node in nodes]),
+            'missing_left': missing_left,
+            'value': np.array([node.get('leaf_value', 0.0) for node in nodes]),
+            'is_leaf': is_leaf,
+        })
+    average = 'average_output' in dump and dump['average_output']
+    return _concat(
+        compiled, n_features=int(dump['max_feature_idx']) + 1,
+        divisor=float(len(compiled)) if average else 1.0, input_dtype='float64',
+    )
+
+
+def compile_model(model):
+    """Compile a fitted tree model for NumPy-only inference.
+
+    Parameters
+    ----------
+    model:
+        A fitted scikit-learn decision tree, random forest, extra trees,
+        gradient boosting or histogram gradient boosting regressor, an
+        XGBoost or LightGBM regressor (or booster), or an ensemble from
+        :mod:`src.models.ensemble` of these, whose members are compiled.
+
+    Returns
+    -------
+    CompiledTrees
+        Or an ensemble of compiled members, predicting exactly like ``model``.
+    """
+    from src.models.ensemble import AverageEnsemble, WeightedEnsemble
+
+    if isinstance(model, CompiledTrees):
+        return model
+    if isinstance(model, (AverageEnsemble, WeightedEnsemble)):
+        return replace(model, models=[compile_model(member) for member in model.models])
+    module = type(model).__module__.split('.')[0]
+    if module == 'sklearn':
+        return _compile_sklearn(model)
+    if module == 'xgboost':
+        return _compile_xgboost(model)
+    if module == 'lightgbm':
+        return _compile_lightgbm(model)
+    raise TypeError(f"Cannot compile {type(model).__name__}")
+
+
+def save_compiled(model: CompiledTrees, path: str | Path) -> None:
+    """Serialise a compiled model (see :meth:`CompiledTrees.save`)."""
+
+    model.save(path)
+
+
+def load_compiled(path: str | Path) -> CompiledTrees:
+    """Load a compiled model; needs only NumPy."""
+
+    return CompiledTrees.load(path)
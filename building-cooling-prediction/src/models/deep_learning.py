@@ -1,18 +1,169 @@
 import json
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 
-try:
-    from tensorflow.keras.models import Sequential
-    from tensorflow.keras.layers import LSTM, Dense
-    from tensorflow.keras.callbacks import EarlyStopping
-except ImportError:  # pragma: no cover - optional dependency
-    Sequential = None
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 CONFIG_DIR = Path(__file__).resolve().parent.parent.parent / 'models' / 'model_configs'
 MODEL_DIR = Path(__file__).resolve().parent.parent.parent / 'models' / 'trained_models'
 
 
+def _import_keras():
+    # Imported on first use: TensorFlow takes seconds to import
+    try:
+        from tensorflow import keras
+    except ImportError:  # pragma: no cover - optional dependency
+        raise ImportError('TensorFlow is not installed') from None
+    return keras
+
+
+def configure_cpu_threads(intra_op: Optional[int] = None, inter_op: Optional[int] = None) -> None:
+    """Set TensorFlow's CPU thread pools; must run before TensorFlow executes anything.
+
+    ``intra_op`` threads split a single op (the LSTM matmuls), ``inter_op``
+    threads run independent ops concurrently. ``None`` keeps TensorFlow's
+    default (all cores).
+    """
+    import tensorflow as tf
+
+    try:
+        if intra_op is not None:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op is not None:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError:  # TensorFlow already initialised its thread pools
+        pass
+
+
+class SlidingWindows:
+    """Lazy ``(lookback, n_features)`` windows over a 2-D feature matrix.
+
+    The windows are a strided view (``sliding_window_view``) of one
+    contiguous float32 copy of ``features``, so memory stays at the size of
+    the 2-D matrix for any lookback. Only the windows of the current batch
+    are gathered into a new array.
+
+    Parameters
+    ----------
+    features:
+        ``(n_rows, n_features)`` matrix in time order.
+    target:
+        ``(n_rows,)`` target aligned with ``features``.
+    lookback:
+        Rows per window.
+    horizon:
+        The window ending at row ``t`` is labelled with ``target[t + horizon]``
+        (``0``: the target of its last row, like the tree models).
+    batch_size:
+        Windows per batch.
+    shuffle:
+        Visit the windows in a new random order on every pass.
+    seed:
+        Seed of the shuffling.
+    indices:
+        Start rows of the windows to use; defaults to every window whose
+        rows and label are free of NaN.
+    """
+
+    def __init__(
+        self,
+        features,
+        target,
+        lookback: int,
+        horizon: int = 0,
+        batch_size: int = 32,
+        shuffle: bool = False,
+        seed: Optional[int] = None,
+        indices: Optional[np.ndarray] = None,
+    ):
+        self.features = np.ascontiguousarray(features, dtype=np.float32)
+        self.target = np.ascontiguousarray(target, dtype=np.float32)
+        if self.features.ndim != 2 or len(self.features) != len(self.target):
+            raise ValueError("Expected a 2-D feature matrix and a target of the same length")
+        if lookback < 1 or horizon < 0:
+            raise ValueError(f"Need lookback >= 1 and horizon >= 0, got {lookback} and {horizon}")
+        self.lookback = lookback
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        # (n_windows, lookback, n_features) view; no data is copied
+        n_windows = max(len(self.features) - lookback - horizon + 1, 0)
+        self.windows = sliding_window_view(self.features, lookback, axis=0)[:n_windows].transpose(0, 2, 1)
+        self.indices = self._complete_windows() if indices is None else np.asarray(indices, dtype=np.int64)
+
+    def _complete_windows(self) -> np.ndarray:
+        # Windows without NaN rows, from a running count of incomplete rows
+        incomplete = np.concatenate([[0], np.cumsum(np.isnan(self.features).any(axis=1))])
+        starts = np.arange(len(self.windows))
+        clean = incomplete[starts + self.lookback] == incomplete[starts]
+        labelled = ~np.isnan(self.target[starts + self.lookback - 1 + self.horizon])
+        return starts[clean & labelled]
+
+    @property
+    def input_shape(self) -> tuple[int, int]:
+        return self.lookback, self.features.shape[1]
+
+    def __len__(self) -> int:
+        """Number of batches per pass."""
+        return -(-len(self.indices) // self.batch_size)
+
+    def batch(self, starts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Windows and labels starting at rows ``starts``."""
+        return self.windows[starts], self.target[starts + self.lookback - 1 + self.horizon]
+
+    def __iter__(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        order = self._rng.permutation(self.indices) if self.shuffle else self.indices
+        for i in range(0, len(order), self.batch_size):
+            yield self.batch(order[i:i + self.batch_size])
+
+    def split(self, validation_fraction: float) -> tuple['SlidingWindows', 'SlidingWindows']:
+        """Chronological train/validation split sharing the same matrix.
+
+        Validation windows are the last ``validation_fraction`` of the
+        windows; train windows are kept only if their label row comes before
+        the first validation row.
+        """
+        n_valid = int(round(len(self.indices) * validation_fraction))
+        if n_valid == 0:
+            return self, self._subset(self.indices[:0], shuffle=False)
+        first_valid = self.indices[-n_valid]
+        earlier = self.indices[:-n_valid]
+        train = earlier[earlier + self.lookback - 1 + self.horizon < first_valid]
+        return self._subset(train, self.shuffle), self._subset(self.indices[-n_valid:], shuffle=False)
+
+    def _subset(self, indices: np.ndarray, shuffle: bool) -> 'SlidingWindows':
+        subset = object.__new__(SlidingWindows)
+        subset.__dict__.update(self.__dict__)
+        subset.indices, subset.shuffle = indices, shuffle
+        return subset
+
+
+def windows_dataset(windows: SlidingWindows, threads: Optional[int] = None, prefetch: int = 2):
+    """Stream ``windows`` to Keras as a ``tf.data.Dataset``.
+
+    Batches are produced by a Python generator (one new shuffled pass per
+    epoch) and prefetched while the model trains on the previous one.
+    ``threads`` caps the dataset's private thread pool.
+    """
+    import tensorflow as tf
+
+    lookback, n_features = windows.input_shape
+    dataset = tf.data.Dataset.from_generator(
+        lambda: iter(windows),
+        output_signature=(
+            tf.TensorSpec(shape=(None, lookback, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        ),
+    )
+    options = tf.data.Options()
+    if threads is not None:
+        options.threading.private_threadpool_size = threads
+        options.threading.max_intra_op_parallelism = 1
+    return dataset.with_options(options).prefetch(prefetch)
+
+
 def save_config(config: Dict[str, Any]):
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     path = CONFIG_DIR / 'lstm_config.json'
@@ -21,11 +172,10 @@ def save_config(config: Dict[str, Any]):
 
 
 def build_lstm_model(input_shape, units: int = 50, output_dim: int = 1):
-    if Sequential is None:
-        raise ImportError('TensorFlow is not installed')
-    model = Sequential([
-        LSTM(units, input_shape=input_shape),
-        Dense(output_dim)
+    keras = _import_keras()
+    model = keras.models.Sequential([
+        keras.layers.LSTM(units, input_shape=input_shape),
+        keras.layers.Dense(output_dim)
     ])
     model.compile(optimizer='adam', loss='mse')
     return model
@@ -36,7 +186,7 @@ def train_lstm(X_train, y_train, config: Optional[Dict[str, Any]] = None):
         config = {"units": 50, "epochs": 10, "batch_size": 32}
     save_config(config)
     model = build_lstm_model(input_shape=X_train.shape[1:], units=config["units"])
-    callbacks = [EarlyStopping(patience=3, restore_best_weights=True)]
+    callbacks = [_import_keras().callbacks.EarlyStopping(patience=3, restore_best_weights=True)]
     model.fit(
         X_train,
         y_train,
@@ -48,3 +198,53 @@ def train_lstm(X_train, y_train, config: Optional[Dict[str, Any]] = None):
     MODEL_DIR.mkdir(parents=True, exist_ok=True)
     model.save(MODEL_DIR / 'lstm_model.h5')
     return model
+
+
+def train_lstm_windows(
+    features,
+    target,
+    config: Optional[Dict[str, Any]] = None,
+    validation_fraction: float = 0.1,
+    threads: Optional[int] = None,
+    seed: Optional[int] = 42,
+):
+    """Train the LSTM on lazily built windows of a 2-D feature matrix.
+
+    Parameters
+    ----------
+    features, target:
+        Hourly feature matrix ``(n_rows, n_features)`` and target, in time order.
+    config:
+        ``units``, ``epochs``, ``batch_size`` and ``lookback`` (rows per window).
+    validation_fraction:
+        Last share of the windows used for early stopping.
+    threads:
+        CPU threads for TensorFlow's op pools and the input pipeline.
+    seed:
+        Seed of the per-epoch shuffling.
+    """
+    config = {"units": 50, "epochs": 10, "batch_size": 32, "lookback": 24, **(config or {})}
+    save_config(config)
+    if threads is not None:
+        configure_cpu_threads(intra_op=threads, inter_op=threads)
+    windows = SlidingWindows(
+        features, target, config["lookback"], batch_size=config["batch_size"], shuffle=True, seed=seed
+    )
+    train, valid = windows.split(validation_fraction)
+    model = build_lstm_model(input_shape=windows.input_shape, units=config["units"])
+    keras = _import_keras()
+    fit_args = {}
+    monitor = 'loss'
+    if len(valid.indices):
+        fit_args['validation_data'] = windows_dataset(valid, threads)
+        monitor = 'val_loss'
+    model.fit(
+        windows_dataset(train, threads),
+        epochs=config["epochs"],
+        callbacks=[keras.callbacks.EarlyStopping(monitor=monitor, patience=3, restore_best_weights=True)],
+        verbose=0,
+        **fit_args,
+    )
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    model.save(MODEL_DIR / 'lstm_model.h5')
+    return model
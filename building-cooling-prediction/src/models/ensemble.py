@@ -1,7 +1,15 @@
-"""Simple ensemble models used for combining predictions."""
+"""Ensemble models used for combining predictions.
+
+Members predict concurrently in threads (scikit-learn forests, XGBoost,
+LightGBM and TensorFlow release the GIL while predicting), so latency is that
+of the slowest member rather than the sum. Their weighted outputs are added
+into one buffer in member order, which keeps the floating-point sum, and so
+the predictions, the same from run to run.
+"""
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Sequence
@@ -10,6 +18,30 @@ import joblib
 import numpy as np
 
 
+def _weighted_sum(models: Sequence, weights: Sequence[float], X, max_threads: int | None = None) -> np.ndarray:
+    """``sum(w * model.predict(X))`` over the members, predicted concurrently.
+
+    The sum is accumulated in member order into the first member's weighted
+    output, whose shape (e.g. ``(n_samples, n_outputs)``) the result keeps.
+    """
+
+    active = [(model, float(w)) for model, w in zip(models, weights) if w != 0]
+    if not active:
+        return np.zeros(len(X), dtype=np.float64)
+
+    def run(model, w):
+        return np.multiply(np.asarray(model.predict(X), dtype=np.float64), w)
+
+    if len(active) == 1:
+        return run(*active[0])
+    with ThreadPoolExecutor(max_workers=max_threads or len(active)) as pool:
+        futures = [pool.submit(run, model, w) for model, w in active]
+        out = futures[0].result()
+        for future in futures[1:]:
+            out += future.result()
+    return out
+
+
 @dataclass
 class AverageEnsemble:
     """Average the predictions from several fitted models."""
@@ -17,18 +49,160 @@ class AverageEnsemble:
     models: Sequence
 
     def predict(self, X):
-        preds = [model.predict(X) for model in self.models]
-        return np.mean(preds, axis=0)
+        n = len(self.models)
+        return _weighted_sum(self.models, [1.0 / n] * n, X)
+
+
+@dataclass
+class WeightedEnsemble:
+    """Weighted sum of fitted models' predictions, computed concurrently.
+
+    Parameters
+    ----------
+    models:
+        Fitted estimators implementing ``predict``.
+    weights:
+        One weight per model (e.g. from :func:`fit_nnls_weights`).
+    intercept:
+        Constant added to the weighted sum.
+    max_threads:
+        Members predicting at once (default: all of them).
+    """
+
+    models: Sequence
+    weights: Sequence[float]
+    intercept: float = 0.0
+    max_threads: int | None = None
+
+    def __post_init__(self):
+        if len(self.models) != len(self.weights):
+            raise ValueError(f"Got {len(self.weights)} weights for {len(self.models)} models")
+
+    def predict(self, X):
+        out = _weighted_sum(self.models, self.weights, X, self.max_threads)
+        if self.intercept:
+            out += self.intercept
+        return out
+
+
+def fit_nnls_weights(predictions, y, normalise: bool = True) -> np.ndarray:
+    """Non-negative least-squares weights of member predictions.
+
+    Parameters
+    ----------
+    predictions:
+        ``(n_samples, n_models)`` out-of-fold predictions of the members.
+    y:
+        Target for the same samples.
+    normalise:
+        Scale the weights to sum to one (a convex combination).
+
+    Returns
+    -------
+    np.ndarray
+        One non-negative weight per member; weak or redundant members get 0.
+    """
+    from scipy.optimize import nnls
+
+    P = np.asarray(predictions, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = ~(np.isnan(P).any(axis=1) | np.isnan(y))
+    weights, _ = nnls(P[keep], y[keep])
+    if normalise and weights.sum() > 0:
+        weights = weights / weights.sum()
+    return weights
+
+
+def stacking_weights(predictions, y, min_weight: float = 0.01) -> np.ndarray:
+    """NNLS weights of the members, with members below ``min_weight`` dropped.
+
+    Dropped members get weight 0 and the weights of the rest are refitted.
+    """
+    P = np.asarray(predictions, dtype=np.float64)
+    members = list(range(P.shape[1]))
+    weights = fit_nnls_weights(P, y)
+    while len(members) > 1 and weights.min() < min_weight:
+        members = [m for m, w in zip(members, weights) if w >= min_weight] or [members[int(np.argmax(weights))]]
+        weights = fit_nnls_weights(P[:, members], y)
+    full = np.zeros(P.shape[1])
+    full[members] = weights
+    return full
+
+
+def stacked_ensemble(
+    models: Sequence,
+    predictions,
+    y,
+    min_weight: float = 0.01,
+    max_threads: int | None = None,
+) -> WeightedEnsemble:
+    """Build a :class:`WeightedEnsemble` with NNLS weights, dropping weak members.
+
+    Members whose normalised weight is below ``min_weight`` are removed and
+    the weights of the rest refitted, so they cost nothing at inference.
+
+    Parameters
+    ----------
+    models:
+        Fitted members.
+    predictions:
+        ``(n_samples, n_models)`` out-of-fold predictions, column ``i`` from
+        ``models[i]``.
+    y:
+        Target of the out-of-fold rows.
+    min_weight:
+        Smallest weight a member may keep.
+    max_threads:
+        Passed to :class:`WeightedEnsemble`.
+    """
+    weights = stacking_weights(predictions, y, min_weight)
+    members = np.flatnonzero(weights)
+    return WeightedEnsemble([models[m] for m in members], list(map(float, weights[members])), max_threads=max_threads)
+
+
+def forward_stacking_scores(predictions, y, fold_sizes: Sequence[int], metric, min_weight: float = 0.01) -> list[float]:
+    """Out-of-sample scores of NNLS stacking over consecutive validation folds.
+
+    The weights scored on fold ``k`` are fitted on folds ``0 .. k-1`` only,
+    so no fold is scored with weights fitted on its own rows. The first fold
+    has no earlier folds and gets no score.
+
+    Parameters
+    ----------
+    predictions:
+        ``(n_samples, n_models)`` out-of-fold predictions, folds in time order.
+    y:
+        Target of the out-of-fold rows.
+    fold_sizes:
+        Rows per fold; they sum to ``n_samples``.
+    metric:
+        ``metric(y_true, y_pred)``.
+    min_weight:
+        As for :func:`stacked_ensemble`.
+
+    Returns
+    -------
+    list of float
+        Scores of folds ``1 .. len(fold_sizes) - 1``.
+    """
+    P = np.asarray(predictions, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bounds = np.cumsum([0, *fold_sizes])
+    scores = []
+    for lo, hi in zip(bounds[1:-1], bounds[2:]):
+        weights = stacking_weights(P[:lo], y[:lo], min_weight)
+        scores.append(float(metric(y[lo:hi], P[lo:hi] @ weights)))
+    return scores
 
 
-def save_ensemble(model: AverageEnsemble, path: str) -> None:
+def save_ensemble(model: AverageEnsemble | WeightedEnsemble, path: str) -> None:
     """Serialise an ensemble model using :mod:`joblib`."""
 
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     joblib.dump(model, path)
 
 
-def load_ensemble(path: str) -> AverageEnsemble:
+def load_ensemble(path: str) -> AverageEnsemble | WeightedEnsemble:
     """Load a previously saved ensemble model."""
 
     return joblib.load(path)
@@ -0,0 +1,216 @@
+"""Recursive multi-step forecasting from the end of the load history.
+
+The test horizon has no load readings, so the lags and rolling means of the
+target cannot come from ``create_features``. :class:`RecursiveForecaster`
+seeds an :class:`~src.feature_engineering.online.OnlineFeatureState` per
+series with its history and rolls forward hour by hour, feeding every
+prediction back into the lag buffers. Model calls are batched as far as the
+dependencies allow: every step predicts all series at once, and when the
+target only enters through lags of at least ``k`` hours, ``k`` hours are
+predicted per call.
+"""
+
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing.external_data import WeatherStore
+from src.data_processing.load_data import parse_timestamps
+from src.feature_engineering.feature_matrix import INTERACTIONS, lag_feature_names
+from src.feature_engineering.online import OnlineFeatureState
+from src.feature_engineering.time_features import TIME_FEATURES
+
+HOUR = pd.Timedelta(hours=1)
+
+
+def forecastable_features(
+    feature_names: Sequence[str],
+    cols_to_lag: Sequence[str],
+    window_sizes: Sequence[int],
+    weather_columns: Sequence[str],
+) -> list[str]:
+    """Features known ahead of time: calendar, weather, their interactions and lags.
+
+    Readings of the hour itself (chiller telemetry, delta-T) are not
+    available when forecasting and are left out.
+    """
+
+    known = set(TIME_FEATURES) | set(weather_columns) | {name for name, _, _ in INTERACTIONS}
+    known.update(name for col in cols_to_lag for w in window_sizes for name in lag_feature_names(col, w))
+    return [name for name in feature_names if name in known]
+
+
+def block_size(feature_names: Sequence[str], target_col: str, window_sizes: Sequence[int]) -> int:
+    """Number of consecutive hours that can be predicted in one model call.
+
+    A rolling mean of the target needs the previous hour, which limits blocks
+    to one hour; otherwise the shortest target lag bounds the block.
+    """
+
+    names = set(feature_names)
+    size = None
+    for w in window_sizes:
+        lag_name, mean_name = lag_feature_names(target_col, w)
+        if mean_name in names:
+            return 1
+        if lag_name in names:
+            size = w if size is None else min(size, w)
+    return size or 1
+
+
+class RecursiveForecaster:
+    """Roll a one-step model forward over a horizon.
+
+    Parameters
+    ----------
+    model:
+        Fitted estimator with ``predict``, trained on ``feature_names``.
+    feature_names:
+        Model input columns, in order.
+    target_col:
+        Predicted column; its lags are fed with the predictions.
+    cols_to_lag, window_sizes:
+        Lag configuration the model was trained with.
+    weather:
+        Weather data or store covering the horizon.
+    weather_resolution:
+        ``'daily'`` or ``'hourly'``, as for ``create_features``.
+    """
+
+    def __init__(
+        self,
+        model,
+        feature_names: Sequence[str],
+        target_col: str,
+        cols_to_lag: list[str],
+        window_sizes: list[int],
+        weather: pd.DataFrame | WeatherStore,
+        weather_resolution: str = 'daily',
+    ):
+        if target_col not in cols_to_lag:
+            raise ValueError(f"{target_col!r} must be one of cols_to_lag to be forecast recursively")
+        self.model = model
+        self.feature_names = list(feature_names)
+        self.target_col = target_col
+        self.cols_to_lag = list(cols_to_lag)
+        self.window_sizes = list(window_sizes)
+        self.weather = weather if isinstance(weather, WeatherStore) else WeatherStore.from_frame(weather)
+        self.weather_resolution = weather_resolution
+        self.block = block_size(self.feature_names, target_col, self.window_sizes)
+
+    def seed(
+        self, history: pd.DataFrame, timestamp_col: str = 'record_timestamp'
+    ) -> tuple[OnlineFeatureState, pd.Timestamp]:
+        """Feature state continuing after ``history``, and the last hour of the history."""
+
+        history = history.copy()
+        history[timestamp_col] = parse_timestamps(history[timestamp_col])
+        history = history.sort_values(timestamp_col, kind='stable')
+        state = OnlineFeatureState.from_history(
+            history, timestamp_col, self.feature_names, self.cols_to_lag, self.window_sizes,
+            self.weather, self.weather_resolution,
+        )
+        return state, history[timestamp_col].iloc[-1]
+
+    def forecast(
+        self,
+        history: pd.DataFrame | Mapping[str, pd.DataFrame],
+        timestamps,
+        timestamp_col: str = 'record_timestamp',
+    ) -> pd.DataFrame | dict[str, pd.DataFrame]:
+        """Predict ``timestamps`` for one series or several.
+
+        Parameters
+        ----------
+        history:
+            Hourly data with ``timestamp_col`` and the lagged columns, or a
+            mapping of series name to such data for a batch of buildings.
+        timestamps:
+            Hours to predict, all after the end of every history. Hours
+            between the end of a history and the first requested hour are
+            forecast too, so the lags stay aligned.
+        timestamp_col:
+            Timestamp column of the histories.
+
+        Returns
+        -------
+        pd.DataFrame | dict[str, pd.DataFrame]
+            ``timestamp`` and ``prediction`` columns in the order of
+            ``timestamps``; a mapping of them when ``history`` was a mapping.
+        """
+        single = isinstance(history, pd.DataFrame)
+        histories = {None: history} if single else dict(history)
+        requested = pd.DatetimeIndex(parse_timestamps(pd.Series(timestamps)))
+        if requested.empty:
+            empty = pd.DataFrame({'timestamp': requested, 'prediction': np.zeros(0)})
+            return empty if single else {name: empty.copy() for name in histories}
+
+        seeded = {name: self.seed(frame, timestamp_col) for name, frame in histories.items()}
+        results = self.forecast_seeded(seeded, {name: requested for name in histories})
+        return results[None] if single else results
+
+    def forecast_seeded(
+        self,
+        seeded: Mapping[object, tuple[OnlineFeatureState, pd.Timestamp]],
+        timestamps: Mapping[object, pd.DatetimeIndex],
+    ) -> dict[object, pd.DataFrame]:
+        """Roll seeded states forward, each series to its own horizon.
+
+        Every model call predicts the next hours of all series still inside
+        their horizon, so a batch of requests costs one call per step.
+
+        Parameters
+        ----------
+        seeded:
+            Series name to ``(state, last hour)`` as returned by :meth:`seed`.
+            The states are advanced in place; pass copies to keep them.
+        timestamps:
+            Series name to the (non-empty) hours to predict.
+
+        Returns
+        -------
+        dict
+            Series name to ``timestamp`` and ``prediction`` columns.
+        """
+        states, starts, ends = {}, {}, {}
+        for name, (state, last) in seeded.items():
+            requested = timestamps[name]
+            states[name], starts[name], ends[name] = state, last + HOUR, requested.max()
+            if requested.min() < starts[name]:
+                raise ValueError(f"Forecast hours must come after the history, which ends at {last}")
+            if ((requested - starts[name]) % HOUR != pd.Timedelta(0)).any():
+                raise ValueError("Forecast timestamps must be on the hour")
+
+        grid = pd.date_range(min(starts.values()), max(ends.values()), freq='h')
+        predictions = {name: {} for name in states}
+        for i in range(0, len(grid), self.block):
+            block = grid[i:i + self.block]
+            rows, owners = [], []
+            for name, state in states.items():
+                hours = block[(block >= starts[name]) & (block <= ends[name])]
+                for hour in hours:
+                    # The target is unknown (NaN) until amended below
+                    rows.append(state.update(hour, {}, dtype=np.float32))
+                owners.append((name, hours))
+            if not rows:
+                continue
+
+            y = self.model.predict(np.vstack(rows))
+            offset = 0
+            for name, hours in owners:
+                values = y[offset:offset + len(hours)]
+                offset += len(hours)
+                if len(hours):
+                    states[name].amend(self.target_col, values)
+                    predictions[name].update(zip(hours, values))
+
+        return {
+            name: pd.DataFrame({
+                'timestamp': timestamps[name],
+                'prediction': np.array([predicted[t] for t in timestamps[name]], dtype=float),
+            })
+            for name, predicted in predictions.items()
+        }
@@ -3,36 +3,80 @@ import joblib
 from pathlib import Path
 from typing import Any, Dict
 
-try:
-    import xgboost as xgb
-except ImportError:  # pragma: no cover - optional dependency
-    xgb = None
-
-try:
-    import lightgbm as lgb
-except ImportError:  # pragma: no cover - optional dependency
-    lgb = None
-
 CONFIG_DIR = Path(__file__).resolve().parent.parent.parent / 'models' / 'model_configs'
 MODEL_DIR = Path(__file__).resolve().parent.parent.parent / 'models' / 'trained_models'
 
 
+def _import_xgboost():
+    # Imported on first use: xgboost takes seconds to import
+    try:
+        import xgboost as xgb
+    except ImportError:  # pragma: no cover - optional dependency
+        raise ImportError('xgboost is not installed') from None
+    return xgb
+
+
+def _import_lightgbm():
+    try:
+        import lightgbm as lgb
+    except ImportError:  # pragma: no cover - optional dependency
+        raise ImportError('lightgbm is not installed') from None
+    return lgb
+
+
+def config_path(name: str) -> Path:
+    return CONFIG_DIR / f"{name}_config.json"
+
+
 def load_config(name: str) -> Dict[str, Any]:
-    path = CONFIG_DIR / f"{name}_config.json"
+    path = config_path(name)
     with open(path) as f:
         return json.load(f)
 
 
+def model_params(name: str, overrides: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Parameters of model ``name``: its config JSON (e.g. the tuned values,
+    empty when there is none) updated with ``overrides``."""
+    try:
+        params = load_config(name)
+    except FileNotFoundError:
+        params = {}
+    params.update(overrides or {})
+    return params
+
+
 def save_config(name: str, config: Dict[str, Any]):
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    path = CONFIG_DIR / f"{name}_config.json"
+    path = config_path(name)
     with open(path, 'w') as f:
         json.dump(config, f, indent=4)
 
 
+def make_estimator(name: str, params: Dict[str, Any] | None = None):
+    """Unfitted estimator ``name`` with ``params`` (default: its config JSON, if any).
+
+    Known names: ``xgboost``, ``lightgbm``, ``random_forest`` and
+    ``hist_gradient_boosting`` (scikit-learn's histogram GBM).
+    """
+    if params is None:
+        params = model_params(name)
+    if name == 'xgboost':
+        return _import_xgboost().XGBRegressor(**params)
+    if name == 'lightgbm':
+        return _import_lightgbm().LGBMRegressor(**{'verbose': -1, **params})
+    if name == 'random_forest':
+        from sklearn.ensemble import RandomForestRegressor
+
+        return RandomForestRegressor(**params)
+    if name == 'hist_gradient_boosting':
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        return HistGradientBoostingRegressor(**params)
+    raise ValueError(f"No estimator for model {name!r}")
+
+
 def train_xgboost(X_train, y_train, **override_params):
-    if xgb is None:
-        raise ImportError('xgboost is not installed')
+    xgb = _import_xgboost()
     config = load_config('xgboost')
     config.update(override_params)
     model = xgb.XGBRegressor(**config)
@@ -43,8 +87,7 @@ def train_xgboost(X_train, y_train, **override_params):
 
 
 def train_lightgbm(X_train, y_train, **override_params):
-    if lgb is None:
-        raise ImportError('lightgbm is not installed')
+    lgb = _import_lightgbm()
     config = load_config('lightgbm')
     config.update(override_params)
     model = lgb.LGBMRegressor(**config)
@@ -0,0 +1,198 @@
+"""Successive-halving hyperparameter search over the ``model_configs`` JSONs.
+
+A search space lives next to each model config as
+``models/model_configs/<name>_search.json``::
+
+    {
+        "resource": "n_estimators",
+        "min_resource": 50,
+        "max_resource": 800,
+        "eta": 3,
+        "n_candidates": 27,
+        "fixed": {"random_state": 42},
+        "space": {
+            "learning_rate": {"type": "loguniform", "low": 0.01, "high": 0.3},
+            "num_leaves": {"type": "int", "low": 15, "high": 127},
+            "subsample": {"type": "uniform", "low": 0.6, "high": 1.0},
+            "max_depth": {"type": "choice", "values": [4, 6, 8, -1]}
+        }
+    }
+
+``n_candidates`` configurations are sampled and scored with time-series CV
+NRMSE using ``min_resource`` boosting rounds (trees). The best ``1/eta`` of
+them go on to the next rung with ``eta`` times the rounds, until
+``max_resource``. Candidates of a rung are fitted in parallel processes
+sharing one memory-mapped feature matrix. A candidate whose first folds are
+already clearly worse than the rung's cut-off stops early (median-stopping
+style). The winner is written back to ``<name>_config.json`` in the usual
+format, but only if it was scored with ``max_resource``: a search stopped by
+its time budget at a lower rung is reported without overwriting the config.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+
+from src.evaluation.validation import cross_validate_time_series
+from src.models.tree_models import CONFIG_DIR, load_config, make_estimator, save_config
+
+
+def load_search_space(name: str) -> Dict[str, Any]:
+    """Read ``<name>_search.json`` from the model config directory."""
+    with open(CONFIG_DIR / f"{name}_search.json") as f:
+        return json.load(f)
+
+
+def sample_params(space: Dict[str, Dict[str, Any]], rng: np.random.Generator) -> Dict[str, Any]:
+    """Draw one configuration from a search space."""
+    params = {}
+    for key, spec in space.items():
+        kind = spec['type']
+        if kind == 'uniform':
+            params[key] = float(rng.uniform(spec['low'], spec['high']))
+        elif kind == 'loguniform':
+            params[key] = float(math.exp(rng.uniform(math.log(spec['low']), math.log(spec['high']))))
+        elif kind == 'int':
+            params[key] = int(rng.integers(spec['low'], spec['high'] + 1))
+        elif kind == 'choice':
+            params[key] = spec['values'][int(rng.integers(len(spec['values'])))]
+        else:
+            raise ValueError(f"Unknown search space type {kind!r} for {key!r}")
+    return params
+
+
+def _score_trial(name, params, X, y, cv, cutoff):
+    result = cross_validate_time_series(
+        make_estimator(name, params), X, y, n_jobs=1, best_score=cutoff, **cv
+    )
+    return result.score, result.fold_scores, result.stopped is not None
+
+
+@dataclass
+class TuningResult:
+    """Outcome of :func:`successive_halving`.
+
+    ``trials`` lists every scored configuration with its rung, resource and
+    fold scores. ``complete`` says whether the winner was scored with the
+    full resource, ``saved`` whether it was written to its config JSON.
+    """
+
+    best_params: Dict[str, Any]
+    best_score: float
+    trials: list = field(default_factory=list)
+    elapsed: float = 0.0
+    stopped: Optional[str] = None
+    complete: bool = False
+    saved: bool = False
+
+
+def successive_halving(
+    name: str,
+    X,
+    y,
+    search: Optional[Dict[str, Any]] = None,
+    n_splits: int = 5,
+    gap: int = 0,
+    n_jobs: Optional[int] = -1,
+    time_budget: Optional[float] = None,
+    abort_tolerance: float = 0.1,
+    random_state: int = 42,
+    save: bool = True,
+) -> TuningResult:
+    """Search the hyperparameters of model ``name`` by successive halving.
+
+    Parameters
+    ----------
+    name:
+        A model known to :func:`~src.models.tree_models.make_estimator`.
+    X, y:
+        Training features and target in time order.
+    search:
+        Search space; defaults to ``<name>_search.json``. Values under
+        ``fixed`` are applied to every candidate.
+    n_splits, gap:
+        Time-series CV layout used to score every trial.
+    n_jobs:
+        Worker processes for the trials of a rung.
+    time_budget:
+        Seconds for the whole search; no new rung starts once it is spent.
+    abort_tolerance:
+        A trial stops once its mean fold score exceeds the rung's current
+        cut-off by this relative margin.
+    random_state:
+        Seed of the configuration sampler.
+    save:
+        Write the winner to ``<name>_config.json`` if it was scored with
+        ``max_resource``.
+
+    Returns
+    -------
+    TuningResult
+        The winning configuration (base config plus tuned values) and all trials.
+    """
+    start = time.perf_counter()
+    search = search or load_search_space(name)
+    try:
+        base = load_config(name)
+    except FileNotFoundError:
+        base = {}
+    resource = search.get('resource', 'n_estimators')
+    eta = search.get('eta', 3)
+    rng = np.random.default_rng(random_state)
+    base.update(search.get('fixed', {}))
+    candidates = [{**base, **sample_params(search['space'], rng)} for _ in range(search.get('n_candidates', 27))]
+    cv = {'n_splits': n_splits, 'gap': gap}
+    X = np.ascontiguousarray(X)
+    y = np.asarray(y)
+    batch_size = effective_n_jobs(n_jobs)
+
+    result = TuningResult(best_params={}, best_score=float('inf'))
+    amount = search['min_resource']
+    rung = 0
+    # max_nbytes=0 memory-maps X and y once for all workers
+    with Parallel(n_jobs=n_jobs, max_nbytes=0, mmap_mode='r') as parallel:
+        while candidates:
+            amount = min(amount, search['max_resource'])
+            keep = max(1, len(candidates) // eta) if amount < search['max_resource'] else 1
+            scored = []
+            for i in range(0, len(candidates), batch_size):
+                # Folds of the last survivor so far: trials clearly worse than it stop early
+                finished = sorted((score, folds) for score, _, aborted, folds in scored if not aborted)
+                cutoff = finished[keep - 1][1] if len(finished) >= keep else None
+                batch = [{**params, resource: amount} for params in candidates[i:i + batch_size]]
+                outcomes = parallel(delayed(_score_trial)(name, p, X, y, cv, cutoff) for p in batch)
+                for params, (score, folds, aborted) in zip(batch, outcomes):
+                    scored.append((score, params, aborted, folds))
+                    result.trials.append({
+                        'rung': rung, resource: amount, 'params': params,
+                        'nrmse': score, 'fold_nrmse': folds, 'stopped_early': aborted,
+                    })
+
+            # Stopped trials rank after every complete one
+            scored.sort(key=lambda trial: (trial[2], trial[0]))
+            best_score, best_params, _, _ = scored[0]
+            result.best_params, result.best_score = best_params, best_score
+            if keep == 1 and amount >= search['max_resource']:
+                break
+            if time_budget is not None and time.perf_counter() - start > time_budget:
+                result.stopped = f'time budget of {time_budget:.0f}s reached after rung {rung}'
+                break
+            candidates = [params for _, params, _, _ in scored[:keep]]
+            # A single survivor goes straight to the full budget
+            amount = search['max_resource'] if len(candidates) == 1 else amount * eta
+            rung += 1
+
+    result.elapsed = time.perf_counter() - start
+    # A lower rung's winner has fewer trees than it would be trained with
+    result.complete = result.best_params.get(resource) == search['max_resource']
+    if save and result.complete:
+        save_config(name, result.best_params)
+        result.saved = True
+    return result
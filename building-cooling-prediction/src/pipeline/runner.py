@@ -0,0 +1,797 @@
+"""Per-building pipeline and a process-pool runner for building portfolios.
+
+:class:`BuildingPipeline` exposes the load -> chiller loads -> hourly
+aggregation -> features -> train/predict chain for one telemetry file as
+separate steps (the ``main.py`` subcommands); :func:`run_building` runs them
+all. Modeling dependencies (scikit-learn and friends) are imported inside the
+steps that use them, so ingesting or building features never pays for them.
+:func:`run_portfolio` runs that chain for many buildings in a process pool.
+Weather data is built once in the parent as an on-disk :class:`WeatherStore`
+that every worker memory-maps, so workers share its pages and never re-read
+the weather CSVs.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Iterable
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.data_processing import aggregate_data, calculate_cooling_load, external_data, ingest, load_data
+from src.data_processing.aggregate_data import aggregate_to_hourly
+from src.data_processing.calculate_cooling_load import calculate_chiller_cooling_load
+from src.data_processing.external_data import WeatherStore
+from src.data_processing.incremental import (
+    default_state_path,
+    load_aggregator_state,
+    read_new_rows,
+    rows_after_watermark,
+    update_hourly_training_data,
+)
+from src.data_processing.ingest import load_cached_csv
+from src.data_processing.load_data import TIMESTAMP_COLUMNS, parse_timestamps, save_csv_data
+from src.data_processing.streaming import run_streaming_aggregation
+from src.feature_engineering import (
+    calendar,
+    feature_matrix,
+    lag_features,
+    registry,
+    technical_features,
+    time_features,
+    weather_features,
+)
+from src.feature_engineering.feature_matrix import frame_to_matrix, numeric_feature_names
+from src.feature_engineering.feature_store import FeatureStore
+from src.pipeline.stages import Stage, StageCache
+from src.utils import helpers
+from src.utils.helpers import create_features, create_joint_features
+
+TARGET_COL = 'Total_Cooling_Load'
+
+# Modules whose source determines the feature stages
+FEATURE_CODE = (
+    helpers, ingest, load_data, external_data,
+    registry, calendar, time_features, technical_features, lag_features, weather_features, feature_matrix,
+)
+
+# This module, for the code version of the stages whose logic lives here
+runner_module = sys.modules[__name__]
+
+# Weather store opened by each worker process in :func:`_init_worker`.
+_WORKER_WEATHER: WeatherStore | None = None
+
+
+@dataclass
+class BuildingPaths:
+    """Input and output locations for one building."""
+
+    name: str
+    telemetry: str
+    chiller_loads: str
+    hourly: str
+    features_train: str
+    features_test: str
+    model_dir: str
+    submissions_dir: str
+
+
+def default_building_paths(config: dict) -> BuildingPaths:
+    """Paths for the single building configured in ``config.yaml``."""
+
+    data = config['data']
+    return BuildingPaths(
+        name=Path(data['raw']['building_x']).stem,
+        telemetry=data['raw']['building_x'],
+        chiller_loads=data['processed']['chiller_loads'],
+        hourly=data['processed']['hourly_training_data'],
+        features_train=data['processed']['features_train'],
+        features_test=data['processed']['features_test'],
+        model_dir=config['models']['trained_models'],
+        submissions_dir=data['submissions'],
+    )
+
+
+def portfolio_building_paths(config: dict, telemetry_path: str) -> BuildingPaths:
+    """Per-building paths: every artifact goes into a sub-directory named after the file."""
+
+    name = Path(telemetry_path).stem
+    data = config['data']
+    processed_dir = os.path.join(os.path.dirname(data['processed']['hourly_training_data']), name)
+    return BuildingPaths(
+        name=name,
+        telemetry=telemetry_path,
+        chiller_loads=os.path.join(processed_dir, 'chiller_loads.csv'),
+        hourly=os.path.join(processed_dir, 'hourly_training_data.csv'),
+        features_train=os.path.join(processed_dir, 'features_train.csv'),
+        features_test=os.path.join(processed_dir, 'features_test.csv'),
+        model_dir=os.path.join(config['models']['trained_models'], name),
+        submissions_dir=os.path.join(data['submissions'], name),
+    )
+
+
+def expand_building_paths(patterns: Iterable[str]) -> list[str]:
+    """Expand file names and glob patterns into a sorted, de-duplicated list."""
+
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern)
+        if not matches and os.path.exists(pattern):
+            matches = [pattern]
+        paths.update(os.path.abspath(m) for m in matches)
+    return sorted(paths)
+
+
+def configured_weather_paths(config: dict) -> list[str]:
+    """Weather files listed under ``data.raw`` in the config."""
+
+    raw = config['data']['raw']
+    return [raw['weather_2023'], raw['weather_2024_jan']]
+
+
+def _aggregate_in_place(paths: BuildingPaths, config: dict, log) -> bool:
+    """Steps 2-4 in streaming or incremental mode, which write the hourly CSV themselves."""
+
+    pipeline_config = config.get('pipeline', {})
+    if pipeline_config.get('streaming', False):
+        # Bounded memory: read, compute loads and aggregate chunk by chunk
+        if not os.path.exists(paths.telemetry):
+            log(f"{paths.telemetry} not found. Please add it to the data/raw directory.")
+            return False
+        n_hours = run_streaming_aggregation(
+            paths.telemetry,
+            paths.hourly,
+            timestamp_col='record_timestamp',
+            chunksize=pipeline_config.get('chunksize', 50_000),
+            chiller_loads_path=paths.chiller_loads,
+        )
+        log(f"Streamed {n_hours} hourly rows to {paths.hourly}")
+        return True
+
+    # Only the delta: parse the lines appended since the last refresh and
+    # aggregate those newer than the stored watermark
+    aggregator = load_aggregator_state(default_state_path(paths.hourly))
+    try:
+        building_df, source = read_new_rows(paths.telemetry, aggregator.source if aggregator is not None else None)
+        log(f"{Path(paths.telemetry).name} loaded successfully.")
+    except FileNotFoundError:
+        log(f"{paths.telemetry} not found. Please add it to the data/raw directory.")
+        return False
+
+    watermark = aggregator.watermark if aggregator is not None else None
+    new_rows = rows_after_watermark(building_df, watermark, timestamp_col='record_timestamp')
+    n_hours = update_hourly_training_data(new_rows, paths.hourly, timestamp_col='record_timestamp', source=source)
+    log(f"Appended {n_hours} hourly rows from {len(new_rows)} new readings to {paths.hourly}")
+    return True
+
+
+def training_matrix(features_df: pd.DataFrame, feature_columns: list[str]) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    """Complete rows of ``feature_columns`` and the target, in time order."""
+
+    X, y, feature_columns, _ = _training_rows(features_df, feature_columns)
+    return X, y, feature_columns
+
+
+def _training_rows(features_df: pd.DataFrame, feature_columns: list[str]):
+    """:func:`training_matrix` plus the mask of the rows of ``features_df`` it kept."""
+
+    # float32 and C-contiguous, the layout the forest uses internally
+    features = frame_to_matrix(features_df, feature_names=feature_columns)
+    y = features_df[TARGET_COL].to_numpy(dtype=float)
+    complete = ~(np.isnan(features.values).any(axis=1) | np.isnan(y))
+    return features.values[complete], y[complete], features.feature_names, complete
+
+
+def _train_model(
+    features_df: pd.DataFrame,
+    model_config: dict,
+    feature_columns: list[str],
+    cv_n_jobs: int | None = None,
+) -> dict:
+    """Steps 19-20: score the pipeline model on ``feature_columns`` with time-series CV,
+    fit it on all rows, and stack it with the ensemble members.
+
+    ``cv_n_jobs`` overrides ``model.cv.n_jobs`` (the processes fitting folds)."""
+
+    from src.evaluation.metrics import nrmse
+    from src.evaluation.validation import cross_validate_time_series
+    from src.models.baseline_models import hourly_matrix, make_baseline
+    from src.models.ensemble import forward_stacking_scores, stacked_ensemble
+    from src.models.tree_models import make_estimator, model_params
+
+    X, y, feature_columns, complete = _training_rows(features_df, feature_columns)
+    cv_config = model_config.get('cv', {})
+    timestamp_col = next((c for c in TIMESTAMP_COLUMNS if c in features_df.columns), None)
+    timestamps = parse_timestamps(features_df[timestamp_col]) if timestamp_col else None
+
+    def score(estimator, X=X, n_jobs=cv_config.get('n_jobs') if cv_n_jobs is None else cv_n_jobs):
+        return cross_validate_time_series(
+            estimator, X, y,
+            n_splits=cv_config.get('n_splits', 5),
+            gap=cv_config.get('gap', 0),
+            n_jobs=n_jobs,
+            time_budget=cv_config.get('time_budget'),
+        )
+
+    # random_forest_config.json (written by `main.py tune`) overridden by `model.params`
+    params = model_params('random_forest', model_config.get('params', {'random_state': 42}))
+    model = make_estimator('random_forest', params)
+    cv = score(model)
+    model.fit(X, y)
+
+    # Step 20: NNLS weights over the members' out-of-fold predictions (same folds)
+    members, oof = [model], [cv.y_pred]
+    for name in model_config.get('ensemble_members', []):
+        member = make_estimator(name)
+        oof.append(score(member).y_pred)
+        members.append(member.fit(X, y))
+    # A member stopped by the time budget has fewer folds; stack the folds all have
+    n = min(len(pred) for pred in oof)
+    n_folds = int(np.searchsorted(np.cumsum(cv.fold_sizes), n, side='right'))
+    stacked = np.column_stack([pred[:n] for pred in oof])
+    min_weight = model_config.get('ensemble_min_weight', 0.01)
+    ensemble = stacked_ensemble(members, stacked, cv.y_valid[:n], min_weight=min_weight)
+    weights = dict(zip(map(id, ensemble.models), ensemble.weights))
+    member_weights = [weights.get(id(m), 0.0) for m in members]
+    # Scored out of sample: each fold with weights fitted on the folds before it,
+    # averaged over folds like `nrmse`; the forest's score on the same folds for comparison
+    ensemble_folds = forward_stacking_scores(
+        stacked, cv.y_valid[:n], cv.fold_sizes[:n_folds], nrmse, min_weight=min_weight
+    )
+    forest_folds = cv.fold_scores[1:n_folds]
+
+    # Calendar baselines on the same folds: what the models must beat
+    baseline_nrmse = {}
+    if timestamps is not None:
+        temperature = features_df.get('temperature_celsius')
+        calendar = hourly_matrix(
+            timestamps[complete], None if temperature is None else temperature.to_numpy(dtype=float)[complete]
+        )
+        for name in model_config.get('baselines', []):
+            # Milliseconds per fold, not worth worker processes
+            baseline_nrmse[name] = score(make_baseline(name), X=calendar, n_jobs=1).score
+    return {
+        'model': model,
+        'feature_columns': feature_columns,
+        'n_rows': len(y),
+        'training_window': None if timestamps is None else (timestamps.min(), timestamps.max()),
+        'nrmse': cv.score,
+        'fold_nrmse': cv.fold_scores,
+        'cv_stopped': cv.stopped,
+        'y_valid': cv.y_valid,
+        'y_pred': cv.y_pred,
+        'ensemble': ensemble,
+        'ensemble_weights': {type(m).__name__: w for m, w in zip(members, member_weights)},
+        'ensemble_nrmse': float(np.mean(ensemble_folds)) if ensemble_folds else float('nan'),
+        'ensemble_fold_nrmse': ensemble_folds,
+        'ensemble_reference_nrmse': float(np.mean(forest_folds)) if forest_folds else float('nan'),
+        'baseline_nrmse': baseline_nrmse,
+    }
+
+
+
+class BuildingPipeline:
+    """The pipeline steps for one building, backed by a :class:`StageCache`.
+
+    Stages are declared on first use, so running a single step (e.g.
+    :meth:`features`) only hashes and resolves the stages that step needs.
+    Every step reuses cached outputs whose inputs (files, config section or
+    code) are unchanged and only rewrites output files that are stale.
+
+    Parameters
+    ----------
+    paths:
+        Input and output locations for the building.
+    config:
+        Configuration as returned by :func:`src.utils.config.load_config`.
+    weather_df:
+        Pre-loaded weather data or store; the shared store for the configured
+        files is used when omitted.
+    verbose:
+        Print progress messages.
+    cv_n_jobs:
+        Processes fitting the cross-validation folds; ``model.cv.n_jobs``
+        from the config when omitted.
+    """
+
+    def __init__(
+        self,
+        paths: BuildingPaths,
+        config: dict,
+        weather_df: pd.DataFrame | WeatherStore | None = None,
+        verbose: bool = True,
+        cv_n_jobs: int | None = None,
+    ):
+        self.paths = paths
+        self.config = config
+        self.weather_df = weather_df
+        self.verbose = verbose
+        self.cv_n_jobs = cv_n_jobs
+        pipeline_config = config.get('pipeline', {})
+        # Streaming and incremental modes write the hourly CSV themselves
+        self.in_place = pipeline_config.get('streaming', False) or pipeline_config.get('incremental', False)
+        self.cache = StageCache(
+            config['data']['stage_cache'],
+            enabled=pipeline_config.get('cache_stages', True),
+            digest_cache_dir=config['data']['cache'],
+            scope=paths.name,
+        )
+        self.feature_config = config['feature_engineering']
+        self.weather_paths = configured_weather_paths(config)
+
+    def log(self, message: str) -> None:
+        if self.verbose:
+            print(message)
+
+    # Stage declarations
+
+    @cached_property
+    def loads(self) -> Stage:
+        return self.cache.stage(
+            'chiller_loads',
+            lambda: calculate_chiller_cooling_load(
+                load_cached_csv(self.paths.telemetry, cache_dir=self.config['data']['cache'])
+            ),
+            files=[self.paths.telemetry],
+            code=[calculate_cooling_load, ingest, load_data],
+        )
+
+    @cached_property
+    def hourly(self) -> Stage:
+        return self.cache.stage(
+            'hourly',
+            lambda: aggregate_to_hourly(self.loads.value.copy(), timestamp_col='record_timestamp'),
+            upstream=[self.loads],
+            code=[aggregate_data],
+        )
+
+    def _weather(self) -> pd.DataFrame | WeatherStore:
+        if self.weather_df is not None:
+            return self.weather_df
+        return WeatherStore.cached(*self.weather_paths, cache_dir=self.config['data']['cache'])
+
+    def _build_features(self, data) -> pd.DataFrame:
+        return create_features(
+            data_path=data,
+            timestamp_col=self.feature_config['timestamp_col'],
+            cols_to_lag=self.feature_config['cols_to_lag'],
+            window_sizes=self.feature_config['window_sizes'],
+            weather_df=self._weather(),
+            weather_resolution=self.feature_config.get('weather_resolution', 'daily'),
+        )
+
+    def _hourly_input(self) -> tuple:
+        """How the feature stages get the hourly data: (loader, files, upstream stages)."""
+
+        if self.in_place:
+            if not os.path.exists(self.paths.hourly):
+                raise FileNotFoundError(f"{self.paths.hourly} not found; run the ingest step first.")
+            return (lambda: self.paths.hourly), [self.paths.hourly], []
+        return (lambda: self.hourly.value), [], [self.hourly]
+
+    def _test_path(self) -> str | None:
+        test_raw = self.config['data']['raw'].get('test')
+        return test_raw if test_raw and os.path.exists(test_raw) else None
+
+    @cached_property
+    def joint_features(self) -> Stage | None:
+        """Train and test features over one timeline, when ``feature_engineering.joint`` is set."""
+
+        test_raw = self._test_path()
+        if not self.feature_config.get('joint', False) or test_raw is None:
+            return None
+        load_hourly, files, upstream = self._hourly_input()
+        return self.cache.stage(
+            'features_joint',
+            lambda: create_joint_features(
+                load_hourly(),
+                test_raw,
+                timestamp_col=self.feature_config['timestamp_col'],
+                cols_to_lag=self.feature_config['cols_to_lag'],
+                window_sizes=self.feature_config['window_sizes'],
+                weather_df=self._weather(),
+                weather_resolution=self.feature_config.get('weather_resolution', 'daily'),
+            ),
+            files=[*files, test_raw, *self.weather_paths],
+            config=self.feature_config,
+            code=FEATURE_CODE,
+            upstream=upstream,
+        )
+
+    @cached_property
+    def features_train_stage(self) -> Stage:
+        if self.joint_features is not None:
+            return self.cache.stage(
+                'features_train', lambda: self.joint_features.value.train, upstream=[self.joint_features]
+            )
+        load_hourly, files, upstream = self._hourly_input()
+        return self.cache.stage(
+            'features_train',
+            lambda: self._build_features(load_hourly()),
+            files=[*files, *self.weather_paths],
+            config=self.feature_config,
+            code=FEATURE_CODE,
+            upstream=upstream,
+        )
+
+    @cached_property
+    def features_test_stage(self) -> Stage | None:
+        test_raw = self._test_path()
+        if test_raw is None:
+            return None
+        if self.joint_features is not None:
+            return self.cache.stage(
+                'features_test', lambda: self.joint_features.value.test, upstream=[self.joint_features]
+            )
+        return self.cache.stage(
+            'features_test',
+            lambda: self._build_features(test_raw),
+            files=[test_raw, *self.weather_paths],
+            config=self.feature_config,
+            code=FEATURE_CODE,
+        )
+
+    @cached_property
+    def trained(self) -> Stage:
+        from src.evaluation import metrics, validation
+        from src.models import baseline_models, ensemble, forecasting, tree_models
+
+        model_config = self.config.get('model', {})
+        # The model config JSONs the forest and the ensemble members are built from
+        names = ['random_forest', *model_config.get('ensemble_members', [])]
+        configs = [tree_models.config_path(name) for name in names]
+
+        def train():
+            features = self.features_train_stage.value
+            return _train_model(features, model_config, self._model_columns(features), cv_n_jobs=self.cv_n_jobs)
+
+        return self.cache.stage(
+            'model',
+            train,
+            files=[str(path) for path in configs if path.exists()],
+            config=model_config,
+            code=[
+                runner_module, metrics, validation, feature_matrix, forecasting, ensemble, tree_models, baseline_models,
+            ],
+            upstream=[self.features_train_stage],
+        )
+
+    def _model_columns(self, features: pd.DataFrame) -> list[str]:
+        from src.models.forecasting import forecastable_features
+
+        # Only what is known ahead of time, so the model can forecast the test horizon
+        return forecastable_features(
+            numeric_feature_names(features, exclude=[TARGET_COL]),
+            self.feature_config['cols_to_lag'],
+            self.feature_config['window_sizes'],
+            self._weather_columns(),
+        )
+
+    def training_data(self) -> tuple[np.ndarray, np.ndarray, list[str]]:
+        """Feature matrix, target and feature names the model is trained on."""
+        features = self.features_train_stage.value
+        return training_matrix(features, self._model_columns(features))
+
+    def _weather_columns(self) -> list[str]:
+        weather = self._weather()
+        if isinstance(weather, WeatherStore):
+            return list(weather.columns)
+        return [c for c in weather.columns if c != 'date']
+
+    def history(self) -> pd.DataFrame:
+        """Hourly data the forecast continues from (timestamps in ``record_timestamp``)."""
+
+        if self.in_place:
+            return load_cached_csv(self.paths.hourly, cache_dir=self.config['data']['cache'])
+        return self.hourly.value
+
+    def _test_timestamps(self) -> pd.Series | None:
+        test_raw = self._test_path()
+        if test_raw is None:
+            return None
+        test = load_cached_csv(test_raw, cache_dir=self.config['data']['cache'])
+        time_col = 'prediction_time' if 'prediction_time' in test else self.feature_config['timestamp_col']
+        return test[time_col]
+
+    def forecaster(self, model, feature_columns: list[str] | None = None):
+        """A :class:`~src.models.forecasting.RecursiveForecaster` of ``model`` with this building's settings.
+
+        ``feature_columns`` defaults to the columns of the trained model.
+        """
+        from src.models.forecasting import RecursiveForecaster
+
+        return RecursiveForecaster(
+            model,
+            self.trained.value['feature_columns'] if feature_columns is None else feature_columns,
+            TARGET_COL,
+            self.feature_config['cols_to_lag'],
+            self.feature_config['window_sizes'],
+            self._weather(),
+            self.feature_config.get('weather_resolution', 'daily'),
+        )
+
+    def _forecast(self, model, timestamps) -> pd.DataFrame:
+        return self.forecaster(model).forecast(self.history(), timestamps, timestamp_col='record_timestamp')
+
+    @cached_property
+    def predictions(self) -> Stage | None:
+        from src.feature_engineering import online
+        from src.models import compiled_trees, ensemble, forecasting
+        from src.models.compiled_trees import compile_model
+
+        test_raw = self._test_path()
+        if test_raw is None:
+            return None
+
+        def predict():
+            trained = self.trained.value
+            timestamps = self._test_timestamps()
+            # Same predictions as the fitted models, without their per-call overhead
+            return {
+                'final': self._forecast(compile_model(trained['model']), timestamps)['prediction'].to_numpy(),
+                'ensemble': self._forecast(compile_model(trained['ensemble']), timestamps)['prediction'].to_numpy(),
+            }
+
+        history = {'files': [self.paths.hourly]} if self.in_place else {'upstream': [self.hourly]}
+        return self.cache.stage(
+            'predict',
+            predict,
+            files=[test_raw, *history.get('files', []), *self.weather_paths],
+            config=self.feature_config,
+            code=[compiled_trees, ensemble, forecasting, online, *FEATURE_CODE],
+            upstream=[self.trained, *history.get('upstream', [])],
+        )
+
+    # Steps
+
+    def ingest(self) -> bool:
+        """Steps 2-4: chiller loads and hourly aggregation.
+
+        Returns ``False`` when the telemetry file is missing.
+        """
+        if self.in_place:
+            return _aggregate_in_place(self.paths, self.config, self.log)
+        if not os.path.exists(self.paths.telemetry):
+            self.log(f"{self.paths.telemetry} not found. Please add it to the data/raw directory.")
+            return False
+        if self.cache.materialise(self.paths.chiller_loads, self.loads, save_csv_data):
+            self.log(f"Chiller cooling loads calculated and saved to {self.paths.chiller_loads}")
+        if self.cache.materialise(self.paths.hourly, self.hourly, save_csv_data):
+            self.log(f"Data aggregated to hourly and saved to {self.paths.hourly}")
+        return True
+
+    def features(self) -> None:
+        """Steps 5 and 18: training and test features."""
+
+        if self.cache.materialise(self.paths.features_train, self.features_train_stage, save_csv_data):
+            self.log(f"Features created and saved to {self.paths.features_train}")
+        if self.features_test_stage is None:
+            self.log("Test data not found; skipping test feature engineering.")
+        elif self.cache.materialise(self.paths.features_test, self.features_test_stage, save_csv_data):
+            self.log(f"Test features saved to {self.paths.features_test}")
+        if self.config['data'].get('feature_store'):
+            self._store_features()
+
+    def _store_features(self) -> None:
+        """Write the features to the month-partitioned feature store unless it is up to date."""
+
+        store = FeatureStore(self.config['data']['feature_store'])
+        for feature_set, stage in (('train', self.features_train_stage), ('test', self.features_test_stage)):
+            if stage is None:
+                continue
+            if self.cache.enabled and store.version(feature_set, self.paths.name) == stage.key:
+                continue
+            store.write(feature_set, self.paths.name, stage.value, version=stage.key)
+            self.log(f"Stored {feature_set} features of {self.paths.name} in {store.root}")
+
+    def train(self) -> float:
+        """Steps 19-20: fit, score and save the model and its ensemble; returns the NRMSE."""
+
+        from src.models.artifacts import save_artifact
+        from src.models.ensemble import save_ensemble
+
+        result = self.trained.value
+        score = result['nrmse']
+        folds = ', '.join(f'{fold:.4f}' for fold in result['fold_nrmse'])
+        self.log(f"Validation NRMSE: {score:.4f} (time-series folds: {folds})")
+        if result['cv_stopped']:
+            self.log(f"Cross-validation stopped early: {result['cv_stopped']}")
+        weights = ', '.join(f'{name} {weight:.3f}' for name, weight in result['ensemble_weights'].items())
+        self.log(
+            f"Ensemble NRMSE: {result['ensemble_nrmse']:.4f} vs {result['ensemble_reference_nrmse']:.4f} for the "
+            f"forest on folds 2-{len(result['ensemble_fold_nrmse']) + 1}, weights fitted on earlier folds "
+            f"(NNLS weights on all folds: {weights})"
+        )
+        if result.get('baseline_nrmse'):
+            baselines = ', '.join(f'{name} {value:.4f}' for name, value in result['baseline_nrmse'].items())
+            self.log(f"Baseline NRMSE: {baselines}")
+        os.makedirs(self.paths.model_dir, exist_ok=True)
+        self.cache.materialise(
+            os.path.join(self.paths.model_dir, 'best_model.pkl'), self.trained,
+            lambda result, path: joblib.dump(result['model'], path),
+        )
+        # Step 20: the stacked ensemble
+        self.cache.materialise(
+            os.path.join(self.paths.model_dir, 'ensemble_model.pkl'), self.trained,
+            lambda result, path: save_ensemble(result['ensemble'], path),
+        )
+
+        # The same models as memory-mappable artifacts with their feature schema
+        def artifact_writer(model_key, metrics):
+            def write(result, path):
+                save_artifact(
+                    path, result[model_key], result['feature_columns'],
+                    training_window=result.get('training_window'),
+                    metrics={name: result[name] for name in metrics},
+                    code_version=self.trained.key,
+                    extra={'building': self.paths.name, 'n_rows': result['n_rows']},
+                )
+            return write
+
+        self.cache.materialise(
+            os.path.join(self.paths.model_dir, 'best_model'), self.trained,
+            artifact_writer('model', ['nrmse', 'fold_nrmse', 'baseline_nrmse']),
+        )
+        self.cache.materialise(
+            os.path.join(self.paths.model_dir, 'ensemble_model'), self.trained,
+            artifact_writer(
+                'ensemble', ['ensemble_nrmse', 'ensemble_fold_nrmse', 'ensemble_reference_nrmse', 'ensemble_weights']
+            ),
+        )
+        return score
+
+    def predict(self, hours: int | None = None) -> pd.DataFrame | None:
+        """Step 21: predict the test horizon and write the submission files.
+
+        With ``hours`` only the first ``hours`` rows of the horizon are
+        predicted and returned; nothing is written. Returns ``None`` when
+        there is no test data.
+        """
+        if self.predictions is None:
+            self.log("Test data not found; nothing to predict.")
+            return None
+
+        if hours is not None:
+            # Rolls forward only as far as needed
+            return self._forecast(self.trained.value['model'], self._test_timestamps().iloc[:hours])
+
+        os.makedirs(self.paths.submissions_dir, exist_ok=True)
+        written = [
+            self.cache.materialise(
+                os.path.join(self.paths.submissions_dir, f'submission_{kind}.csv'), self.predictions,
+                lambda preds, path, kind=kind: save_csv_data(pd.DataFrame({'prediction': preds[kind]}), path),
+            )
+            for kind in ('final', 'ensemble')
+        ]
+        if any(written):
+            self.log(f"Predictions saved to {self.paths.submissions_dir}")
+        return pd.DataFrame({'prediction': self.predictions.value['final']})
+
+    def evaluate(self, figures_dir: str | None = None) -> dict:
+        """Report the validation score, optionally plotting it into ``figures_dir``."""
+
+        result = self.trained.value
+        self.log(f"Validation NRMSE: {result['nrmse']:.4f} ({result['n_rows']} training rows)")
+        if figures_dir is not None:
+            from src.evaluation.visualization import plot_feature_importance, plot_predictions, plot_residuals
+
+            plot_predictions(result['y_valid'], result['y_pred'], os.path.join(figures_dir, 'predictions.png'))
+            plot_residuals(result['y_valid'], result['y_pred'], os.path.join(figures_dir, 'residuals.png'))
+            plot_feature_importance(
+                result['model'].feature_importances_, result['feature_columns'],
+                os.path.join(figures_dir, 'feature_importance.png'),
+            )
+            self.log(f"Figures saved to {figures_dir}")
+        return {'nrmse': result['nrmse'], 'n_rows': result['n_rows']}
+
+
+def run_building(
+    paths: BuildingPaths,
+    config: dict,
+    weather_df: pd.DataFrame | WeatherStore | None = None,
+    verbose: bool = True,
+    cv_n_jobs: int | None = None,
+) -> dict | None:
+    """Run the full pipeline for one building.
+
+    See :class:`BuildingPipeline` for the parameters.
+
+    Returns
+    -------
+    dict | None
+        Summary with the building name, number of hourly training rows,
+        validation NRMSE, elapsed seconds and stage cache statuses, or
+        ``None`` if the telemetry file is missing.
+    """
+    start = time.perf_counter()
+    pipeline = BuildingPipeline(paths, config, weather_df=weather_df, verbose=verbose, cv_n_jobs=cv_n_jobs)
+    if not pipeline.ingest():
+        return None
+    pipeline.features()
+    score = pipeline.train()
+    pipeline.predict()
+
+    pipeline.log(pipeline.cache.summary())
+    return {
+        'building': paths.name,
+        'n_hours': pipeline.trained.value['n_rows'],
+        'nrmse': score,
+        'seconds': time.perf_counter() - start,
+        'stages': {stage.name: stage.status for stage in pipeline.cache.stages},
+    }
+
+
+def _init_worker(weather_dir: str) -> None:
+    """Process-pool initializer: map the shared weather store and pin BLAS/OpenMP to one thread."""
+
+    global _WORKER_WEATHER
+    _WORKER_WEATHER = WeatherStore.load(weather_dir)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:  # pragma: no cover - optional dependency
+        return
+    threadpool_limits(1)
+
+
+def _run_worker(paths: BuildingPaths, config: dict) -> dict | None:
+    # The pool already uses every core; fit the CV folds in-process
+    return run_building(paths, config, weather_df=_WORKER_WEATHER, verbose=False, cv_n_jobs=1)
+
+
+def run_portfolio(
+    building_files: Iterable[str],
+    config: dict,
+    max_workers: int | None = None,
+) -> list[dict]:
+    """Run :func:`run_building` for several buildings in a process pool.
+
+    Parameters
+    ----------
+    building_files:
+        Telemetry CSVs or glob patterns, one file per building.
+    config:
+        Configuration as returned by :func:`src.utils.config.load_config`.
+    max_workers:
+        Maximum concurrent buildings. Defaults to ``pipeline.max_workers``
+        from the config, or the CPU count when that is unset.
+
+    Returns
+    -------
+    list[dict]
+        One summary per building (see :func:`run_building`), in input order.
+        Buildings that failed carry an ``error`` entry instead of metrics.
+    """
+    files = expand_building_paths(building_files)
+    if not files:
+        raise FileNotFoundError(f"No building telemetry files match {list(building_files)}")
+
+    if max_workers is None:
+        max_workers = config.get('pipeline', {}).get('max_workers') or os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(files)))
+
+    # Build (or reuse) the on-disk store once; workers memory-map it read-only
+    weather_dir = WeatherStore.cached_path(*configured_weather_paths(config), cache_dir=config['data']['cache'])
+    jobs = [portfolio_building_paths(config, f) for f in files]
+    results: list[dict | None] = [None] * len(jobs)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(str(weather_dir),),
+    ) as pool:
+        futures = {pool.submit(_run_worker, paths, config): i for i, paths in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result() or {'building': jobs[i].name, 'error': 'telemetry not found'}
+            except Exception as e:  # keep the rest of the portfolio running
+                results[i] = {'building': jobs[i].name, 'error': repr(e)}
+    return results
@@ -0,0 +1,189 @@
+"""Content-addressed cache for pipeline stages.
+
+Each stage declares its inputs: source files (by content digest), a config
+section, the code it runs (by source digest) and the keys of upstream stages.
+The hash of those inputs is the stage key, and the stage output is stored
+under it. A rerun whose inputs are unchanged loads the stored output, or
+skips the stage entirely when nothing downstream needs its value. Output
+files such as the processed CSVs are only rewritten when the key that
+produced them changes or the file was modified.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Iterable
+
+import joblib
+
+from src.data_processing.ingest import cached_file_digest
+
+# One record per materialised output file, so concurrent writers never share a file
+_WRITTEN_DIR = "written"
+
+
+def code_version(*modules: ModuleType) -> str:
+    """Digest of the source files of ``modules``."""
+
+    h = hashlib.blake2b(digest_size=16)
+    for module in modules:
+        h.update(module.__name__.encode())
+        h.update(Path(module.__file__).read_bytes())
+    return h.hexdigest()
+
+
+class Stage:
+    """A cached pipeline step whose value is resolved on first access.
+
+    ``status`` is ``"skipped"`` until the value is needed, then ``"hit"`` when
+    it was loaded from the cache or ``"miss"`` when it had to be computed.
+    """
+
+    def __init__(self, cache: 'StageCache', name: str, key: str, compute: Callable[[], Any]):
+        self.cache = cache
+        self.name = name
+        self.key = key
+        self._compute = compute
+        self._value = None
+        self.status = "skipped"
+
+    @property
+    def value(self) -> Any:
+        if self.status == "skipped":
+            self._value, hit = self.cache._load_or_compute(self.name, self.key, self._compute)
+            self.status = "hit" if hit else "miss"
+        return self._value
+
+
+class StageCache:
+    """Store of stage outputs keyed by the hash of their declared inputs.
+
+    Parameters
+    ----------
+    root:
+        Directory holding one sub-directory of pickled outputs per stage.
+    enabled:
+        When ``False`` every stage is recomputed and nothing is stored.
+    digest_cache_dir:
+        Ingest cache directory whose index is reused for file digests.
+    max_entries:
+        Number of most recent outputs kept per stage and scope.
+    scope:
+        Sub-directory of every stage's directory for this user of the cache
+        (the building). Portfolio buildings share ``root``; scoping keeps one
+        building's outputs from evicting another's when pruning.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        enabled: bool = True,
+        digest_cache_dir: str | None = None,
+        max_entries: int = 20,
+        scope: str | None = None,
+    ):
+        self.root = Path(root)
+        self.enabled = enabled
+        self.digest_cache_dir = digest_cache_dir
+        self.max_entries = max_entries
+        self.scope = scope
+        self.stages: list[Stage] = []
+
+    def key(
+        self,
+        name: str,
+        files: Iterable[str] = (),
+        config: Any = None,
+        code: Iterable[ModuleType] = (),
+        upstream: Iterable[Stage] = (),
+    ) -> str:
+        """Hash the declared inputs of a stage."""
+
+        h = hashlib.blake2b(digest_size=16)
+        h.update(name.encode())
+        for path in files:
+            h.update(str(path).encode())
+            h.update(cached_file_digest(str(path), self.digest_cache_dir).encode())
+        h.update(json.dumps(config, sort_keys=True, default=str).encode())
+        h.update(code_version(*code).encode())
+        for stage in upstream:
+            h.update(stage.key.encode())
+        return h.hexdigest()
+
+    def stage(
+        self,
+        name: str,
+        compute: Callable[[], Any],
+        files: Iterable[str] = (),
+        config: Any = None,
+        code: Iterable[ModuleType] = (),
+        upstream: Iterable[Stage] = (),
+    ) -> Stage:
+        """Declare a stage; its value is computed or loaded only when accessed."""
+
+        stage = Stage(self, name, self.key(name, files, config, code, upstream), compute)
+        self.stages.append(stage)
+        return stage
+
+    def materialise(self, path: str, stage: Stage, writer: Callable[[Any, str], None]) -> bool:
+        """Write ``stage``'s value to ``path`` unless it already holds that exact output.
+
+        Returns ``True`` when the file was (re)written.
+        """
+        target = Path(path)
+        record_path = self._record_path(target)
+        try:
+            entry = json.loads(record_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            entry = None
+        if self.enabled and entry and target.exists():
+            stat = target.stat()
+            if (entry["key"], entry["size"], entry["mtime_ns"]) == (stage.key, stat.st_size, stat.st_mtime_ns):
+                return False
+
+        writer(stage.value, str(target))
+        if self.enabled:
+            stat = target.stat()
+            entry = {"path": str(target), "key": stage.key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            self._atomic_write(record_path, json.dumps(entry, indent=2).encode())
+        return True
+
+    def summary(self) -> str:
+        """One line listing every declared stage and whether it hit the cache."""
+
+        return "Stage cache: " + ", ".join(f"{s.name}={s.status}" for s in self.stages)
+
+    def _record_path(self, target: Path) -> Path:
+        digest = hashlib.blake2b(os.path.abspath(target).encode(), digest_size=16).hexdigest()
+        return self.root / _WRITTEN_DIR / f"{digest}.json"
+
+    def _load_or_compute(self, name: str, key: str, compute: Callable[[], Any]) -> tuple[Any, bool]:
+        directory = self.root / name if self.scope is None else self.root / name / self.scope
+        path = directory / f"{key}.pkl"
+        if self.enabled and path.exists():
+            os.utime(path)  # keep recently used entries when pruning
+            return joblib.load(path), True
+        value = compute()
+        if self.enabled:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+            joblib.dump(value, tmp)
+            os.replace(tmp, path)
+            self._prune(path.parent)
+        return value, False
+
+    def _prune(self, directory: Path) -> None:
+        entries = sorted(directory.glob("*.pkl"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in entries[self.max_entries:]:
+            stale.unlink(missing_ok=True)
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
@@ -0,0 +1,190 @@
+"""Micro-batching of concurrent requests in front of a vectorised handler.
+
+Requests wait in a bounded :class:`asyncio.Queue`. One worker takes the
+first waiting request, collects whatever else arrives within ``window_ms``
+(up to ``max_batch`` requests), and hands the whole batch to the handler in a
+worker thread, so the event loop keeps accepting requests meanwhile.
+Requests that arrive while a batch is running queue up and form the next
+batch, so batches grow with the load. A full queue rejects new requests
+(:class:`Overloaded`) instead of letting latency grow without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+
+class Overloaded(Exception):
+    """The request queue is full; the client should retry later."""
+
+
+class LatencyStats:
+    """Counters and a sliding window of request latencies and batch sizes.
+
+    Parameters
+    ----------
+    window:
+        Number of most recent requests (and batches) the percentiles cover.
+    """
+
+    def __init__(self, window: int = 10_000):
+        self.started = time.monotonic()
+        self.latencies_ms: deque[float] = deque(maxlen=window)
+        self.batch_sizes: deque[int] = deque(maxlen=window)
+        self.batch_ms: deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.server_errors = 0
+        self.rejected = 0
+
+    def record_request(self, seconds: float, error: bool = False, server_error: bool = False) -> None:
+        self.requests += 1
+        self.errors += error or server_error
+        self.server_errors += server_error
+        self.latencies_ms.append(seconds * 1000)
+
+    def record_batch(self, size: int, seconds: float) -> None:
+        self.batch_sizes.append(size)
+        self.batch_ms.append(seconds * 1000)
+
+    def snapshot(self, percentiles: Sequence[float] = (50, 90, 95, 99)) -> dict[str, Any]:
+        """Counters and latency percentiles (milliseconds) as a JSON-ready dict."""
+
+        def summary(values, unit):
+            if not values:
+                return {}
+            data = np.fromiter(values, dtype=np.float64, count=len(values))
+            out = {f'p{p:g}{unit}': float(v) for p, v in zip(percentiles, np.percentile(data, percentiles))}
+            out[f'mean{unit}'] = float(data.mean())
+            out[f'max{unit}'] = float(data.max())
+            return out
+
+        uptime = time.monotonic() - self.started
+        return {
+            'uptime_s': uptime,
+            'requests': self.requests,
+            'errors': self.errors,
+            'server_errors': self.server_errors,
+            'rejected': self.rejected,
+            'requests_per_s': self.requests / uptime if uptime > 0 else 0.0,
+            'latency': summary(self.latencies_ms, '_ms'),
+            'batches': len(self.batch_sizes),
+            'batch_size': summary(self.batch_sizes, ''),
+            'batch_time': summary(self.batch_ms, '_ms'),
+        }
+
+
+class MicroBatcher:
+    """Coalesce concurrent calls of :meth:`submit` into calls of ``handler``.
+
+    Parameters
+    ----------
+    handler:
+        ``handler(items) -> results`` with one result per item. A result that
+        is an exception instance is raised to that item's caller only. When
+        the handler itself raises, the batch is retried item by item, so one
+        bad item does not fail the others.
+    window_ms:
+        How long the first request of a batch waits for more to arrive.
+    max_batch:
+        Largest batch handed to ``handler``.
+    queue_size:
+        Requests that may wait; beyond that :meth:`submit` raises
+        :class:`Overloaded`.
+    stats:
+        Where batch sizes and timings are recorded.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list], list],
+        window_ms: float = 5.0,
+        max_batch: int = 64,
+        queue_size: int = 1024,
+        stats: LatencyStats | None = None,
+    ):
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.stats = stats or LatencyStats()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch')
+        self._worker: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, item):
+        """Queue ``item`` and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            raise Overloaded(f"{self.queue.maxsize} requests already waiting") from None
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            # Take what is already waiting without yielding
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(batch) >= self.max_batch or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _one_by_one(self, items: list) -> list:
+        results = []
+        for item in items:
+            try:
+                results.extend(self.handler([item]))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.handler, items)
+            except Exception as exc:  # the whole batch failed
+                if len(items) == 1:
+                    results = [exc]
+                else:
+                    results = await loop.run_in_executor(self._executor, self._one_by_one, items)
+            self.stats.record_batch(len(batch), time.perf_counter() - start)
+            for (_, future), result in zip(batch, results):
+                if future.done():  # the caller went away
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
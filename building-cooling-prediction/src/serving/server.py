@@ -0,0 +1,177 @@
+"""Minimal asyncio HTTP/1.1 front end of the forecast service.
+
+Endpoints (JSON in and out, keep-alive connections):
+
+``POST /forecast``
+    ``{"building": "Building_X", "start": "2024-01-01 00:00", "hours": 24}``
+    returns ``{"building", "timestamps", "predictions"}``. ``building`` may
+    be omitted when one building is served and ``start`` defaults to the
+    hour after the history. Answers 400/404 for invalid requests, 503
+    (with ``Retry-After``) when the request queue is full and 500 when the
+    forecast itself fails.
+``GET /stats``
+    Request counters (``server_errors`` counts the 500s), latency
+    percentiles and batch sizes.
+``GET /health``
+    The loaded buildings and models.
+
+The server listens on TCP or on a Unix socket, and uses only the standard
+library and NumPy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from http import HTTPStatus
+
+from src.serving.batcher import LatencyStats, MicroBatcher, Overloaded
+from src.serving.service import ForecastRequest, ForecastService, RequestError
+
+MAX_BODY_BYTES = 1 << 20
+
+
+def _response(status: int, payload, keep_alive: bool, extra_headers: dict | None = None) -> bytes:
+    body = json.dumps(payload).encode()
+    headers = {
+        'Content-Type': 'application/json',
+        'Content-Length': str(len(body)),
+        'Connection': 'keep-alive' if keep_alive else 'close',
+        **(extra_headers or {}),
+    }
+    head = f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+    head += ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+    return head.encode() + b'\r\n' + body
+
+
+class ForecastServer:
+    """HTTP front end over a :class:`MicroBatcher` of ``service.forecast_batch``.
+
+    Parameters
+    ----------
+    service:
+        The loaded service.
+    window_ms, max_batch, queue_size:
+        Micro-batching settings, see :class:`~src.serving.batcher.MicroBatcher`.
+    """
+
+    def __init__(self, service: ForecastService, window_ms: float = 5.0, max_batch: int = 64, queue_size: int = 1024):
+        self.service = service
+        self.stats = LatencyStats()
+        self.settings = {'window_ms': window_ms, 'max_batch': max_batch, 'queue_size': queue_size}
+        self.batcher: MicroBatcher | None = None
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[int, object, dict]:
+        if path == '/forecast' and method == 'POST':
+            try:
+                payload = json.loads(body or b'{}')
+                request = ForecastRequest.from_json(payload, self.service.default_building)
+                return 200, await self.batcher.submit(request), {}
+            except json.JSONDecodeError as exc:
+                return 400, {'error': f'Invalid JSON: {exc}'}, {}
+            except RequestError as exc:
+                return exc.status, {'error': str(exc)}, {}
+            except Overloaded as exc:
+                return 503, {'error': f'Overloaded: {exc}'}, {'Retry-After': '1'}
+            except Exception as exc:
+                print(f"Forecast failed: {exc!r}", file=sys.stderr, flush=True)
+                return 500, {'error': f'Forecast failed: {type(exc).__name__}'}, {}
+        if path == '/stats' and method == 'GET':
+            stats = self.stats.snapshot()
+            stats['queue_depth'] = self.batcher.queue.qsize()
+            stats['settings'] = self.settings
+            return 200, stats, {}
+        if path == '/health' and method == 'GET':
+            return 200, {'status': 'ok', 'buildings': self.service.describe()}, {}
+        if path in ('/forecast', '/stats', '/health'):
+            return 405, {'error': f'{method} not allowed on {path}'}, {}
+        return 404, {'error': f'No endpoint {path}'}, {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one connection until it closes."""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not request_line.strip():
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    writer.write(_response(400, {'error': 'Malformed request line'}, keep_alive=False))
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    writer.write(_response(400, {'error': 'Invalid Content-Length'}, keep_alive=False))
+                    break
+                if length > MAX_BODY_BYTES:
+                    writer.write(_response(413, {'error': 'Request body too large'}, keep_alive=False))
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+
+                status, payload, extra = await self._route(method.upper(), target.split('?', 1)[0], body)
+                writer.write(_response(status, payload, keep_alive, extra))
+                await writer.drain()
+                if target.startswith('/forecast'):
+                    elapsed = time.perf_counter() - start
+                    self.stats.record_request(elapsed, error=status >= 400, server_error=status == 500)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080, unix_socket: str | None = None) -> None:
+        """Listen until cancelled (or SIGINT/SIGTERM)."""
+        self.batcher = MicroBatcher(self.service.forecast_batch, stats=self.stats, **self.settings)
+        self.batcher.start()
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            server = await asyncio.start_unix_server(self.handle, path=unix_socket)
+            where = f'unix:{unix_socket}'
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            where = ', '.join(f'http://{s.getsockname()[0]}:{s.getsockname()[1]}' for s in server.sockets)
+        print(f"Serving forecasts for {', '.join(self.service.buildings)} on {where}", flush=True)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):  # pragma: no cover - platform dependent
+                pass
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            await self.batcher.stop()
+            if unix_socket and os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+
+
+def run_server(service: ForecastService, host: str = '127.0.0.1', port: int = 8080, unix_socket: str | None = None,
+               window_ms: float = 5.0, max_batch: int = 64, queue_size: int = 1024) -> None:
+    """Run a :class:`ForecastServer` in a new event loop until interrupted."""
+    server = ForecastServer(service, window_ms=window_ms, max_batch=max_batch, queue_size=queue_size)
+    asyncio.run(server.serve(host, port, unix_socket))
@@ -0,0 +1,218 @@
+"""Forecasts for several buildings from models and state loaded once.
+
+:class:`ForecastService` keeps, per building, the compiled model artifact
+(memory-mapped), the weather store and a feature state seeded with the
+building's hourly history. A batch of requests is answered with one
+:meth:`~src.models.forecasting.RecursiveForecaster.forecast_seeded` call per
+building: every request rolls forward from its own copy of the seeded state,
+and each step predicts the next hour of all of them in one ``predict`` call.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping
+
+import pandas as pd
+
+from src.data_processing.load_data import parse_timestamps
+
+HOUR = pd.Timedelta(hours=1)
+
+
+class RequestError(ValueError):
+    """A request that cannot be answered as asked (HTTP 400/404)."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class ForecastRequest:
+    """Predict ``hours`` hours of ``building`` from ``start`` on."""
+
+    building: str
+    start: pd.Timestamp
+    hours: int
+
+    @classmethod
+    def from_json(cls, payload: Mapping[str, Any], default_building: str | None = None) -> 'ForecastRequest':
+        """Parse ``{"building": ..., "start": ..., "hours": ...}``.
+
+        ``building`` may be left out when the service has a single building;
+        ``start`` defaults to the hour after its history.
+        """
+        if not isinstance(payload, Mapping):
+            raise RequestError("Expected a JSON object")
+        building = payload.get('building', default_building)
+        if building is None:
+            raise RequestError("Missing 'building'")
+        try:
+            hours = int(payload.get('hours', 24))
+        except (TypeError, ValueError):
+            raise RequestError(f"'hours' must be an integer, got {payload.get('hours')!r}") from None
+        start = payload.get('start')
+        if start is not None:
+            if not isinstance(start, str):
+                raise RequestError(f"'start' must be a timestamp string, got {start!r}")
+            try:
+                start = parse_timestamps(pd.Series([start])).iloc[0]
+            except (TypeError, ValueError, OverflowError):
+                raise RequestError(f"Cannot parse 'start' {payload.get('start')!r}") from None
+            if pd.isna(start):
+                raise RequestError(f"Cannot parse 'start' {payload.get('start')!r}")
+            # The histories are in local time without a zone, so an offset cannot be mapped onto them
+            if start.tzinfo is not None:
+                raise RequestError(f"'start' must be local time without a UTC offset, got {payload.get('start')!r}")
+        return cls(str(building), start, hours)
+
+
+@dataclass
+class BuildingForecaster:
+    """What one building's forecasts need, loaded once."""
+
+    name: str
+    forecaster: Any
+    state: Any
+    last: pd.Timestamp
+    artifact: Any
+
+
+class ForecastService:
+    """Answer batches of :class:`ForecastRequest` for the loaded buildings.
+
+    Parameters
+    ----------
+    buildings:
+        The loaded buildings.
+    max_hours:
+        Longest horizon (from the end of the history) a request may cover.
+    """
+
+    def __init__(self, buildings: Iterable[BuildingForecaster], max_hours: int = 24 * 14):
+        self.buildings = {b.name: b for b in buildings}
+        self.max_hours = max_hours
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict,
+        telemetry_paths: Iterable[str] = (),
+        model: str = 'ensemble_model',
+        max_hours: int = 24 * 14,
+    ) -> 'ForecastService':
+        """Load the trained artifacts and histories of the configured buildings.
+
+        Parameters
+        ----------
+        config:
+            Configuration as returned by :func:`src.utils.config.load_config`.
+        telemetry_paths:
+            Portfolio buildings to serve; default the building in the config.
+        model:
+            Artifact directory name under each building's model directory
+            (written by ``python main.py train``).
+        max_hours:
+            See the class parameters.
+        """
+        from src.models.artifacts import load_artifact
+        from src.pipeline.runner import BuildingPipeline, default_building_paths, portfolio_building_paths
+
+        paths = [portfolio_building_paths(config, p) for p in telemetry_paths] or [default_building_paths(config)]
+        buildings = []
+        for building_paths in paths:
+            pipeline = BuildingPipeline(building_paths, config, verbose=False)
+            artifact_dir = os.path.join(building_paths.model_dir, model)
+            try:
+                artifact = load_artifact(artifact_dir)
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"No trained model for {building_paths.name} in {artifact_dir}; run `python main.py train` first"
+                ) from None
+            forecaster = pipeline.forecaster(artifact.model, artifact.feature_columns)
+            state, last = forecaster.seed(pipeline.history(), timestamp_col='record_timestamp')
+            buildings.append(BuildingForecaster(building_paths.name, forecaster, state, last, artifact))
+        return cls(buildings, max_hours=max_hours)
+
+    @property
+    def default_building(self) -> str | None:
+        return next(iter(self.buildings)) if len(self.buildings) == 1 else None
+
+    def describe(self) -> dict[str, Any]:
+        """Loaded buildings with the end of their history and their model's manifest."""
+        return {
+            name: {
+                'history_end': b.last.isoformat(),
+                'model': str(b.artifact.path),
+                'training_window': b.artifact.training_window,
+                'metrics': b.artifact.metrics,
+            }
+            for name, b in self.buildings.items()
+        }
+
+    def _hours(self, request: ForecastRequest) -> pd.DatetimeIndex:
+        building = self.buildings.get(request.building)
+        if building is None:
+            raise RequestError(f"Unknown building {request.building!r}", status=404)
+        first = building.last + HOUR
+        start = first if request.start is None else request.start
+        if start < first:
+            raise RequestError(f"'start' must be after the history of {request.building}, which ends at {building.last}")
+        if start.floor('h') != start:
+            raise RequestError("'start' must be on the hour")
+        if request.hours < 1:
+            raise RequestError("'hours' must be positive")
+        # Checked before building the index, which overflows for absurd horizons
+        if (start - building.last) // HOUR + request.hours - 1 > self.max_hours:
+            raise RequestError(f"Forecasts reach at most {self.max_hours} hours past {building.last}")
+        return pd.date_range(start, periods=request.hours, freq='h')
+
+    def forecast_batch(self, requests: list[ForecastRequest]) -> list[dict | Exception]:
+        """Forecast every request; failed ones get their exception instead of a result.
+
+        A request that fails never fails the others of its batch: when a
+        building's batched forecast raises, its requests are retried one by
+        one so that only the offending request gets the error.
+        """
+
+        results: list[dict | Exception] = [None] * len(requests)
+        by_building: dict[str, dict[int, pd.DatetimeIndex]] = {}
+        for i, request in enumerate(requests):
+            try:
+                hours = self._hours(request)
+            except Exception as exc:
+                results[i] = exc
+            else:
+                by_building.setdefault(request.building, {})[i] = hours
+
+        for name, horizons in by_building.items():
+            try:
+                forecasts = self._forecast(name, horizons)
+            except Exception as exc:
+                if len(horizons) == 1:
+                    forecasts = {i: exc for i in horizons}
+                else:
+                    forecasts = {}
+                    for i, hours in horizons.items():
+                        try:
+                            forecasts.update(self._forecast(name, {i: hours}))
+                        except Exception as single_exc:
+                            forecasts[i] = single_exc
+            for i, forecast in forecasts.items():
+                results[i] = forecast
+        return results
+
+    def _forecast(self, name: str, horizons: dict[int, pd.DatetimeIndex]) -> dict[int, dict]:
+        building = self.buildings[name]
+        seeded = {i: (building.state.copy(), building.last) for i in horizons}
+        frames = building.forecaster.forecast_seeded(seeded, horizons)
+        return {
+            i: {
+                'building': name,
+                'timestamps': [t.isoformat() for t in frame['timestamp']],
+                'predictions': frame['prediction'].tolist(),
+            }
+            for i, frame in frames.items()
+        }
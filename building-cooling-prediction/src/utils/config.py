@@ -1 +1,44 @@
-  
+import os
+import yaml
+
+
+def project_dir() -> str:
+    """Return the project directory (the one containing ``config.yaml``)."""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_config(config_path: str | None = None) -> dict:
+    """
+    Loads ``config.yaml`` and makes every configured file path absolute.
+
+    Paths are resolved relative to the directory holding the config file, so
+    the pipeline behaves the same regardless of the working directory.
+
+    Args:
+        config_path: Path to the config file. Defaults to the project's
+            ``config.yaml``.
+
+    Returns:
+        The parsed configuration with absolute paths.
+    """
+    config_path = os.path.abspath(config_path or os.path.join(project_dir(), "config.yaml"))
+    base_dir = os.path.dirname(config_path)
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    def absolute(path: str) -> str:
+        return os.path.join(base_dir, path)
+
+    data = config['data']
+    for key, path in data['raw'].items():
+        data['raw'][key] = absolute(path)
+    for key, path in data['processed'].items():
+        data['processed'][key] = absolute(path)
+    for key in ('submissions', 'cache', 'stage_cache'):
+        if key in data:
+            data[key] = absolute(data[key])
+    for key, path in config.get('models', {}).items():
+        config['models'][key] = absolute(path)
+    for key, path in config.get('reports', {}).items():
+        config['reports'][key] = absolute(path)
+    return config
@@ -1,81 +1,266 @@
 import pandas as pd
 import yaml
+from dataclasses import dataclass
 from pathlib import Path
-from src.feature_engineering.time_features import create_time_features
-from src.feature_engineering.lag_features import create_lag_features
-from src.feature_engineering.weather_features import create_weather_features
-from src.feature_engineering.technical_features import create_technical_features
-from src.data_processing.load_data import load_csv_data, resolve_path
-from src.data_processing.external_data import load_weather_data, merge_with_weather
+from src.feature_engineering.feature_matrix import FeatureMatrix, build_feature_matrix
+from src.feature_engineering.registry import BASE_GROUPS, FeatureContext, compute_features
+from src.data_processing.load_data import parse_timestamps, resolve_path
+from src.data_processing.ingest import load_cached_csv
+from src.data_processing.external_data import WeatherStore, get_weather_store
+
+def _load_weather(
+    weather_paths: list[str] | None,
+    config_path: str | None,
+    weather_df: pd.DataFrame | WeatherStore | None,
+) -> pd.DataFrame | WeatherStore:
+    """The weather to merge: ``weather_df``, or the store of the given or configured files."""
+    if weather_df is not None:
+        return weather_df
+    if weather_paths is None:
+        # Load from config.yaml if not explicitly provided
+        cfg_file = resolve_path(config_path or "config.yaml")
+        if not Path(cfg_file).exists():
+            raise FileNotFoundError(f"Config file not found at {cfg_file}")
+        with open(cfg_file, "r") as f:
+            cfg = yaml.safe_load(f)
+        try:
+            weather_paths = [
+                cfg["data"]["raw"]["weather_2023"],
+                cfg["data"]["raw"]["weather_2024_jan"],
+            ]
+        except KeyError as e:
+            raise KeyError(
+                "Missing weather paths in config.yaml under data.raw.weather_2023/weather_2024_jan"
+            ) from e
+    return get_weather_store(*weather_paths)
+
+
+def _load_features_input(data_path: str | pd.DataFrame, timestamp_col: str) -> tuple[pd.DataFrame, str]:
+    """Loads the data and returns it with its (parsed) timestamp column."""
+    # Timestamps come back already parsed from the columnar cache
+    if isinstance(data_path, pd.DataFrame):
+        df = data_path.copy()
+    else:
+        df = load_cached_csv(data_path)
+    timestamp_col = _find_timestamp_col(df, timestamp_col)
+    df[timestamp_col] = parse_timestamps(df[timestamp_col])
+    return df, timestamp_col
+
+
+def prepare_base_features(
+    data_path: str | pd.DataFrame,
+    timestamp_col: str,
+    weather_paths: list[str] | None = None,
+    config_path: str | None = None,
+    weather_df: pd.DataFrame | WeatherStore | None = None,
+    weather_resolution: str = 'daily',
+    feature_names: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Loads the data and adds the time, weather and technical features.
+
+    These are the features the lag and interaction features are derived
+    from; see :func:`create_features` for the other arguments.
+
+    Args:
+        feature_names: Only compute these base features (and what they
+            depend on); default all.
+    """
+    df, timestamp_col = _load_features_input(data_path, timestamp_col)
+    context = FeatureContext(
+        timestamp_col,
+        weather=_load_weather(weather_paths, config_path, weather_df),
+        weather_resolution=weather_resolution,
+    )
+    return compute_features(df, context, feature_names, groups=BASE_GROUPS)
+
 
 def create_features(
-    data_path: str,
+    data_path: str | pd.DataFrame,
     timestamp_col: str,
     cols_to_lag: list[str],
     window_sizes: list[int],
     weather_paths: list[str] | None = None,
     config_path: str | None = None,
+    weather_df: pd.DataFrame | WeatherStore | None = None,
+    weather_resolution: str = 'daily',
+    feature_names: list[str] | None = None,
 ) -> pd.DataFrame:
     """
     Master function to create all features.
 
+    The features are computed by the groups of the feature registry
+    (:mod:`src.feature_engineering.registry`) in dependency order.
+
     Args:
-        data_path: Path to the raw data.
+        data_path: Path to the raw data, or an already loaded DataFrame.
         timestamp_col: Name of the timestamp column.
         cols_to_lag: List of columns to create lag features for.
         window_sizes: List of window sizes for rolling features.
+        weather_paths: Weather CSVs to merge; read from config.yaml if omitted.
+        config_path: Config file used to look up ``weather_paths``.
+        weather_df: Already loaded weather data or a shared :class:`WeatherStore`;
+            skips reading weather files.
+        weather_resolution: ``'daily'`` or ``'hourly'`` (see
+            :func:`~src.data_processing.external_data.merge_with_weather`).
+        feature_names: Only compute these features and the ones they are
+            derived from, e.g. the columns a model was trained on. Defaults
+            to every feature.
 
     Returns:
         DataFrame with all features.
     """
-    # Load data
-    df = load_csv_data(data_path)
-
-    # If provided timestamp_col is missing, try common alternatives
-    if timestamp_col not in df.columns:
-        for candidate in (timestamp_col, 'prediction_time', 'record_timestamp', 'timestamp', 'datetime'):
-            if candidate in df.columns:
-                timestamp_col = candidate
-                break
-        else:
-            raise KeyError(
-                f"Timestamp column '{timestamp_col}' not found in data and no common alternatives detected."
-            )
+    df, timestamp_col = _load_features_input(data_path, timestamp_col)
+    context = FeatureContext(
+        timestamp_col,
+        cols_to_lag,
+        window_sizes,
+        weather=_load_weather(weather_paths, config_path, weather_df),
+        weather_resolution=weather_resolution,
+    )
+    return compute_features(df, context, feature_names)
 
-    # Create time features
-    df = create_time_features(df, timestamp_col)
 
-    # Load and merge weather data
-    if weather_paths is None:
-        # Load from config.yaml if not explicitly provided
-        cfg_file = resolve_path(config_path or "config.yaml")
-        if not Path(cfg_file).exists():
-            raise FileNotFoundError(f"Config file not found at {cfg_file}")
-        with open(cfg_file, "r") as f:
-            cfg = yaml.safe_load(f)
-        try:
-            weather_paths = [
-                cfg["data"]["raw"]["weather_2023"],
-                cfg["data"]["raw"]["weather_2024_jan"],
-            ]
-        except KeyError as e:
-            raise KeyError(
-                "Missing weather paths in config.yaml under data.raw.weather_2023/weather_2024_jan"
-            ) from e
+@dataclass
+class JointFeatures:
+    """Train and test features computed over one continuous timeline.
 
-    weather_df = load_weather_data(*weather_paths)
-    df = merge_with_weather(df, weather_df, timestamp_col)
+    ``frame`` holds the training rows followed by the test rows; the test
+    period starts at row ``split_index`` (time ``split_time``).
+    """
+
+    frame: pd.DataFrame
+    split_index: int
+    split_time: pd.Timestamp
+    train_columns: list[str]
+    test_columns: list[str]
+    timestamp_col: str
+    test_timestamp_col: str
+
+    @property
+    def train(self) -> pd.DataFrame:
+        """Training rows with the columns ``create_features`` gives the training data."""
+        return self.frame.iloc[:self.split_index][self.train_columns].reset_index(drop=True)
 
-    # Create technical features
-    df = create_technical_features(df)
+    @property
+    def test(self) -> pd.DataFrame:
+        """Test rows with the columns ``create_features`` gives the test data."""
+        test = self.frame.iloc[self.split_index:][self.test_columns].reset_index(drop=True)
+        return test.rename(columns={self.timestamp_col: self.test_timestamp_col})
 
-    # Create lag features
-    df = create_lag_features(df, cols_to_lag, window_sizes)
 
-    # Create weather features
-    df = create_weather_features(df)
+def _find_timestamp_col(df: pd.DataFrame, timestamp_col: str) -> str:
+    for candidate in (timestamp_col, 'prediction_time', 'record_timestamp', 'timestamp', 'datetime'):
+        if candidate in df.columns:
+            return candidate
+    raise KeyError(
+        f"Timestamp column '{timestamp_col}' not found in data and no common alternatives detected."
+    )
+
 
-    return df
+def create_joint_features(
+    train_data: str | pd.DataFrame,
+    test_data: str | pd.DataFrame,
+    timestamp_col: str,
+    cols_to_lag: list[str],
+    window_sizes: list[int],
+    weather_paths: list[str] | None = None,
+    config_path: str | None = None,
+    weather_df: pd.DataFrame | WeatherStore | None = None,
+    weather_resolution: str = 'daily',
+) -> JointFeatures:
+    """
+    Creates training and test features in one pass over the joined timeline.
+
+    The test rows are appended to the training rows, so lags and rolling
+    windows at the start of the test period are computed from the end of the
+    training history instead of starting from NaN, and the weather merge and
+    calendar features are computed once for both.
+
+    Args:
+        train_data: Path to the training data, or an already loaded DataFrame.
+        test_data: Path to the test data (e.g. ``test.csv``), or a DataFrame.
+            Its rows must all come after the training rows.
+
+    The other arguments are those of :func:`create_features`.
+
+    Returns:
+        JointFeatures with the combined frame and the split point.
+    """
+    train = train_data.copy() if isinstance(train_data, pd.DataFrame) else load_cached_csv(train_data)
+    test = test_data.copy() if isinstance(test_data, pd.DataFrame) else load_cached_csv(test_data)
+    timestamp_col = _find_timestamp_col(train, timestamp_col)
+    test_timestamp_col = _find_timestamp_col(test, timestamp_col)
+    test = test.rename(columns={test_timestamp_col: timestamp_col})
+    train[timestamp_col] = parse_timestamps(train[timestamp_col])
+    test[timestamp_col] = parse_timestamps(test[timestamp_col])
+
+    train = train.sort_values(timestamp_col, kind='stable')
+    test = test.sort_values(timestamp_col, kind='stable')
+    if len(train) and len(test) and test[timestamp_col].iloc[0] <= train[timestamp_col].iloc[-1]:
+        raise ValueError(
+            f"Test data starts at {test[timestamp_col].iloc[0]}, "
+            f"not after the end of the training data ({train[timestamp_col].iloc[-1]})"
+        )
+
+    joint = pd.concat([train, test], ignore_index=True)
+    df = create_features(
+        joint, timestamp_col, cols_to_lag, window_sizes, weather_paths, config_path, weather_df, weather_resolution
+    )
+
+    # Raw columns stay with the side they came from; derived ones go to both
+    derived = [c for c in df.columns if c not in joint.columns]
+    return JointFeatures(
+        frame=df,
+        split_index=len(train),
+        split_time=test[timestamp_col].iloc[0] if len(test) else pd.NaT,
+        train_columns=[c for c in df.columns if c in train.columns or c in derived],
+        test_columns=[c for c in df.columns if c in test.columns or c in derived],
+        timestamp_col=timestamp_col,
+        test_timestamp_col=test_timestamp_col,
+    )
+
+
+def create_feature_matrix(
+    data_path: str | pd.DataFrame,
+    timestamp_col: str,
+    cols_to_lag: list[str],
+    window_sizes: list[int],
+    weather_paths: list[str] | None = None,
+    config_path: str | None = None,
+    weather_df: pd.DataFrame | WeatherStore | None = None,
+    weather_resolution: str = 'daily',
+    feature_names: list[str] | None = None,
+    exclude: list[str] | tuple = (),
+) -> FeatureMatrix:
+    """
+    Creates the numeric features of :func:`create_features` as a float32 matrix.
+
+    The lag, rolling and interaction features are written straight into one
+    preallocated contiguous array instead of being added to the DataFrame.
+
+    Args:
+        feature_names: Column layout to produce (e.g. the training columns);
+            features that cannot be computed are NaN.
+        exclude: Numeric columns to leave out, such as the target.
+
+    The other arguments are those of :func:`create_features`.
+
+    Returns:
+        FeatureMatrix with the matrix and its feature names.
+    """
+    df, timestamp_col = _load_features_input(data_path, timestamp_col)
+    context = FeatureContext(
+        timestamp_col,
+        cols_to_lag,
+        window_sizes,
+        weather=_load_weather(weather_paths, config_path, weather_df),
+        weather_resolution=weather_resolution,
+    )
+    # Only the base columns the requested features need; build_feature_matrix
+    # adds the lags and interactions
+    df = compute_features(df, context, feature_names, groups=BASE_GROUPS)
+    return build_feature_matrix(df, cols_to_lag, window_sizes, feature_names=feature_names, exclude=exclude)
 
 
 def create_test_features(config_path: str | None = None) -> pd.DataFrame:
@@ -0,0 +1,96 @@
+"""Model artifacts round-trip and refuse inputs that do not match their schema."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from src.models.artifacts import MANIFEST_FILE, load_artifact, save_artifact
+from src.models.compiled_trees import CompiledTrees
+from src.models.ensemble import WeightedEnsemble
+
+COLUMNS = ['temperature', 'humidity', 'hour', 'lag_1']
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, len(COLUMNS))), columns=COLUMNS)
+    y = X['temperature'] * 2 + X['lag_1'] + rng.normal(scale=0.1, size=len(X))
+    X.iloc[::17, 1] = np.nan
+    return X, y
+
+
+@pytest.fixture(scope='module')
+def forest(data):
+    X, y = data
+    return RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X.to_numpy(), y)
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_round_trip_matches_native(tmp_path, data, forest, mmap):
+    X, _ = data
+    path = save_artifact(
+        tmp_path / 'forest', forest, COLUMNS, training_window=(pd.Timestamp('2023-01-01'), pd.Timestamp('2023-06-30')),
+        metrics={'nrmse': np.float64(0.1)}, code_version='abc',
+    )
+    artifact = load_artifact(path, mmap=mmap)
+    assert isinstance(artifact.model, CompiledTrees)
+    assert artifact.feature_columns == COLUMNS
+    assert artifact.metrics == {'nrmse': 0.1}
+    assert artifact.training_window == {'start': '2023-01-01T00:00:00', 'end': '2023-06-30T00:00:00'}
+    np.testing.assert_array_equal(artifact.predict(X), forest.predict(X.to_numpy()))
+
+
+def test_ensemble_round_trip_matches_native(tmp_path, data, forest):
+    X, y = data
+    members = [
+        forest,
+        HistGradientBoostingRegressor(max_iter=30, random_state=0).fit(X.to_numpy(), y),
+        Ridge().fit(X.fillna(0).to_numpy(), y),
+    ]
+    ensemble = WeightedEnsemble(members, [0.5, 0.3, 0.2], intercept=0.25)
+    X_dense = X.fillna(0)
+    artifact = load_artifact(save_artifact(tmp_path / 'ensemble', ensemble, COLUMNS))
+    loaded = artifact.model
+    assert isinstance(loaded, WeightedEnsemble)
+    assert [type(m).__name__ for m in loaded.models] == ['CompiledTrees', 'CompiledTrees', 'Ridge']
+    np.testing.assert_allclose(artifact.predict(X_dense), ensemble.predict(X_dense.to_numpy()), rtol=0, atol=1e-12)
+
+
+def test_dataframe_columns_are_reordered(tmp_path, data, forest):
+    X, _ = data
+    artifact = load_artifact(save_artifact(tmp_path / 'forest', forest, COLUMNS))
+    shuffled = X[COLUMNS[::-1]].assign(unused=1.0)
+    np.testing.assert_array_equal(artifact.predict(shuffled), forest.predict(X.to_numpy()))
+
+
+def test_missing_column_is_rejected(tmp_path, data, forest):
+    X, _ = data
+    artifact = load_artifact(save_artifact(tmp_path / 'forest', forest, COLUMNS))
+    with pytest.raises(ValueError, match='lag_1'):
+        artifact.predict(X.drop(columns='lag_1'))
+
+
+def test_wrong_array_width_is_rejected(tmp_path, data, forest):
+    X, _ = data
+    artifact = load_artifact(save_artifact(tmp_path / 'forest', forest, COLUMNS))
+    with pytest.raises(ValueError, match='expects 4 features'):
+        artifact.predict(X.to_numpy()[:, :3])
+
+
+def test_format_version_mismatch_is_rejected(tmp_path, forest):
+    path = save_artifact(tmp_path / 'forest', forest, COLUMNS)
+    manifest = json.loads((path / MANIFEST_FILE).read_text())
+    manifest['format_version'] += 1
+    (path / MANIFEST_FILE).write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match='format version'):
+        load_artifact(path)
+
+
+def test_missing_manifest(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_artifact(tmp_path / 'nothing')
@@ -0,0 +1,75 @@
+"""Compiled tree models predict exactly like the estimators they came from."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from sklearn.tree import DecisionTreeRegressor
+
+from src.models.compiled_trees import CompiledTrees, compile_model, load_compiled, save_compiled
+from src.models.ensemble import WeightedEnsemble
+
+N_ROWS = 600
+N_FEATURES = 8
+
+
+def make_data(missing_fraction):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(N_ROWS, N_FEATURES))
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + X[:, 2] * X[:, 3] + rng.normal(scale=0.1, size=N_ROWS)
+    if missing_fraction:
+        X[rng.random(X.shape) < missing_fraction] = np.nan
+    return X, y
+
+
+def nan_models():
+    return [
+        DecisionTreeRegressor(max_depth=8, random_state=0),
+        RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0),
+        ExtraTreesRegressor(n_estimators=20, max_depth=8, random_state=0),
+        HistGradientBoostingRegressor(max_iter=40, random_state=0),
+    ]
+
+
+@pytest.mark.parametrize('model', nan_models(), ids=lambda model: type(model).__name__)
+def test_compiled_matches_native_with_missing_values(model):
+    X, y = make_data(missing_fraction=0.1)
+    model.fit(X, y)
+    compiled = compile_model(model)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+
+def test_compiled_matches_native_gradient_boosting():
+    X, y = make_data(missing_fraction=0.0)
+    model = GradientBoostingRegressor(n_estimators=50, max_depth=3, random_state=0).fit(X, y)
+    np.testing.assert_allclose(compile_model(model).predict(X), model.predict(X), rtol=0, atol=1e-12)
+
+
+def test_compiled_ensemble_matches_native():
+    X, y = make_data(missing_fraction=0.1)
+    members = [model.fit(X, y) for model in nan_models()]
+    ensemble = WeightedEnsemble(members, [0.1, 0.4, 0.3, 0.2], intercept=0.5)
+    compiled = compile_model(ensemble)
+    assert all(isinstance(member, CompiledTrees) for member in compiled.models)
+    np.testing.assert_allclose(compiled.predict(X), ensemble.predict(X), rtol=0, atol=1e-12)
+
+
+def test_save_load_round_trip(tmp_path):
+    X, y = make_data(missing_fraction=0.1)
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+    path = tmp_path / 'forest.npz'
+    save_compiled(compiled, path)
+    loaded = load_compiled(path)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+
+def test_rejects_wrong_width():
+    X, y = make_data(missing_fraction=0.0)
+    compiled = compile_model(DecisionTreeRegressor(max_depth=4).fit(X, y))
+    with pytest.raises(ValueError):
+        compiled.predict(X[:, :-1])
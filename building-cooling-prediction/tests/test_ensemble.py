@@ -0,0 +1,52 @@
+"""Ensembles sum their members' predictions in member order."""
+
+import time
+
+import numpy as np
+
+from src.models.ensemble import AverageEnsemble, WeightedEnsemble
+
+
+class Constant:
+    """Predicts ``value`` for every row after ``delay`` seconds."""
+
+    def __init__(self, value, delay=0.0):
+        self.value = np.asarray(value, dtype=np.float64)
+        self.delay = delay
+
+    def predict(self, X):
+        time.sleep(self.delay)
+        return np.broadcast_to(self.value, (len(X), *self.value.shape)).copy()
+
+
+def test_sum_follows_member_order_not_completion_order():
+    X = np.zeros((3, 1))
+    # Floating-point addition is not associative: (1e16 - 1e16) + 1 == 1, but (1 + 1e16) - 1e16 == 0
+    members = [Constant(1e16, delay=0.1), Constant(-1e16, delay=0.2), Constant(1.0)]
+    ensemble = WeightedEnsemble(members, [1.0, 1.0, 1.0])
+    expected = np.ones(3)
+    for _ in range(3):
+        np.testing.assert_array_equal(ensemble.predict(X), expected)
+
+
+def test_multi_output_members_keep_their_shape():
+    X = np.zeros((4, 1))
+    members = [Constant([1.0, 2.0]), Constant([3.0, 6.0]), Constant([5.0, 1.0])]
+    predictions = AverageEnsemble(members).predict(X)
+    assert predictions.shape == (4, 2)
+    np.testing.assert_allclose(predictions, np.mean([m.predict(X) for m in members], axis=0))
+
+    weighted = WeightedEnsemble(members, [0.5, 0.0, 0.5], intercept=1.0).predict(X)
+    np.testing.assert_allclose(weighted, np.tile([4.0, 2.5], (4, 1)))
+
+
+def test_members_outputs_are_not_modified():
+    X = np.zeros((2, 1))
+    shared = np.array([1.0, 2.0])
+
+    class Fixed:
+        def predict(self, X):
+            return shared
+
+    WeightedEnsemble([Fixed(), Fixed()], [2.0, 3.0]).predict(X)
+    np.testing.assert_array_equal(shared, [1.0, 2.0])
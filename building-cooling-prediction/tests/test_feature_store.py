@@ -0,0 +1,50 @@
+"""FeatureStore with buildings of different feature schemas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_engineering.feature_store import FeatureStore
+
+
+def features(n_chillers, hours=24 * 45, start='2023-01-20'):
+    df = pd.DataFrame({'record_timestamp': pd.date_range(start, periods=hours, freq='h')})
+    for i in range(1, n_chillers + 1):
+        df[f'CHR-0{i}-delta_t'] = np.arange(hours, dtype=float) * i
+    df['Total_Cooling_Load'] = np.arange(hours, dtype=float)
+    return df
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FeatureStore(tmp_path / 'store')
+    store.write('train', 'two_chillers', features(2), version='a')
+    store.write('train', 'three_chillers', features(3), version='b')
+    store.write('train', 'three_chillers_too', features(3), version='c')
+    return store
+
+
+def test_each_building_keeps_its_schema(store):
+    assert store.buildings('train') == ['three_chillers', 'three_chillers_too', 'two_chillers']
+    assert [store.version('train', b) for b in ('two_chillers', 'three_chillers', 'three_chillers_too')] == ['a', 'b', 'c']
+    assert 'CHR-03-delta_t' not in store.schema('train', buildings=['two_chillers'])['columns']
+
+
+def test_read_of_mixed_schemas_needs_a_choice(store):
+    with pytest.raises(ValueError, match='different schemas'):
+        store.read('train')
+
+    two = store.read('train', buildings=['two_chillers'], start='2023-02-01', end='2023-02-02')
+    assert len(two) == 24 and 'CHR-03-delta_t' not in two.columns
+    three = store.read('train', buildings=['three_chillers', 'three_chillers_too'])
+    assert set(three['building']) == {'three_chillers', 'three_chillers_too'}
+    by_schema = store.read('train', schema=store.latest_schema('train', 'three_chillers'))
+    pd.testing.assert_frame_equal(by_schema, three)
+
+
+def test_rewrite_with_new_schema_moves_only_that_building(store):
+    old = store.latest_schema('train', 'two_chillers')
+    store.write('train', 'two_chillers', features(3), version='d')
+    assert store.latest_schema('train', 'two_chillers') != old
+    assert store.version('train', 'two_chillers') == 'd'
+    assert set(store.read('train')['building']) == {'two_chillers', 'three_chillers', 'three_chillers_too'}
@@ -0,0 +1,148 @@
+"""scripts/fetch_hk_weather.py against a local stand-in for the HKO server."""
+
+import hashlib
+import importlib.util
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from conftest import PROJECT_ROOT
+
+spec = importlib.util.spec_from_file_location('fetch_hk_weather', PROJECT_ROOT / 'scripts' / 'fetch_hk_weather.py')
+fetch = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fetch)
+
+TEMP_PATH = '/weatherAPI/opendata/opendata.php'
+RAIN_PATH = '/weatherAPI/cis/csvfile/HKO/ALL/daily_HKO_RF_ALL.csv'
+
+
+def temperature_csv(days):
+    lines = ['Year,Month,Day,Mean Temperature,Maximum Temperature,Minimum Temperature']
+    lines += [f'2024,1,{d},{15 + d / 10:.1f},{19 + d / 10:.1f},{12 + d / 10:.1f}' for d in days]
+    return '\n'.join(lines) + '\n'
+
+
+def rainfall_csv(days):
+    lines = ['Year,Month,Day,Value,Completeness']
+    lines += [f'2024,1,{d},{d / 2:.1f},C' for d in days]
+    return '\n'.join(lines) + '\n'
+
+
+class StandIn(ThreadingHTTPServer):
+    """Serves ``files`` (path -> CSV text) with ETag / Last-Modified validation."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.files = {}
+        self.log = []
+        self.barrier = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        body = self.server.files.get(path)
+        if body is None:
+            self.send_error(404)
+            self.server.log.append((path, 404))
+            return
+        if self.server.barrier is not None:
+            # Answer only once the other download is in flight as well
+            self.server.barrier.wait()
+        data = body.encode()
+        etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            self.server.log.append((path, 304))
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(1_700_000_000, usegmt=True))
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.log.append((path, 200))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = StandIn()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, 'CACHE_DIR', tmp_path / 'cache')
+    return tmp_path / 'archive.csv'
+
+
+def run(server, archive):
+    server.log.clear()
+    fetch.main(['--base-url', server.url, '--archive', str(archive)])
+    return sorted(server.log)
+
+
+def test_unchanged_sources_get_304_and_leave_archive_untouched(server, archive):
+    server.files = {TEMP_PATH: temperature_csv(range(1, 4)), RAIN_PATH: rainfall_csv(range(1, 4))}
+    assert run(server, archive) == [(RAIN_PATH, 200), (TEMP_PATH, 200)]
+    before = archive.read_bytes(), archive.stat().st_mtime_ns
+
+    assert run(server, archive) == [(RAIN_PATH, 304), (TEMP_PATH, 304)]
+    assert (archive.read_bytes(), archive.stat().st_mtime_ns) == before
+
+
+def test_new_dates_are_appended(server, archive):
+    server.files = {TEMP_PATH: temperature_csv(range(1, 4)), RAIN_PATH: rainfall_csv(range(1, 4))}
+    run(server, archive)
+    first = archive.read_text()
+
+    server.files = {TEMP_PATH: temperature_csv(range(1, 6)), RAIN_PATH: rainfall_csv(range(1, 6))}
+    assert run(server, archive) == [(RAIN_PATH, 200), (TEMP_PATH, 200)]
+    text = archive.read_text()
+    assert text.startswith(first)
+    stored = fetch.load_archive(archive)
+    assert list(stored['date'].dt.day) == [1, 2, 3, 4, 5]
+    assert stored.loc[4, ['Tmax', 'Tmin', 'Tmean', 'Rain_mm']].tolist() == [19.5, 12.5, 15.5, 2.5]
+
+
+def test_day_stored_before_temperature_arrived_is_filled_in(server, archive):
+    # Rainfall is published a day ahead of temperature
+    server.files = {TEMP_PATH: temperature_csv(range(1, 3)), RAIN_PATH: rainfall_csv(range(1, 4))}
+    run(server, archive)
+    assert fetch.load_archive(archive).loc[2, ['Tmax', 'Tmin', 'Tmean']].isna().all()
+
+    server.files[TEMP_PATH] = temperature_csv(range(1, 4))
+    assert run(server, archive) == [(RAIN_PATH, 304), (TEMP_PATH, 200)]
+    stored = fetch.load_archive(archive)
+    assert len(stored) == 3
+    assert stored.loc[2, ['Tmax', 'Tmin', 'Tmean', 'Rain_mm']].tolist() == [19.3, 12.3, 15.3, 1.5]
+
+
+def test_output_selects_date_range(server, archive, tmp_path):
+    server.files = {TEMP_PATH: temperature_csv(range(1, 6)), RAIN_PATH: rainfall_csv(range(1, 6))}
+    out = tmp_path / 'slice.csv'
+    fetch.main(['--base-url', server.url, '--archive', str(archive),
+                '--start', '2024-01-02', '--end', '2024-01-04', '--output', str(out)])
+    assert list(pd.read_csv(out)['date']) == ['2024-01-02', '2024-01-03', '2024-01-04']
+
+
+def test_sources_of_one_station_download_concurrently(server, archive):
+    server.files = {TEMP_PATH: temperature_csv(range(1, 3)), RAIN_PATH: rainfall_csv(range(1, 3))}
+    server.barrier = threading.Barrier(2, timeout=5)
+    assert run(server, archive) == [(RAIN_PATH, 200), (TEMP_PATH, 200)]
@@ -0,0 +1,57 @@
+"""Incremental hourly refreshes match one pass over the whole history."""
+
+import pandas as pd
+import pytest
+
+from conftest import PROJECT_ROOT
+from src.data_processing import incremental
+from src.data_processing.incremental import default_state_path, update_hourly_training_data
+
+N_ROWS = 4 * 24 * 6
+
+
+@pytest.fixture(scope='module')
+def telemetry():
+    return pd.read_csv(PROJECT_ROOT / 'data' / 'raw' / 'Building_X.csv', nrows=N_ROWS)
+
+
+def refresh_in_parts(rows, hourly_path, splits):
+    for lo, hi in zip([0, *splits], [*splits, len(rows)]):
+        update_hourly_training_data(rows.iloc[lo:hi], str(hourly_path))
+    return pd.read_csv(hourly_path)
+
+
+def test_parts_match_single_refresh(telemetry, tmp_path):
+    whole = refresh_in_parts(telemetry, tmp_path / 'whole.csv', [])
+    parts = refresh_in_parts(telemetry, tmp_path / 'parts.csv', [7, 100, 101, 250, 500])
+    pd.testing.assert_frame_equal(parts, whole)
+
+
+def test_crash_before_state_save_does_not_duplicate_hours(telemetry, tmp_path, monkeypatch):
+    expected = refresh_in_parts(telemetry, tmp_path / 'expected.csv', [200])
+
+    hourly_path = tmp_path / 'hourly.csv'
+    update_hourly_training_data(telemetry.iloc[:100], str(hourly_path))
+    saved_state = default_state_path(str(hourly_path)).read_text()
+
+    def crash(aggregator, state_path):
+        raise KeyboardInterrupt
+
+    # The CSV is appended, then the process dies before the state is replaced
+    with monkeypatch.context() as patch:
+        patch.setattr(incremental, 'save_aggregator_state', crash)
+        with pytest.raises(KeyboardInterrupt):
+            update_hourly_training_data(telemetry.iloc[100:200], str(hourly_path))
+    assert default_state_path(str(hourly_path)).read_text() == saved_state
+
+    update_hourly_training_data(telemetry.iloc[100:], str(hourly_path))
+    pd.testing.assert_frame_equal(pd.read_csv(hourly_path), expected)
+
+
+def test_truncated_output_is_an_error(telemetry, tmp_path):
+    hourly_path = tmp_path / 'hourly.csv'
+    update_hourly_training_data(telemetry.iloc[:200], str(hourly_path))
+    with open(hourly_path, 'r+') as f:
+        f.truncate(100)
+    with pytest.raises(ValueError, match='shorter than'):
+        update_hourly_training_data(telemetry.iloc[200:], str(hourly_path))
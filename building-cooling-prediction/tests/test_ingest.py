@@ -0,0 +1,40 @@
+"""Frames from the columnar cache behave like freshly parsed CSVs."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.ingest import load_cached_csv
+from src.data_processing.load_data import load_csv_data
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / 'loads.csv'
+    pd.DataFrame({
+        'record_timestamp': ['2023-01-01 00:00', '2023-01-01 01:00', '2023-01-01 02:00'],
+        'x': [1.0, np.nan, 3.0],
+        'label': ['a', 'b', None],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_cached_frames_are_writable_and_leave_the_cache_unchanged(csv, tmp_path):
+    cache = str(tmp_path / 'cache')
+    for _ in range(2):  # cache miss, then hit
+        frame = load_cached_csv(str(csv), cache_dir=cache)
+        frame.loc[0, 'x'] = 5
+        frame.fillna({'x': 0}, inplace=True)
+        frame.loc[1, 'record_timestamp'] = pd.Timestamp('2030-01-01')
+        assert frame['x'].tolist() == [5.0, 0.0, 3.0]
+
+    fresh = load_cached_csv(str(csv), cache_dir=cache)
+    expected = load_csv_data(str(csv))
+    np.testing.assert_array_equal(fresh['x'], expected['x'])
+    assert fresh['record_timestamp'].tolist() == pd.to_datetime(expected['record_timestamp']).tolist()
+
+
+def test_read_only_is_opt_in(csv, tmp_path):
+    frame = load_cached_csv(str(csv), cache_dir=str(tmp_path / 'cache'), read_only=True)
+    with pytest.raises(ValueError, match='read-only'):
+        frame.loc[0, 'x'] = 5
@@ -0,0 +1,69 @@
+"""Test-period features are computed from the end of the training history."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import PROJECT_ROOT
+from src.data_processing.load_data import parse_timestamps
+from src.utils.helpers import create_features, create_joint_features
+
+TIMESTAMP_COL = 'record_timestamp'
+COLS_TO_LAG = ['Total_Cooling_Load', 'temperature_celsius']
+WINDOW_SIZES = [1, 3, 7, 24]
+N_TRAIN = 24 * 40
+WEATHER_PATHS = [
+    str(PROJECT_ROOT / 'data' / 'raw' / 'external' / 'hk_weather_2023.csv'),
+    str(PROJECT_ROOT / 'data' / 'raw' / 'external' / 'hk_weather_2024_jan.csv'),
+]
+
+
+@pytest.fixture(scope='module')
+def train():
+    hourly = pd.read_csv(PROJECT_ROOT / 'data' / 'processed' / 'hourly_training_data.csv')
+    return hourly.tail(N_TRAIN).reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def test_rows():
+    return pd.read_csv(PROJECT_ROOT / 'data' / 'raw' / 'test.csv')
+
+
+@pytest.fixture(scope='module')
+def joint(train, test_rows):
+    return create_joint_features(
+        train, test_rows, TIMESTAMP_COL, COLS_TO_LAG, WINDOW_SIZES, weather_paths=WEATHER_PATHS,
+    )
+
+
+def test_split(joint, train, test_rows):
+    assert joint.split_index == len(train)
+    assert joint.split_time == pd.Timestamp('2024-01-01 00:00')
+    assert len(joint.train) == len(train) and len(joint.test) == len(test_rows)
+    assert joint.train[TIMESTAMP_COL].max() == pd.Timestamp('2023-12-31 23:00')
+    assert (joint.test['prediction_time'] >= joint.split_time).all()
+    assert 'Total_Cooling_Load' not in joint.test.columns
+    assert 'predicted_load' not in joint.train.columns
+
+
+def test_test_features_match_the_concatenated_timeline(joint, train, test_rows):
+    timeline = pd.concat(
+        [train, test_rows.rename(columns={'prediction_time': TIMESTAMP_COL})], ignore_index=True,
+    )
+    timeline[TIMESTAMP_COL] = parse_timestamps(timeline[TIMESTAMP_COL])
+    expected = create_features(timeline, TIMESTAMP_COL, COLS_TO_LAG, WINDOW_SIZES, weather_paths=WEATHER_PATHS)
+    expected_test = (
+        expected.iloc[len(train):][joint.test_columns]
+        .reset_index(drop=True)
+        .rename(columns={TIMESTAMP_COL: 'prediction_time'})
+    )
+    pd.testing.assert_frame_equal(joint.test, expected_test)
+
+
+def test_january_lags_come_from_december(joint, train):
+    load = train['Total_Cooling_Load'].to_numpy()
+    first = joint.test.iloc[0]
+    assert first['Total_Cooling_Load_lag_1'] == load[-1]
+    assert first['Total_Cooling_Load_lag_24'] == load[-24]
+    np.testing.assert_allclose(first['Total_Cooling_Load_rolling_mean_24'], load[-24:].mean())
+    np.testing.assert_allclose(first['Total_Cooling_Load_rolling_mean_3'], load[-3:].mean())
@@ -0,0 +1,63 @@
+"""OnlineFeatureState reproduces create_features row by row."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import PROJECT_ROOT
+from src.feature_engineering.feature_matrix import numeric_feature_names
+from src.feature_engineering.online import OnlineFeatureState
+from src.utils.helpers import create_features
+
+TIMESTAMP_COL = 'record_timestamp'
+COLS_TO_LAG = ['Total_Cooling_Load', 'temperature_celsius']
+WINDOW_SIZES = [1, 3, 7, 24]
+N_HOURS = 24 * 40
+N_SEED = 24 * 30 + 5
+
+
+@pytest.fixture(scope='module')
+def hourly():
+    df = pd.read_csv(PROJECT_ROOT / 'data' / 'processed' / 'hourly_training_data.csv', nrows=N_HOURS)
+    # Missing readings, one inside the streamed part
+    df.loc[[100, 101, N_SEED + 20], 'Total_Cooling_Load'] = np.nan
+    return df
+
+
+@pytest.fixture(scope='module')
+def weather():
+    return pd.read_csv(PROJECT_ROOT / 'data' / 'raw' / 'external' / 'hk_weather_2023.csv')
+
+
+@pytest.mark.parametrize('resolution', ['daily', 'hourly'])
+def test_streamed_features_match_batch(hourly, weather, resolution):
+    batch = create_features(
+        hourly, TIMESTAMP_COL, COLS_TO_LAG, WINDOW_SIZES, weather_df=weather, weather_resolution=resolution,
+    )
+    feature_names = numeric_feature_names(batch)
+    expected = batch[feature_names].to_numpy(dtype=np.float64)
+
+    state = OnlineFeatureState.from_history(
+        hourly.iloc[:N_SEED], TIMESTAMP_COL, feature_names, COLS_TO_LAG, WINDOW_SIZES, weather,
+        weather_resolution=resolution,
+    )
+    timestamps = pd.to_datetime(hourly[TIMESTAMP_COL])
+    raw_columns = [c for c in hourly.columns if c != TIMESTAMP_COL]
+    streamed = np.vstack([
+        state.update(timestamps[i], hourly.loc[i, raw_columns].to_dict())
+        for i in range(N_SEED, N_HOURS)
+    ])
+
+    np.testing.assert_array_equal(streamed, expected[N_SEED:])
+
+
+def test_features_does_not_advance_the_state(hourly, weather):
+    state = OnlineFeatureState.from_history(
+        hourly.iloc[:N_SEED], TIMESTAMP_COL, ['Total_Cooling_Load_lag_1', 'hour'], COLS_TO_LAG, WINDOW_SIZES, weather,
+    )
+    timestamp = pd.Timestamp(hourly.loc[N_SEED, TIMESTAMP_COL])
+    observation = hourly.loc[N_SEED].drop(TIMESTAMP_COL).to_dict()
+    first = state.features(timestamp, observation)
+    assert np.array_equal(state.features(timestamp, observation), first)
+    assert np.array_equal(state.update(timestamp, observation), first)
+    assert first[0] == hourly.loc[N_SEED - 1, 'Total_Cooling_Load']
@@ -0,0 +1,154 @@
+"""One bad forecast request fails alone, with a 4xx for bad input and a 500 otherwise."""
+
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.serving.service import BuildingForecaster, ForecastRequest, ForecastService, RequestError
+from src.serving.server import ForecastServer
+from src.serving.batcher import MicroBatcher
+
+LAST = pd.Timestamp('2024-01-31 23:00')
+BROKEN_HOURS = 13
+
+
+class StandInForecaster:
+    """Predicts the hour of day; fails every batch holding a 13-hour horizon."""
+
+    def __init__(self):
+        self.calls = []
+
+    def forecast_seeded(self, seeded, horizons):
+        self.calls.append(sorted(horizons))
+        if any(len(hours) == BROKEN_HOURS for hours in horizons.values()):
+            raise RuntimeError('model failure')
+        return {
+            i: pd.DataFrame({'timestamp': hours, 'prediction': hours.hour.to_numpy(dtype=np.float64)})
+            for i, hours in horizons.items()
+        }
+
+
+class StandInState:
+    def copy(self):
+        return self
+
+
+@pytest.fixture
+def service():
+    building = BuildingForecaster('Building_A', StandInForecaster(), StandInState(), LAST, artifact=None)
+    return ForecastService([building], max_hours=48)
+
+
+def request(**payload):
+    return ForecastRequest.from_json(payload, 'Building_A')
+
+
+def test_horizon_beyond_max_hours_is_rejected_before_indexing(service):
+    [result] = service.forecast_batch([request(hours=10_000_000)])
+    assert isinstance(result, RequestError) and result.status == 400
+    [result] = service.forecast_batch([request(start='2024-02-02 12:00', hours=24)])
+    assert isinstance(result, RequestError) and 'at most 48 hours' in str(result)
+
+
+@pytest.mark.parametrize('start', ['2024-02-01T00:00+08:00', '2024-02-01 00:00Z'])
+def test_start_with_offset_is_rejected(start):
+    with pytest.raises(RequestError, match='UTC offset'):
+        request(start=start)
+
+
+@pytest.mark.parametrize('start', [5, {'a': 1}, '99999-01-01', 'not a date'])
+def test_unparseable_start_is_rejected(start):
+    with pytest.raises(RequestError):
+        request(start=start)
+
+
+def test_failing_request_does_not_fail_its_batch(service):
+    results = service.forecast_batch([
+        request(hours=3),
+        request(hours=BROKEN_HOURS),
+        request(hours=0),
+        request(building='Building_B', hours=3),
+        request(start='2024-02-01 05:00', hours=2),
+    ])
+    assert results[0]['predictions'] == [0.0, 1.0, 2.0]
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], RequestError) and results[2].status == 400
+    assert isinstance(results[3], RequestError) and results[3].status == 404
+    assert results[4]['timestamps'] == ['2024-02-01T05:00:00', '2024-02-01T06:00:00']
+
+
+def test_batcher_retries_a_failed_batch_item_by_item():
+    def handler(items):
+        if 'bad' in items:
+            raise ValueError('bad item')
+        return [item.upper() for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, window_ms=50)
+        batcher.start()
+        try:
+            return await asyncio.gather(
+                *(batcher.submit(item) for item in ['a', 'bad', 'c']), return_exceptions=True,
+            )
+        finally:
+            await batcher.stop()
+
+    good, bad, other = asyncio.run(run())
+    assert (good, other) == ('A', 'C')
+    assert isinstance(bad, ValueError)
+
+
+async def _exchange(port, raw):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split()[1])
+    length = next(
+        int(line.split(b':', 1)[1]) for line in head.split(b'\r\n') if line.lower().startswith(b'content-length')
+    )
+    body = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, body
+
+
+def _post(body, content_length=None):
+    body = json.dumps(body).encode()
+    length = len(body) if content_length is None else content_length
+    return (
+        f'POST /forecast HTTP/1.1\r\nContent-Length: {length}\r\nConnection: close\r\n\r\n'.encode() + body
+    )
+
+
+def test_server_status_codes_and_stats(service):
+    server = ForecastServer(service, window_ms=20)
+
+    async def run():
+        server.batcher = MicroBatcher(service.forecast_batch, stats=server.stats, **server.settings)
+        server.batcher.start()
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            answers = await asyncio.gather(
+                _exchange(port, _post({'hours': 3})),
+                _exchange(port, _post({'hours': BROKEN_HOURS})),
+                _exchange(port, _post({'hours': 10_000_000})),
+                _exchange(port, _post({'start': '2024-02-01T00:00+08:00'})),
+            )
+            invalid_length = await _exchange(port, _post({'hours': 3}, content_length='ten'))
+            stats = await _exchange(port, b'GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n')
+        finally:
+            listener.close()
+            await server.batcher.stop()
+        return answers, invalid_length, stats
+
+    answers, invalid_length, (_, stats) = asyncio.run(run())
+    assert [status for status, _ in answers] == [200, 500, 400, 400]
+    assert answers[0][1]['predictions'] == [0.0, 1.0, 2.0]
+    assert invalid_length[0] == 400
+    assert stats['requests'] == 4
+    assert stats['errors'] == 3
+    assert stats['server_errors'] == 1
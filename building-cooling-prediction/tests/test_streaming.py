@@ -0,0 +1,47 @@
+"""Chunked aggregation produces exactly the batch hourly data."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import PROJECT_ROOT
+from src.data_processing.aggregate_data import aggregate_to_hourly
+from src.data_processing.calculate_cooling_load import calculate_chiller_cooling_load
+from src.data_processing.load_data import parse_timestamps
+from src.data_processing.streaming import stream_hourly_cooling_load
+
+TIMESTAMP_COL = 'record_timestamp'
+N_ROWS = 4 * 24 * 5
+
+
+@pytest.fixture(scope='module')
+def raw_csv(tmp_path_factory):
+    df = pd.read_csv(PROJECT_ROOT / 'data' / 'raw' / 'Building_X.csv', nrows=N_ROWS)
+    # A missing reading, a partial hour and two hours without any rows
+    df.iloc[10, 3] = np.nan
+    df = df.drop(index=[41, 42, *range(200, 208)]).reset_index(drop=True)
+    path = tmp_path_factory.mktemp('raw') / 'telemetry.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope='module')
+def batch(raw_csv):
+    df = pd.read_csv(raw_csv)
+    df[TIMESTAMP_COL] = parse_timestamps(df[TIMESTAMP_COL])
+    loads = calculate_chiller_cooling_load(df)
+    return loads, aggregate_to_hourly(loads.copy(), timestamp_col=TIMESTAMP_COL)
+
+
+# 4 rows per hour: every chunk size but 4 (and its multiples) splits hours across chunks
+@pytest.mark.parametrize('chunksize', [3, 7, 50, N_ROWS * 2])
+def test_streamed_hours_match_batch(raw_csv, batch, chunksize, tmp_path):
+    loads_path = tmp_path / 'loads.csv'
+    blocks = list(stream_hourly_cooling_load(str(raw_csv), TIMESTAMP_COL, chunksize, str(loads_path)))
+    streamed = pd.concat(blocks, ignore_index=True)
+    expected_loads, expected_hourly = batch
+    pd.testing.assert_frame_equal(streamed, expected_hourly.reset_index(drop=True))
+
+    written = pd.read_csv(loads_path)
+    written[TIMESTAMP_COL] = parse_timestamps(written[TIMESTAMP_COL])
+    pd.testing.assert_frame_equal(written, expected_loads.reset_index(drop=True), check_dtype=False)
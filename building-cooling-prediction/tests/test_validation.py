@@ -0,0 +1,50 @@
+"""Parallel time-series CV keeps fold order and honours its time budget."""
+
+import time
+
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.linear_model import Ridge
+
+from src.evaluation.validation import cross_validate_time_series
+
+
+class SlowMean(BaseEstimator, RegressorMixin):
+    """Predicts the training mean after sleeping ``seconds_per_row`` per training row."""
+
+    def __init__(self, seconds_per_row=0.01):
+        self.seconds_per_row = seconds_per_row
+
+    def fit(self, X, y):
+        time.sleep(len(X) * self.seconds_per_row)
+        self.mean_ = float(np.mean(y))
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.mean_)
+
+
+def make_data(n_rows=600):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(n_rows, 4))
+    return X, X @ [1.0, 2.0, 0.0, -1.0] + 10 + rng.normal(scale=0.1, size=n_rows)
+
+
+def test_parallel_folds_match_sequential():
+    X, y = make_data()
+    sequential = cross_validate_time_series(Ridge(), X, y, n_splits=5, gap=3, n_jobs=1)
+    parallel = cross_validate_time_series(Ridge(), X, y, n_splits=5, gap=3, n_jobs=2)
+    assert sequential.complete and parallel.complete
+    assert parallel.fold_scores == sequential.fold_scores
+    assert parallel.fold_sizes == sequential.fold_sizes
+    np.testing.assert_array_equal(parallel.y_pred, sequential.y_pred)
+
+
+def test_time_budget_is_checked_after_every_fold():
+    X, y = make_data()
+    # Folds train on 100 ... 500 rows, i.e. for 1 ... 5 seconds, all at once
+    result = cross_validate_time_series(SlowMean(), X, y, n_splits=5, n_jobs=5, time_budget=3)
+    assert not result.complete
+    assert result.stopped.startswith('time budget')
+    assert result.elapsed < 4.5
+    assert len(result.y_pred) == sum(result.fold_sizes)